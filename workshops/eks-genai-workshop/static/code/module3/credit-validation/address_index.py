@@ -0,0 +1,515 @@
+"""
+Indexed address reference lookups for the address validator.
+
+Addresses are normalized USPS-style (case, punctuation, street suffix and
+directional abbreviations, secondary unit split off) and stored in a compact
+on-disk index that is opened with memory maps, so a multi-million row
+reference file costs page cache rather than Python heap:
+
+    meta.json              format version, row count, columns
+    keys.bin               normalized street keys, concatenated
+    key_offsets.npy        uint64 [rows + 1]
+    records.bin            tab-separated record fields, concatenated
+    record_offsets.npy     uint64 [rows + 1]
+    key_hashes.npy         uint64 [rows], sorted 64-bit key hashes
+    key_rows.npy           uint32 [rows], row for each sorted hash
+    trigram_offsets.npy    uint64 [37^3 + 1], postings range per trigram
+    trigram_postings.npy   uint32, rows containing each trigram (sorted)
+    zip_offsets.npy        uint64 [100001], rows range per 5-digit ZIP
+    zip_rows.npy           uint32, rows sorted by ZIP
+    number_hashes.npy      uint64, sorted hashes of the house number token
+    number_rows.npy        uint32, row for each sorted house number hash
+
+Exact lookups are a binary search over the key hashes. Fuzzy lookups count
+shared trigrams for candidate rows - the smaller of the rows in the
+applicant's ZIP and the rows with the same house number, otherwise the rows
+found through the rarest query trigrams - and verify the best few, requiring
+the house number to match.
+
+Build an index from CSV (columns: street, city, state, zip_code, county,
+is_valid, is_residential, delivery_point, address_type, occupancy_status,
+risk_score):
+
+    python address_index.py build addresses.csv /data/address-index
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import shutil
+import sys
+import unicodedata
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+COLUMNS = (
+    "street", "city", "state", "zip_code", "county", "is_valid", "is_residential",
+    "delivery_point", "address_type", "occupancy_status", "risk_score",
+)
+FUZZY_MIN_SIMILARITY = float(os.getenv("ADDRESS_FUZZY_MIN_SIMILARITY", "0.6"))
+# Upper bound on candidate rows scored per fuzzy lookup without a ZIP
+FUZZY_MAX_CANDIDATES = int(os.getenv("ADDRESS_FUZZY_MAX_CANDIDATES", "5000"))
+FUZZY_VERIFY = 8
+# Candidates kept after the rare-trigram prefilter, scored against every query trigram
+FUZZY_PREFILTER = int(os.getenv("ADDRESS_FUZZY_PREFILTER", "256"))
+BUILD_CHUNK_ROWS = 500_000
+
+# USPS Publication 28 standard abbreviations (common subset)
+STREET_SUFFIXES = {
+    "alley": "aly", "allee": "aly", "ally": "aly", "avenue": "ave", "av": "ave", "aven": "ave",
+    "avenu": "ave", "avn": "ave", "avnue": "ave", "boulevard": "blvd", "boul": "blvd", "boulv": "blvd",
+    "circle": "cir", "circ": "cir", "circl": "cir", "crcl": "cir", "court": "ct", "crt": "ct",
+    "center": "ctr", "centre": "ctr", "cntr": "ctr", "crossing": "xing", "crssng": "xing",
+    "drive": "dr", "driv": "dr", "drv": "dr", "expressway": "expy", "expr": "expy", "freeway": "fwy",
+    "freewy": "fwy", "heights": "hts", "ht": "hts", "highway": "hwy", "highwy": "hwy", "hiway": "hwy",
+    "lane": "ln", "mount": "mt", "mountain": "mtn", "parkway": "pkwy", "parkwy": "pkwy", "pky": "pkwy",
+    "place": "pl", "plaza": "plz", "plza": "plz", "point": "pt", "road": "rd", "route": "rte",
+    "square": "sq", "sqr": "sq", "street": "st", "str": "st", "strt": "st", "terrace": "ter",
+    "terr": "ter", "trail": "trl", "trails": "trl", "way": "way", "wy": "way",
+}
+DIRECTIONALS = {
+    "north": "n", "south": "s", "east": "e", "west": "w",
+    "northeast": "ne", "northwest": "nw", "southeast": "se", "southwest": "sw",
+}
+UNIT_DESIGNATORS = {
+    "apartment": "apt", "apt": "apt", "suite": "ste", "ste": "ste", "unit": "unit", "building": "bldg",
+    "bldg": "bldg", "floor": "fl", "fl": "fl", "room": "rm", "rm": "rm", "lot": "lot", "space": "spc",
+    "spc": "spc", "#": "#",
+}
+_ABBREVIATIONS = {**STREET_SUFFIXES, **DIRECTIONALS}
+_SEPARATORS = re.compile(r"[^a-z0-9#]+")
+
+# Keys use a 37 symbol alphabet (space, a-z, 0-9), so trigrams have dense codes
+_ALPHABET_SIZE = 37
+_TRIGRAM_SPACE = _ALPHABET_SIZE ** 3
+_CHAR_CODES = np.zeros(256, dtype=np.int64)
+_CHAR_CODES[np.frombuffer(b"abcdefghijklmnopqrstuvwxyz", dtype=np.uint8)] = np.arange(1, 27)
+_CHAR_CODES[np.frombuffer(b"0123456789", dtype=np.uint8)] = np.arange(27, 37)
+_NO_ZIP = 100000
+_FIELD_SEPARATORS = str.maketrans("\t\n", "  ")
+
+
+def normalize_street(street: str) -> Tuple[str, str]:
+    """
+    Normalize a street line for indexing and lookup
+
+    Args:
+        street: Street address as written by the applicant
+
+    Returns:
+        tuple: (normalized primary address, normalized secondary unit)
+            e.g. "123 North Main Street, Apt. 4" -> ("123 n main st", "apt 4")
+    """
+    text = (street or "").lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    tokens = _SEPARATORS.sub(" ", text.replace("#", " # ")).split()
+    for index, token in enumerate(tokens):
+        if index > 0 and token in UNIT_DESIGNATORS:
+            unit = [UNIT_DESIGNATORS[token]] + tokens[index + 1:]
+            tokens = tokens[:index]
+            break
+    else:
+        unit = []
+    primary = " ".join(_ABBREVIATIONS.get(token, token) for token in tokens if token != "#")
+    return primary, " ".join(unit)
+
+
+def normalize_zip(zip_code: Any) -> Optional[int]:
+    """5-digit ZIP as an int, or None if the value has no leading 5 digits"""
+    text = str(zip_code or "").strip()
+    return int(text[:5]) if text[:5].isdigit() and len(text[:5]) == 5 else None
+
+
+def _key_hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def _trigram_codes(key: str) -> np.ndarray:
+    """Unique trigram codes of " key " """
+    codes = _CHAR_CODES[np.frombuffer(f" {key} ".encode("ascii"), dtype=np.uint8)]
+    if len(codes) < 3:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(codes[:-2] * _ALPHABET_SIZE ** 2 + codes[1:-1] * _ALPHABET_SIZE + codes[2:])
+
+
+def _trigram_set(key: str) -> set:
+    padded = f" {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _house_number(key: str) -> Optional[str]:
+    first = key.split(" ", 1)[0]
+    return first if first[:1].isdigit() else None
+
+
+def _hash_range(hashes: np.ndarray, rows: np.ndarray, token: str) -> np.ndarray:
+    """Rows whose token hash equals the hash of `token` (callers check for collisions)"""
+    target = np.uint64(_key_hash(token.encode("ascii")))
+    return rows[int(np.searchsorted(hashes, target, side="left")):int(np.searchsorted(hashes, target, side="right"))]
+
+
+def _save(directory: str, name: str, values: np.ndarray):
+    np.save(os.path.join(directory, name), values)
+
+
+def build_address_index(rows: Iterable[Dict[str, Any]], directory: str) -> int:
+    """
+    Build an on-disk address index
+
+    Args:
+        rows: Reference records with the fields in COLUMNS
+        directory: Output directory, replaced once the build completes
+
+    Returns:
+        int: Number of rows indexed
+    """
+    building = f"{directory}.building"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+
+    key_offsets = array("Q", [0])
+    record_offsets = array("Q", [0])
+    hashes = array("Q")
+    zips = array("I")
+    numbers = array("Q")
+    with open(os.path.join(building, "keys.bin"), "wb") as keys_file, \
+            open(os.path.join(building, "records.bin"), "wb") as records_file:
+        for row in rows:
+            key = normalize_street(row.get("street") or "")[0].encode("ascii")
+            values = ["" if row.get(column) is None else str(row[column]) for column in COLUMNS]
+            record = "\t".join(values)
+            if record.count("\t") != len(COLUMNS) - 1 or "\n" in record:
+                record = "\t".join(value.translate(_FIELD_SEPARATORS) for value in values)
+            record = record.encode("utf-8")
+            keys_file.write(key)
+            records_file.write(record)
+            key_offsets.append(key_offsets[-1] + len(key))
+            record_offsets.append(record_offsets[-1] + len(record))
+            hashes.append(_key_hash(key))
+            house_number = _house_number(key.decode("ascii"))
+            numbers.append(_key_hash(house_number.encode("ascii")) if house_number else 0)
+            zip5 = normalize_zip(row.get("zip_code"))
+            zips.append(_NO_ZIP if zip5 is None else zip5)
+
+    count = len(hashes)
+    key_offsets = np.frombuffer(key_offsets, dtype=np.uint64)
+    _save(building, "key_offsets.npy", key_offsets)
+    _save(building, "record_offsets.npy", np.frombuffer(record_offsets, dtype=np.uint64))
+
+    hashes = np.frombuffer(hashes, dtype=np.uint64)
+    order = np.argsort(hashes, kind="stable")
+    _save(building, "key_hashes.npy", hashes[order])
+    _save(building, "key_rows.npy", order.astype(np.uint32))
+    del hashes, order
+
+    zips = np.frombuffer(zips, dtype=np.uint32)
+    zip_order = np.argsort(zips, kind="stable")
+    zip_counts = np.bincount(zips, minlength=_NO_ZIP + 1)[:_NO_ZIP]
+    _save(building, "zip_offsets.npy", np.concatenate(([0], np.cumsum(zip_counts))).astype(np.uint64))
+    _save(building, "zip_rows.npy", zip_order[:int(zip_counts.sum())].astype(np.uint32))
+    del zips, zip_order
+
+    numbers = np.frombuffer(numbers, dtype=np.uint64)
+    number_order = np.argsort(numbers, kind="stable")
+    number_order = number_order[numbers[number_order] != 0]
+    _save(building, "number_hashes.npy", numbers[number_order])
+    _save(building, "number_rows.npy", number_order.astype(np.uint32))
+    del numbers, number_order
+
+    _build_trigram_postings(building, key_offsets)
+
+    with open(os.path.join(building, "meta.json"), "w") as f:
+        json.dump({"format_version": INDEX_FORMAT_VERSION, "rows": count, "columns": list(COLUMNS)}, f)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(building, directory)
+    logger.info(f"Built address index with {count} rows at {directory}")
+    return count
+
+
+def _key_trigrams(chars: np.ndarray, lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trigram codes of several concatenated keys, each padded as " key "
+
+    Args:
+        chars: Key bytes, concatenated
+        lengths: Length of each key
+
+    Returns:
+        tuple: (trigram codes, index of the key each trigram belongs to)
+    """
+    rows = np.arange(len(lengths), dtype=np.int64)
+    row_of_char = np.repeat(rows, lengths)
+    padded = np.zeros(len(chars) + 2 * len(rows), dtype=np.int64)
+    padded[np.arange(len(chars)) + 2 * row_of_char + 1] = _CHAR_CODES[chars]
+
+    padded_ends = np.cumsum(lengths + 2)
+    row_of_position = np.repeat(rows, lengths + 2)[:-2]
+    valid = np.arange(len(padded) - 2) + 3 <= padded_ends[row_of_position]
+    codes = (padded[:-2] * _ALPHABET_SIZE ** 2 + padded[1:-1] * _ALPHABET_SIZE + padded[2:])[valid]
+    return codes, row_of_position[valid]
+
+
+def _chunk_trigrams(keys: np.ndarray, key_offsets: np.ndarray, first: int, last: int) -> np.ndarray:
+    """Unique (trigram code, row) pairs for rows [first, last), sorted by code then row"""
+    starts = key_offsets[first:last].astype(np.int64)
+    lengths = key_offsets[first + 1:last + 1].astype(np.int64) - starts
+    base = int(starts[0]) if len(starts) else 0
+    codes, rows = _key_trigrams(keys[base:int(key_offsets[last])], lengths)
+    pairs = codes * (last - first) + rows
+    pairs.sort()
+    return pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))] if len(pairs) else pairs
+
+
+def _build_trigram_postings(directory: str, key_offsets: np.ndarray):
+    """Two passes over the keys in row chunks: count postings per trigram, then fill them"""
+    count = len(key_offsets) - 1
+    keys = np.fromfile(os.path.join(directory, "keys.bin"), dtype=np.uint8) if count else np.empty(0, np.uint8)
+    chunks = [(first, min(first + BUILD_CHUNK_ROWS, count)) for first in range(0, count, BUILD_CHUNK_ROWS)]
+
+    totals = np.zeros(_TRIGRAM_SPACE, dtype=np.int64)
+    for first, last in chunks:
+        pairs = _chunk_trigrams(keys, key_offsets, first, last)
+        totals += np.bincount(pairs // (last - first), minlength=_TRIGRAM_SPACE)
+    offsets = np.concatenate(([0], np.cumsum(totals))).astype(np.uint64)
+    _save(directory, "trigram_offsets.npy", offsets)
+
+    postings = np.lib.format.open_memmap(
+        os.path.join(directory, "trigram_postings.npy"), mode="w+", dtype=np.uint32, shape=(int(offsets[-1]),)
+    )
+    # Chunks are visited in row order, so every posting list ends up sorted by row
+    cursor = offsets[:-1].astype(np.int64)
+    for first, last in chunks:
+        pairs = _chunk_trigrams(keys, key_offsets, first, last)
+        codes = pairs // (last - first)
+        chunk_counts = np.bincount(codes, minlength=_TRIGRAM_SPACE)
+        chunk_starts = np.concatenate(([0], np.cumsum(chunk_counts)[:-1]))
+        rank = np.arange(len(codes)) - chunk_starts[codes]
+        postings[cursor[codes] + rank] = pairs % (last - first) + first
+        cursor += chunk_counts
+    postings.flush()
+    del postings
+
+
+def read_address_csv(path: str) -> Iterable[Dict[str, str]]:
+    """Stream reference rows from a CSV file with a header row"""
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+class AddressIndex:
+    """
+    Read-only, memory-mapped address index
+
+    Args:
+        directory: Index directory written by build_address_index
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported address index format: {self.meta.get('format_version')}")
+        self.rows = self.meta["rows"]
+
+        def load(name):
+            return np.load(os.path.join(directory, name), mmap_mode="r")
+
+        self._keys = self._map("keys.bin")
+        self._key_bytes = np.frombuffer(self._keys, dtype=np.uint8)
+        self._records = self._map("records.bin")
+        self._key_offsets = load("key_offsets.npy")
+        self._record_offsets = load("record_offsets.npy")
+        self._key_hashes = load("key_hashes.npy")
+        self._key_rows = load("key_rows.npy")
+        self._trigram_offsets = load("trigram_offsets.npy")
+        self._trigram_postings = load("trigram_postings.npy")
+        self._zip_offsets = load("zip_offsets.npy")
+        self._zip_rows = load("zip_rows.npy")
+        self._number_hashes = load("number_hashes.npy")
+        self._number_rows = load("number_rows.npy")
+
+    def _map(self, name: str):
+        path = os.path.join(self.directory, name)
+        if os.path.getsize(path) == 0:
+            return b""
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self.rows
+
+    def key(self, row: int) -> str:
+        return self._keys[int(self._key_offsets[row]):int(self._key_offsets[row + 1])].decode("ascii")
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Decode one row into the validator's address record shape"""
+        raw = self._records[int(self._record_offsets[row]):int(self._record_offsets[row + 1])].decode("utf-8")
+        fields = dict(zip(COLUMNS, raw.split("\t")))
+        is_valid = fields.get("is_valid", "").lower() in ("true", "1", "yes", "y")
+        risk_score = fields.get("risk_score", "")
+        return {
+            "standardized_address": (fields.get("street") or None) if is_valid else None,
+            "city": fields.get("city") or None,
+            "state": fields.get("state") or None,
+            "zip_code": fields.get("zip_code") or None,
+            "county": fields.get("county") or None,
+            "is_valid": is_valid,
+            "is_residential": fields.get("is_residential", "").lower() in ("true", "1", "yes", "y"),
+            "delivery_point": fields.get("delivery_point") or ("Valid" if is_valid else "Invalid"),
+            "address_type": fields.get("address_type") or "Unknown",
+            "occupancy_status": fields.get("occupancy_status") or "Unknown",
+            "risk_score": int(float(risk_score)) if risk_score else (15 if is_valid else 95),
+        }
+
+    def exact_rows(self, key: str) -> List[int]:
+        """Rows whose normalized key equals `key`"""
+        rows = _hash_range(self._key_hashes, self._key_rows, key)
+        return [int(row) for row in rows if self.key(int(row)) == key]
+
+    def _postings(self, code: int) -> np.ndarray:
+        return self._trigram_postings[int(self._trigram_offsets[code]):int(self._trigram_offsets[code + 1])]
+
+    def fuzzy_rows(self, key: str, zip5: Optional[int] = None,
+                   min_similarity: float = FUZZY_MIN_SIMILARITY) -> List[Tuple[int, float]]:
+        """
+        Rows similar to `key` by trigram Dice similarity, best first
+
+        Args:
+            key: Normalized street key
+            zip5: Applicant ZIP; candidates come from this ZIP or the house number, whichever is narrower
+            min_similarity: Minimum Dice similarity to return
+
+        Returns:
+            list: (row, similarity) pairs
+        """
+        query = _trigram_codes(key)
+        if not len(query):
+            return []
+        query_trigrams = _trigram_set(key)
+        house_number = _house_number(key)
+
+        # Token filters: rows in the same ZIP, rows with the same house number
+        filters = []
+        if zip5 is not None:
+            filters.append(self._zip_rows[int(self._zip_offsets[zip5]):int(self._zip_offsets[zip5 + 1])])
+        if house_number is not None:
+            filters.append(_hash_range(self._number_hashes, self._number_rows, house_number))
+        filters = [rows for rows in filters if len(rows)]
+        candidates = np.sort(min(filters, key=len)) if filters else None
+        if candidates is not None and len(candidates) > FUZZY_MAX_CANDIDATES:
+            candidates = None
+        if candidates is None:
+            # Prefix filter: a match shares at least `needed` query trigrams, so it
+            # must appear in one of the len(query) - needed + 1 rarest posting lists
+            needed = max(1, math.ceil(min_similarity * len(query) / (2 - min_similarity)))
+            postings = [self._postings(int(code)) for code in query]
+            rarest = sorted(postings, key=len)[:len(query) - needed + 1]
+            selected, total = [], 0
+            for posting in rarest:
+                if not len(posting):
+                    continue
+                if selected and total + len(posting) > FUZZY_MAX_CANDIDATES:
+                    break
+                selected.append(posting[:FUZZY_MAX_CANDIDATES])
+                total += len(selected[-1])
+            if not selected:
+                return []
+            # Keep the rows that share the most of these rare trigrams
+            candidates, prefix_shared = np.unique(np.concatenate(selected), return_counts=True)
+            if len(candidates) > FUZZY_PREFILTER:
+                candidates = candidates[np.argpartition(-prefix_shared, FUZZY_PREFILTER)[:FUZZY_PREFILTER]]
+
+        if len(candidates) <= FUZZY_VERIFY:
+            # Few candidates: scoring them directly is cheaper than the posting lists
+            return self._verify(query_trigrams, house_number, (int(row) for row in candidates), min_similarity)
+
+        # Estimate similarity for every candidate at once from their keys' trigrams
+        candidates = np.asarray(candidates, dtype=np.int64)
+        starts = self._key_offsets[candidates].astype(np.int64)
+        key_lengths = self._key_offsets[candidates + 1].astype(np.int64) - starts
+        gather = np.repeat(starts - np.cumsum(key_lengths) + key_lengths, key_lengths) + np.arange(int(key_lengths.sum()))
+        codes, owners = _key_trigrams(self._key_bytes[gather], key_lengths)
+        shared = np.bincount(owners[np.isin(codes, query)], minlength=len(candidates))
+        estimate = 2 * shared / (len(query) + key_lengths)
+        best = np.argsort(-estimate, kind="stable")[:FUZZY_VERIFY]
+        best = best[estimate[best] >= min_similarity * 0.8]
+        return self._verify(query_trigrams, house_number, (int(candidates[index]) for index in best), min_similarity)
+
+    def _verify(self, query_trigrams: set, house_number: Optional[str], rows: Iterable[int],
+                min_similarity: float) -> List[Tuple[int, float]]:
+        """Exact Dice similarity for candidate rows; a different house number is never a match"""
+        matches = []
+        for row in rows:
+            candidate_key = self.key(row)
+            if house_number is not None and _house_number(candidate_key) != house_number:
+                continue
+            candidate_trigrams = _trigram_set(candidate_key)
+            similarity = 2 * len(query_trigrams & candidate_trigrams) / (len(query_trigrams) + len(candidate_trigrams))
+            if similarity >= min_similarity:
+                matches.append((row, round(similarity, 4)))
+        return sorted(matches, key=lambda match: -match[1])
+
+    def lookup(self, street: str, city: str = "", state: str = "", zip_code: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Find the reference record for an address
+
+        Args:
+            street: Street address as provided by the applicant
+            city: City name, used to choose between rows with the same street
+            state: State abbreviation, used to choose between rows with the same street
+            zip_code: ZIP code, narrows fuzzy candidates and ranks matches
+
+        Returns:
+            dict: Address record plus match_type ("exact" or "fuzzy") and match_score, or None
+        """
+        key, _ = normalize_street(street)
+        if not key:
+            return None
+        zip5 = normalize_zip(zip_code)
+
+        rows = [(row, 1.0) for row in self.exact_rows(key)]
+        match_type = "exact"
+        if not rows:
+            rows = self.fuzzy_rows(key, zip5)
+            match_type = "fuzzy"
+            if not rows and zip5 is not None:
+                # The applicant's ZIP may be wrong; search the whole index
+                rows = self.fuzzy_rows(key)
+        if not rows:
+            return None
+
+        city = (city or "").strip().lower()
+        state = (state or "").strip().lower()
+
+        def rank(match):
+            record = self.record(match[0])
+            location = (
+                (zip5 is not None and normalize_zip(record["zip_code"]) == zip5) * 2
+                + (bool(city) and (record["city"] or "").lower() == city)
+                + (bool(state) and (record["state"] or "").lower() == state)
+            )
+            return match[1], location, record
+
+        similarity, _, record = max((rank(match) for match in rows), key=lambda ranked: ranked[:2])
+        return {**record, "match_type": match_type, "match_score": similarity}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 4 or sys.argv[1] != "build":
+        print("Usage: python address_index.py build <addresses.csv> <index directory>")
+        sys.exit(1)
+    build_address_index(read_address_csv(sys.argv[2]), sys.argv[3])
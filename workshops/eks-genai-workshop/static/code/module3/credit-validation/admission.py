@@ -0,0 +1,338 @@
+"""
+Client-side admission control for model gateway calls.
+
+Each model gets a requests-per-minute and a tokens-per-minute token bucket
+(MODEL_RATE_LIMITS, falling back to DEFAULT_MODEL_RPM / DEFAULT_MODEL_TPM).
+A call waits until both buckets cover it, so the budgets are used steadily
+instead of bursting into gateway throttling. Waiting calls are served in
+priority order: the "interactive" lane (a user waiting on an upload) before
+the "batch" lane (batch endpoint, job workers), first come first served
+within a lane. The lane is taken from the admission_lane context variable,
+which entry points set for everything they run. MCP servers run in other
+processes, so the agent passes the lane as a tool argument (lane_tools)
+and the tool sets the variable before calling the gateway.
+
+When the gateway still answers 429, the model's budget is paused for the
+Retry-After period (or a jittered exponential backoff without one) and
+the call is queued again, up to ADMISSION_MAX_RETRIES times, so
+applications are delayed rather than failed.
+
+Token counts are estimated up front and reconciled with the usage the
+gateway reports. Budgets are per process: divide the gateway's limits
+between replicas.
+
+Example MODEL_RATE_LIMITS:
+
+    {"bedrock/claude-4.5-sonnet": {"rpm": 50, "tpm": 200000}}
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import openai
+from langchain_openai import ChatOpenAI
+
+logger = logging.getLogger(__name__)
+
+MODEL_RATE_LIMITS = json.loads(os.getenv("MODEL_RATE_LIMITS", "{}") or "{}")
+# 0 disables a budget
+DEFAULT_MODEL_RPM = float(os.getenv("DEFAULT_MODEL_RPM", "0"))
+DEFAULT_MODEL_TPM = float(os.getenv("DEFAULT_MODEL_TPM", "0"))
+# Bucket capacity in seconds of budget: how much may be spent at once after an idle period
+ADMISSION_BURST_SECONDS = float(os.getenv("ADMISSION_BURST_SECONDS", "10"))
+ADMISSION_MAX_RETRIES = int(os.getenv("ADMISSION_MAX_RETRIES", "8"))
+ADMISSION_BACKOFF_BASE_SECONDS = float(os.getenv("ADMISSION_BACKOFF_BASE_SECONDS", "2"))
+ADMISSION_BACKOFF_MAX_SECONDS = float(os.getenv("ADMISSION_BACKOFF_MAX_SECONDS", "60"))
+# Output tokens reserved per call before the real usage is known
+ADMISSION_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("ADMISSION_OUTPUT_TOKEN_ESTIMATE", "1000"))
+
+LANES = {"interactive": 0, "batch": 1}
+# Set by the agent per request; MCP tools that call the gateway take it as a `lane` argument
+# (passed by lane_tools) and set it before their calls are admitted
+admission_lane: contextvars.ContextVar = contextvars.ContextVar("admission_lane", default="interactive")
+LANE_ARG = "lane"
+
+
+def set_lane(lane: str):
+    """Admit this context's gateway calls in `lane` (unknown lanes are interactive)"""
+    admission_lane.set(lane if lane in LANES else "interactive")
+
+
+def lane_tools(tools: List[Any]) -> List[Any]:
+    """Tools that pass the caller's admission lane; the lane argument is hidden from the model"""
+    from mcp_registry import inject_tool_arg
+
+    return inject_tool_arg(tools, LANE_ARG, admission_lane.get)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether error is a gateway 429, directly or as the cause of a wrapping exception"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, openai.RateLimitError) or getattr(error, "status_code", None) == 429:
+            return True
+        if isinstance(error, BaseExceptionGroup):
+            return any(is_rate_limit_error(inner) for inner in error.exceptions)
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Retry-After (or retry-after-ms) from a 429 response, if present"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass  # HTTP date form; fall back to backoff
+    return None
+
+
+class TokenBucket:
+    """
+    Continuously refilled bucket; a debit larger than the capacity waits for a
+    full bucket and leaves it in debt
+
+    Args:
+        rate: Units added per second
+        capacity: Maximum balance
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be debited"""
+        self._refill(now)
+        need = min(amount, self.capacity)
+        return 0.0 if self.level >= need else (need - self.level) / self.rate
+
+    def debit(self, amount: float, now: float):
+        self._refill(now)
+        self.level = min(self.capacity, self.level - amount)
+
+
+class ModelBudget:
+    """Request and token buckets for one model, with a priority wait queue"""
+
+    def __init__(self, model: str, rpm: float, tpm: float, burst_seconds: float = ADMISSION_BURST_SECONDS):
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm / 60, max(1.0, rpm * burst_seconds / 60)) if rpm else None
+        self.tokens = TokenBucket(tpm / 60, max(1.0, tpm * burst_seconds / 60)) if tpm else None
+        self.blocked_until = 0.0
+        self._waiters: List[list] = []
+        self._sequence = itertools.count()
+        self._condition = asyncio.Condition()
+        self.counters = {"admitted": 0, "admitted_batch": 0, "throttled": 0, "wait_seconds_total": 0.0,
+                         "wait_seconds_max": 0.0, "tokens_estimated": 0, "tokens_reported": 0}
+
+    def _delay(self, tokens: float, now: float) -> float:
+        delay = max(0.0, self.blocked_until - now)
+        if self.requests is not None:
+            delay = max(delay, self.requests.delay(1, now))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.delay(tokens, now))
+        return delay
+
+    async def acquire(self, tokens: float, lane: str) -> float:
+        """
+        Wait until this call is at the head of the queue and both budgets cover it
+
+        Returns:
+            float: Seconds waited
+        """
+        start = time.monotonic()
+        entry = [LANES.get(lane, LANES["batch"]), next(self._sequence)]
+        async with self._condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiters[0] is entry:
+                        timeout = self._delay(tokens, time.monotonic())
+                        if timeout <= 0:
+                            break
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                heapq.heappop(self._waiters)
+                now = time.monotonic()
+                if self.requests is not None:
+                    self.requests.debit(1, now)
+                if self.tokens is not None:
+                    self.tokens.debit(tokens, now)
+            finally:
+                if entry in self._waiters:  # cancelled while waiting
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+        waited = time.monotonic() - start
+        self.counters["admitted"] += 1
+        self.counters["admitted_batch"] += lane == "batch"
+        self.counters["wait_seconds_total"] += waited
+        self.counters["wait_seconds_max"] = max(self.counters["wait_seconds_max"], waited)
+        self.counters["tokens_estimated"] += int(tokens)
+        return waited
+
+    def reconcile(self, estimated: float, actual: Optional[float]):
+        """Correct the token bucket once the real usage is known"""
+        if actual is None:
+            return
+        self.counters["tokens_reported"] += int(actual)
+        if self.tokens is not None:
+            self.tokens.debit(actual - estimated, time.monotonic())
+
+    async def throttled(self, error: BaseException, attempt: int) -> float:
+        """Pause the whole budget after a 429 and return the pause in seconds"""
+        retry_after = retry_after_seconds(error)
+        backoff = min(ADMISSION_BACKOFF_MAX_SECONDS, ADMISSION_BACKOFF_BASE_SECONDS * 2 ** attempt)
+        delay = max(retry_after or 0.0, backoff if retry_after is None else 0.0)
+        delay += random.uniform(0, delay * 0.25)  # spread the retries of everything paused together
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        self.counters["throttled"] += 1
+        async with self._condition:
+            self._condition.notify_all()
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "waiting": len(self._waiters),
+            "requests_available": round(self.requests.level, 1) if self.requests else None,
+            "tokens_available": round(self.tokens.level) if self.tokens else None,
+            "blocked_for_seconds": round(max(0.0, self.blocked_until - time.monotonic()), 1),
+            **{key: round(value, 3) if isinstance(value, float) else value for key, value in self.counters.items()},
+        }
+
+
+class AdmissionController:
+    """
+    Per-model budgets shared by every gateway call in the process
+
+    Args:
+        limits: Model name -> {"rpm": ..., "tpm": ...}
+        default_rpm: Requests per minute for unlisted models (0: unlimited)
+        default_tpm: Tokens per minute for unlisted models (0: unlimited)
+        max_retries: 429 retries per call before the error is raised
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None, default_rpm: float = DEFAULT_MODEL_RPM,
+                 default_tpm: float = DEFAULT_MODEL_TPM, max_retries: int = ADMISSION_MAX_RETRIES):
+        self.limits = MODEL_RATE_LIMITS if limits is None else limits
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self.max_retries = max_retries
+        self.budgets: Dict[str, ModelBudget] = {}
+
+    def budget(self, model: str) -> ModelBudget:
+        if model not in self.budgets:
+            limits = self.limits.get(model, {})
+            self.budgets[model] = ModelBudget(
+                model, float(limits.get("rpm", self.default_rpm)), float(limits.get("tpm", self.default_tpm))
+            )
+        return self.budgets[model]
+
+    async def call(self, model: str, fn: Callable[[], Awaitable[Any]], estimated_tokens: float) -> Any:
+        """
+        Run fn() once admitted, re-queueing it after 429s
+
+        Args:
+            model: Model name the budget is kept for
+            fn: Coroutine factory making one gateway call
+            estimated_tokens: Input plus expected output tokens
+        """
+        budget = self.budget(model)
+        for attempt in range(self.max_retries + 1):
+            await budget.acquire(estimated_tokens, admission_lane.get())
+            try:
+                return await fn()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                delay = await budget.throttled(e, attempt)
+                logger.warning(f"Gateway throttled {model} (attempt {attempt + 1}), pausing its budget {delay:.1f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {model: budget.stats() for model, budget in self.budgets.items()}
+
+
+admission = AdmissionController()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class AdmittedChatOpenAI(ChatOpenAI):
+    """ChatOpenAI whose calls go through the shared admission controller"""
+
+    def _estimate(self, messages: List[Any]) -> int:
+        prompt = sum(estimate_tokens(str(message.content)) for message in messages)
+        return prompt + min(self.max_tokens or ADMISSION_OUTPUT_TOKEN_ESTIMATE, ADMISSION_OUTPUT_TOKEN_ESTIMATE)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        estimated = self._estimate(messages)
+        result = await admission.call(
+            self.model_name,
+            lambda: super(AdmittedChatOpenAI, self)._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            estimated,
+        )
+        usage = (result.llm_output or {}).get("token_usage") or {}
+        admission.budget(self.model_name).reconcile(estimated, usage.get("total_tokens"))
+        return result
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[Any]:
+        # Only the request is retried: once the first chunk arrives the stream is passed through
+        estimated = self._estimate(messages)
+        budget = admission.budget(self.model_name)
+        for attempt in range(admission.max_retries + 1):
+            await budget.acquire(estimated, admission_lane.get())
+            stream = super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs)
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                return
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == admission.max_retries:
+                    raise
+                delay = await budget.throttled(e, attempt)
+                logger.warning(f"Gateway throttled {self.model_name} (attempt {attempt + 1}), pausing its budget {delay:.1f}s")
+                continue
+            reported = None
+            chunk = first
+            while True:
+                usage = getattr(chunk.message, "usage_metadata", None)
+                if usage:
+                    reported = usage.get("total_tokens")
+                yield chunk
+                try:
+                    chunk = await stream.__anext__()
+                except StopAsyncIteration:
+                    break
+            budget.reconcile(estimated, reported)
+            return
@@ -0,0 +1,655 @@
+"""
+Benchmarks for the credit validation services.
+
+Usage:
+    python benchmark.py storage [--backend local|s3] [--objects N] [--size-kb N] [--concurrency N]
+    python benchmark.py ingest [--repeat N] [--workers N]
+    python benchmark.py address [--rows N] [--lookups N] [--index-dir DIR]
+    python benchmark.py fraud-rules [--rules N] [--regex-rules N] [--texts N]
+    python benchmark.py employment [--rows N] [--lookups N] [--db PATH]
+    python benchmark.py employer-match [--employers N] [--queries N]
+    python benchmark.py tool-results [--live] [--repeat N]
+
+The local backend needs no AWS account; set LOCAL_STORAGE_LATENCY_MS (e.g. 20)
+to simulate S3 round trips. To exercise the S3 code path without
+AWS, run a moto server (`moto_server -p 5000`), create the bucket and set
+S3_ENDPOINT_URL=http://localhost:5000 with --backend s3.
+
+tool-results counts per-turn input tokens of a typical ReAct run with verbose
+and compact validator results (cl100k_base, an approximation of the gateway
+model's tokenizer); --live also sends each turn to GATEWAY_URL and reports the
+gateway's prompt token counts and latency.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+
+def _report(label: str, durations: list, total_seconds: float, count: int):
+    """Print throughput and latency percentiles for one benchmark phase"""
+    durations = sorted(durations)
+    p50 = statistics.median(durations) * 1000
+    p99 = durations[min(len(durations) - 1, int(len(durations) * 0.99))] * 1000
+    print(f"{label:<32} {count / total_seconds:>10.1f} ops/s   p50 {p50:>8.2f} ms   p99 {p99:>8.2f} ms")
+
+
+# --- storage ---
+
+def bench_storage(args):
+    from storage import create_storage
+
+    storage = create_storage(args.backend)
+    payload = os.urandom(args.size_kb * 1024)
+    keys = [f"bench-{i:06d}" for i in range(args.objects)]
+    print(f"Backend: {storage.location}, {args.objects} objects of {args.size_kb} KiB, "
+          f"pool size {storage.max_workers}, concurrency {args.concurrency}")
+
+    # Blocking calls, one at a time (how the event loop behaved before)
+    durations = []
+    start = time.perf_counter()
+    for key in keys:
+        t = time.perf_counter()
+        storage.put(key, payload, "image/jpeg")
+        durations.append(time.perf_counter() - t)
+    _report("sequential put", durations, time.perf_counter() - start, len(keys))
+
+    durations = []
+    start = time.perf_counter()
+    for key in keys:
+        t = time.perf_counter()
+        storage.get(key)
+        durations.append(time.perf_counter() - t)
+    _report("sequential get", durations, time.perf_counter() - start, len(keys))
+
+    # Async calls, bounded by a semaphore on top of the backend's pool
+    async def run_concurrent(label, op):
+        semaphore = asyncio.Semaphore(args.concurrency)
+        durations = []
+
+        async def one(key):
+            async with semaphore:
+                t = time.perf_counter()
+                await op(key)
+                durations.append(time.perf_counter() - t)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(key) for key in keys))
+        _report(label, durations, time.perf_counter() - start, len(keys))
+
+    async def stream_all(key):
+        async for _ in storage.astream(key):
+            pass
+
+    async def main():
+        await run_concurrent("async put", lambda key: storage.aput(key, payload, "image/jpeg"))
+        await run_concurrent("async get", storage.aget)
+        await run_concurrent("async streamed get", stream_all)
+
+    asyncio.run(main())
+
+
+# --- ingest ---
+
+def _synthetic_corpus():
+    """Large and small documents in RGB (JPEG), RGBA and palette (PNG) modes"""
+    import io
+    from PIL import Image, ImageDraw
+
+    corpus = []
+    for size_label, size in (("xlarge", (6000, 4000)), ("large", (4032, 3024)), ("small", (1200, 800))):
+        base = Image.merge("RGB", [
+            Image.linear_gradient("L").resize(size),
+            Image.radial_gradient("L").resize(size),
+            Image.effect_noise(size, 32),
+        ])
+        draw = ImageDraw.Draw(base)
+        for y in range(0, size[1], 40):
+            draw.line([(40, y), (size[0] - 40, y)], fill=(20, 20, 20), width=2)
+
+        for mode, fmt in (("RGB", "JPEG"), ("RGBA", "PNG"), ("P", "PNG")):
+            image = base.convert(mode) if mode != "P" else base.quantize(64)
+            buffer = io.BytesIO()
+            image.save(buffer, format=fmt, **({"quality": 92} if fmt == "JPEG" else {}))
+            corpus.append((f"{size_label} {mode} {fmt}", buffer.getvalue()))
+    return corpus
+
+
+def bench_ingest(args):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from utils import available_cpus, prepare_image_timed
+
+    corpus = _synthetic_corpus()
+    print(f"{'image':<20} {'mode':<10} {'decode ms':>10} {'resize ms':>10} {'encode ms':>10} {'total ms':>10}")
+    for label, data in corpus:
+        for draft in (False, True):
+            totals = {"decode_ms": 0.0, "resize_ms": 0.0, "encode_ms": 0.0}
+            for _ in range(args.repeat):
+                _, _, timings = prepare_image_timed(data, draft=draft)
+                for stage, ms in timings.items():
+                    totals[stage] += ms / args.repeat
+            print(f"{label:<20} {'draft' if draft else 'full':<10} {totals['decode_ms']:>10.1f} "
+                  f"{totals['resize_ms']:>10.1f} {totals['encode_ms']:>10.1f} {sum(totals.values()):>10.1f}")
+
+    # Throughput: inline (what an async handler did before) vs process pool
+    workers = args.workers or available_cpus()
+    jobs = [data for _, data in corpus] * args.repeat
+
+    start = time.perf_counter()
+    for data in jobs:
+        prepare_image_timed(data)
+    inline_seconds = time.perf_counter() - start
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+        list(pool.map(prepare_image_timed, corpus[0][1:2]))  # warm up workers
+        start = time.perf_counter()
+        list(pool.map(prepare_image_timed, jobs))
+        pool_seconds = time.perf_counter() - start
+
+    print(f"\n{len(jobs)} images: inline {len(jobs) / inline_seconds:.1f} img/s, "
+          f"process pool ({workers} workers) {len(jobs) / pool_seconds:.1f} img/s")
+
+
+# --- address ---
+
+def _synthetic_addresses(rows: int, seed: int = 7):
+    """Reference rows with realistic key and ZIP cardinality"""
+    import random
+
+    rng = random.Random(seed)
+    syllables = ["ash", "bel", "cor", "dal", "el", "fair", "glen", "har", "iv", "jun", "ken", "lin",
+                 "mar", "nor", "oak", "pine", "quin", "ros", "sil", "tam", "val", "wil", "york", "zen"]
+    names = sorted({(rng.choice(syllables) + rng.choice(syllables) + rng.choice(["", "wood", "ton", "field"])).title()
+                    for _ in range(20000)})
+    suffixes = ["Street", "Avenue", "Road", "Drive", "Lane", "Court", "Boulevard", "Way", "Place", "Terrace"]
+    zips = rng.sample(range(1000, 99999), 30000)
+    cities = {zip5: f"{rng.choice(names)} City" for zip5 in zips}
+    states = ["CA", "IL", "OR", "TX", "NY", "WA", "FL", "GA", "OH", "PA"]
+    for _ in range(rows):
+        zip5 = rng.choice(zips)
+        is_valid = rng.random() < 0.97
+        yield {
+            "street": f"{rng.randint(1, 20000)} {rng.choice(['', 'North ', 'South ', 'East ', 'West '])}"
+                      f"{rng.choice(names)} {rng.choice(suffixes)}",
+            "city": cities[zip5],
+            "state": states[zip5 % len(states)],
+            "zip_code": f"{zip5:05d}",
+            "county": f"{cities[zip5][:-5]} County",
+            "is_valid": is_valid,
+            "is_residential": True,
+            "delivery_point": "Valid" if is_valid else "Invalid",
+            "address_type": rng.choice(["Single Family", "Apartment", "Condominium"]),
+            "occupancy_status": "Occupied",
+            "risk_score": rng.randint(10, 40) if is_valid else rng.randint(70, 100),
+        }
+
+
+def _with_typo(street: str, rng) -> str:
+    """Swap two adjacent letters in the street name (not the house number)"""
+    number, rest = street.split(" ", 1)
+    position = rng.randrange(1, len(rest) - 2)
+    return f"{number} {rest[:position]}{rest[position + 1]}{rest[position]}{rest[position + 2:]}"
+
+
+def bench_address(args):
+    import csv
+    import random
+    import tempfile
+    from address_index import COLUMNS, AddressIndex, build_address_index, read_address_csv
+
+    workdir = args.index_dir or tempfile.mkdtemp(prefix="address-bench-")
+    csv_path = os.path.join(workdir, "addresses.csv")
+    index_path = os.path.join(workdir, "index")
+    os.makedirs(workdir, exist_ok=True)
+
+    start = time.perf_counter()
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(_synthetic_addresses(args.rows))
+    print(f"Generated {args.rows} rows in {time.perf_counter() - start:.1f}s ({os.path.getsize(csv_path) / 2**20:.0f} MiB CSV)")
+
+    start = time.perf_counter()
+    build_address_index(read_address_csv(csv_path), index_path)
+    index_bytes = sum(entry.stat().st_size for entry in os.scandir(index_path))
+    print(f"Built index in {time.perf_counter() - start:.1f}s ({index_bytes / 2**20:.0f} MiB on disk)")
+
+    start = time.perf_counter()
+    index = AddressIndex(index_path)
+    print(f"Opened index in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    rng = random.Random(11)
+    sample_rows = [rng.randrange(len(index)) for _ in range(args.lookups)]
+    samples = [index.record(row) for row in sample_rows]
+    samples = [(record["standardized_address"] or index.key(row), record["zip_code"])
+               for row, record in zip(sample_rows, samples)]
+
+    def run(label, queries):
+        for street, zip_code in queries[:50]:  # warm the page cache
+            index.lookup(street, zip_code=zip_code)
+        durations, found = [], 0
+        start = time.perf_counter()
+        for street, zip_code in queries:
+            t = time.perf_counter()
+            found += index.lookup(street, zip_code=zip_code) is not None
+            durations.append(time.perf_counter() - t)
+        _report(label, durations, time.perf_counter() - start, len(queries))
+        print(f"{'':<32} matched {found}/{len(queries)}")
+
+    run("exact lookup", samples)
+    run("fuzzy lookup (typo, ZIP)", [(_with_typo(street, rng), zip_code) for street, zip_code in samples])
+    run("fuzzy lookup (typo, no ZIP)", [(_with_typo(street, rng), "") for street, _ in samples])
+    run("miss (no ZIP)", [(f"{rng.randint(30000, 90000)} Nowhere Street", "") for _ in samples])
+
+    # The previous implementation: substring scan over an in-memory dict
+    scan_rows = min(args.rows, 1_000_000)
+    database = {}
+    for row in range(scan_rows):
+        database.setdefault(index.key(row), row)
+    queries = [f"{rng.randint(30000, 90000)} nowhere st" for _ in range(20)]
+    durations = []
+    start = time.perf_counter()
+    for query in queries:
+        t = time.perf_counter()
+        next((key for key in database if key in query or query in key), None)
+        durations.append(time.perf_counter() - t)
+    _report(f"linear scan miss ({scan_rows} rows)", durations, time.perf_counter() - start, len(queries))
+
+    if not args.index_dir:
+        import shutil
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# --- fraud rules ---
+
+def bench_fraud_rules(args):
+    import random
+    import re
+    from fraud_rules import CompiledRules
+
+    rng = random.Random(5)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(args.rules)]
+    config = {"rules": [
+        {"id": f"kw-{i}", "type": "literal", "patterns": [word], "score": rng.randint(5, 50), "indicator": word}
+        for i, word in enumerate(words)
+    ] + [
+        {"id": f"re-{i}", "type": "regex", "patterns": [rf"\b{rng.randint(10, 99)}\d*-{rng.choice(letters)}\b"],
+         "score": 10, "indicator": "pattern"}
+        for i in range(args.regex_rules)
+    ] + [
+        # Overlapping regex rules: both match at the same position of "Apt 12-34"
+        {"id": "unit-number", "type": "regex", "patterns": [r"\bapt \d+\b"], "score": 5, "indicator": "unit"},
+        {"id": "unit-range", "type": "regex", "patterns": [r"\bapt \d+-\d+\b"], "score": 10, "indicator": "range"},
+    ]}
+
+    start = time.perf_counter()
+    rules = CompiledRules(config)
+    print(f"Compiled {args.rules} literal + {args.regex_rules} regex rules in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms ({len(rules._automaton)} automaton states)\n")
+
+    streets = ["Main Street", "Oak Avenue", "Elm Street", "Harbor Road", "Pine Lane"]
+    texts = []
+    for _ in range(args.texts):
+        text = f"{rng.randint(1, 9999)} {rng.choice(streets)} Apt {rng.randint(1, 400)}"
+        if rng.random() < 0.2:
+            text += f"-{rng.randint(1, 400)}"
+        if rng.random() < 0.1:
+            text += " " + rng.choice(words)
+        texts.append(text)
+
+    # The previous approach: one substring scan (or regex search) per rule
+    naive_literals = [(spec["id"], spec["patterns"][0]) for spec in config["rules"] if spec["type"] == "literal"]
+    naive_regexes = [(spec["id"], re.compile(spec["patterns"][0], re.IGNORECASE))
+                     for spec in config["rules"] if spec["type"] == "regex"]
+
+    def naive(text):
+        lowered = text.lower()
+        return {rule_id for rule_id, word in naive_literals if word in lowered} | \
+               {rule_id for rule_id, pattern in naive_regexes if pattern.search(text)}
+
+    for label, check in (("per-rule scan", naive), ("compiled rules", rules.match)):
+        durations = []
+        start = time.perf_counter()
+        for text in texts:
+            t = time.perf_counter()
+            check(text)
+            durations.append(time.perf_counter() - t)
+        _report(label, durations, time.perf_counter() - start, len(texts))
+
+    # Includes regex rules matching at the same position (unit-number / unit-range)
+    mismatches = sum({match.rule_id for match in rules.match(text)} != naive(text) for text in texts)
+    print(f"\nResult mismatches vs per-rule scan: {mismatches}/{len(texts)}")
+
+
+# --- employment store ---
+
+_EMPLOYERS = ["Tech Solutions Inc", "Global Marketing Corp", "Freelance Consulting", "Acme Logistics LLC",
+              "Northwind Health", "Contoso Bank NA", "Fabrikam Manufacturing", "City School District"]
+_JOB_TITLES = ["Software Engineer", "Marketing Manager", "Consultant", "Analyst", "Nurse", "Teacher", "Driver"]
+_EMPLOYMENT_STATUSES = ["Full-time", "Part-time", "Contract"]
+
+
+def _synthetic_employment(rows: int, seed: int = 3):
+    """Employment records for user{n}@example.com, emitted in scrambled order"""
+    import random
+
+    rng = random.Random(seed)
+    stride = 2_654_435_761  # odd, so n -> n * stride mod 2^32 is a permutation
+    for i in range(rows):
+        n = (i * stride) % (1 << 32)
+        yield {
+            "email": f"user{n}@example.com",
+            "employer": rng.choice(_EMPLOYERS),
+            "job_title": rng.choice(_JOB_TITLES),
+            "annual_income": rng.randrange(25_000, 250_000, 500),
+            "employment_status": rng.choice(_EMPLOYMENT_STATUSES),
+            "years_employed": round(rng.uniform(0.1, 30), 1),
+            "employment_verified": rng.random() < 0.9,
+            "income_verified": rng.random() < 0.85,
+            "last_verification_date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        }
+
+
+def bench_employment(args):
+    import random
+    import subprocess
+    import sys
+    import tempfile
+    from employment_store import SQLiteEmploymentStore, import_employment_records
+
+    workdir = tempfile.mkdtemp(prefix="employment-bench-") if not args.db else None
+    db_path = args.db or os.path.join(workdir, "employment.db")
+
+    start = time.perf_counter()
+    count = import_employment_records(_synthetic_employment(args.rows), db_path, source="benchmark")
+    print(f"Imported {count} records in {time.perf_counter() - start:.1f}s "
+          f"({os.path.getsize(db_path) / 2**20:.0f} MiB on disk)")
+
+    # Cold start in a fresh interpreter: import, open and answer the first lookup
+    probe = ("import time; start = time.perf_counter(); "
+             "from employment_store import SQLiteEmploymentStore; "
+             f"store = SQLiteEmploymentStore({db_path!r}); store.get('user0@example.com'); "
+             "print((time.perf_counter() - start) * 1000)")
+    cold_ms = float(subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True,
+                                   check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout)
+    print(f"Cold start to first lookup: {cold_ms:.1f} ms\n")
+
+    store = SQLiteEmploymentStore(db_path)
+    rng = random.Random(9)
+    stride = 2_654_435_761
+    hits = [f"user{(rng.randrange(args.rows) * stride) % (1 << 32)}@example.com" for _ in range(args.lookups)]
+    misses = [f"nobody{rng.randrange(10**9)}@example.com" for _ in range(args.lookups)]
+
+    for label, emails in (("lookup hit", hits), ("lookup miss", misses)):
+        durations, found = [], 0
+        start = time.perf_counter()
+        for email in emails:
+            t = time.perf_counter()
+            found += store.get(email) is not None
+            durations.append(time.perf_counter() - t)
+        _report(label, durations, time.perf_counter() - start, len(emails))
+        print(f"{'':<32} found {found}/{len(emails)}")
+
+    # The previous approach: every server process holds all records in a dict
+    dict_rows = min(args.rows, 1_000_000)
+    start = time.perf_counter()
+    records = {row.pop("email"): row for row in _synthetic_employment(dict_rows)}
+    print(f"\nLoading {len(records)} records into a dict: {time.perf_counter() - start:.1f}s per process")
+
+    if workdir:
+        import shutil
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# --- employer matching ---
+
+_EMPLOYER_WORDS = ["tech", "global", "northern", "united", "first", "pacific", "summit", "blue", "river", "metro",
+                   "health", "logistics", "solutions", "marketing", "capital", "foods", "energy", "systems", "labs",
+                   "partners", "consulting", "industries", "services", "media", "design", "motors", "analytics"]
+_LEGAL_FORMS = ["Inc", "Inc.", ", Inc.", "LLC", "L.L.C.", "Corp", "Corporation", "Co.", "Ltd", ""]
+
+
+def _employer_variant(name: str, rng) -> str:
+    """How a reported employer differs from the record: legal form, punctuation, case or a typo"""
+    base = name.rsplit(" ", 1)[0] if name.split()[-1].rstrip(".") in ("Inc", "LLC", "Corp", "Ltd") else name
+    kind = rng.randrange(4)
+    if kind == 0:
+        return f"{base}{rng.choice(_LEGAL_FORMS[:3])}" if rng.random() < 0.5 else f"{base} {rng.choice(_LEGAL_FORMS[3:])}"
+    if kind == 1:
+        return name.upper().replace(" ", ", ", 1)
+    if kind == 2:
+        return f"The {base}"
+    position = rng.randrange(1, len(base) - 1)
+    return base[:position] + base[position + 1:]
+
+
+def bench_employer_match(args):
+    import random
+    from employer_match import (
+        EMPLOYER_MATCH_MIN_CONFIDENCE, _trigrams, employer_confidence, normalize_employer,
+    )
+
+    rng = random.Random(13)
+    employers, seen = [], set()
+    while len(employers) < args.employers:
+        words = " ".join(rng.choice(_EMPLOYER_WORDS) for _ in range(rng.randint(2, 3))).title()
+        name = f"{words} {rng.randint(1, 999)} {rng.choice(['Inc', 'LLC', 'Corp', 'Ltd'])}"
+        if name not in seen:
+            seen.add(name)
+            employers.append(name)
+
+    targets = [rng.choice(employers) for _ in range(args.queries)]
+    reported = [_employer_variant(name, rng) for name in targets]
+
+    def run(label, check):
+        durations, matched = [], 0
+        start = time.perf_counter()
+        for query, target in zip(reported, targets):
+            t = time.perf_counter()
+            matched += check(query, target)
+            durations.append(time.perf_counter() - t)
+        _report(label, durations, time.perf_counter() - start, len(reported))
+        print(f"{'':<32} matched {matched}/{len(reported)}")
+
+    # Pairwise checks against the verification record, as the validator does
+    run("exact lower() compare", lambda query, target: query.lower() == target.lower())
+    normalize_employer.cache_clear()
+    _trigrams.cache_clear()
+    run("confidence (cold cache)",
+        lambda query, target: employer_confidence(query, target) >= EMPLOYER_MATCH_MIN_CONFIDENCE)
+    run("confidence (memoized)",
+        lambda query, target: employer_confidence(query, target) >= EMPLOYER_MATCH_MIN_CONFIDENCE)
+
+
+# --- tool results ---
+
+_SAMPLE_ANALYSIS = {
+    "extraction": {
+        "name": "John Doe", "email": "john.doe@email.com", "income": 74000, "employer": "Tech Solutions, Inc.",
+        "job_title": "Software Engineer", "employment_years": 3.5, "address": "123 Main St", "city": "Anytown",
+        "state": "CA", "zip": "90210", "loan_amount": 25000, "loan_purpose": "Home improvement", "ssn_last_4": "1234",
+    },
+    "authenticity": {
+        "document_quality": "good", "completeness_score": 95,
+        "required_fields_present": ["name", "email", "income", "employer", "address", "loan_amount"],
+        "missing_fields": [], "fraud_indicators": [], "authenticity_score": 92, "recommendation": "ACCEPT",
+        "notes": "Clear scan, consistent fonts and formatting",
+    },
+}
+
+
+def _load_server(filename: str):
+    """Import an MCP server script (hyphenated file name) without starting it"""
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location(filename.replace("-", "_")[:-3], filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _react_transcript(results: dict) -> list:
+    """OpenAI-format messages of a ReAct run; the agent sees one more step of it each turn"""
+    def step(calls):
+        tool_calls = [{"id": f"call_{name}", "type": "function",
+                       "function": {"name": name, "arguments": json.dumps(args)}} for name, args in calls]
+        return [{"role": "assistant", "content": None, "tool_calls": tool_calls}] + [
+            {"role": "tool", "tool_call_id": f"call_{name}", "content": results[name]} for name, _ in calls
+        ]
+
+    extraction = _SAMPLE_ANALYSIS["extraction"]
+    steps = [
+        [("analyze_credit_document", {"image_id": "bench"})],
+        [("validate_income_employment", {
+            "applicant_email": extraction["email"], "reported_income": extraction["income"],
+            "reported_employer": extraction["employer"], "reported_job_title": extraction["job_title"],
+            "reported_employment_years": extraction["employment_years"]}),
+         ("check_employment_stability", {"applicant_email": extraction["email"]})],
+        [("validate_address", {"street_address": extraction["address"], "city": extraction["city"],
+                               "state": extraction["state"], "zip_code": extraction["zip"]}),
+         ("perform_address_fraud_check", {"street_address": extraction["address"],
+                                          "applicant_name": extraction["name"]})],
+    ]
+    turns = [[{"role": "user", "content": "Process this credit application. Image_Id: bench. Extract the "
+                                           "applicant information, verify employment, income and address, "
+                                           "and give a final credit decision with reasoning."}]]
+    for calls in steps:
+        turns.append(turns[-1] + step(calls))
+    return turns
+
+
+def bench_tool_results(args):
+    import logging
+    import random
+    import pydantic_core
+    import tiktoken
+
+    logging.disable(logging.INFO)
+    income = _load_server("mcp-income-employment-validator.py")
+    address = _load_server("mcp-address-validator.py")
+    extraction = _SAMPLE_ANALYSIS["extraction"]
+
+    async def collect(compact: bool) -> dict:
+        random.seed(5)  # same mock address/fraud draws in both modes
+        results = {
+            "validate_income_employment": await income.validate_income_employment(
+                extraction["email"], extraction["income"], extraction["employer"], extraction["job_title"],
+                extraction["employment_years"], compact=compact),
+            "check_employment_stability": await income.check_employment_stability(extraction["email"], compact=compact),
+            "validate_address": await address.validate_address(
+                extraction["address"], extraction["city"], extraction["state"], extraction["zip"], compact=compact),
+            "perform_address_fraud_check": await address.perform_address_fraud_check(
+                extraction["address"], extraction["name"], compact=compact),
+        }
+        # As FastMCP sends them: dict results as indented JSON, strings as they are
+        results = {name: result if isinstance(result, str) else pydantic_core.to_json(result, indent=2).decode()
+                   for name, result in results.items()}
+        results["analyze_credit_document"] = json.dumps(_SAMPLE_ANALYSIS)
+        return results
+
+    try:
+        encoding = tiktoken.get_encoding("cl100k_base")
+        count = lambda text: len(encoding.encode(text))
+    except Exception as e:  # the encoding is downloaded on first use
+        from admission import estimate_tokens
+        print(f"cl100k_base unavailable ({type(e).__name__}); estimating 4 characters per token\n")
+        count = estimate_tokens
+
+    def tokens(messages: list) -> int:
+        return sum(count(message["content"] or "") + sum(
+            count(call["function"]["arguments"]) for call in message.get("tool_calls", [])
+        ) for message in messages)
+
+    transcripts = {mode: _react_transcript(asyncio.run(collect(mode == "compact"))) for mode in ("verbose", "compact")}
+    validator_results = {mode: sum(tokens([message]) for message in turns[-1]
+                                   if message["role"] == "tool" and message["tool_call_id"] != "call_analyze_credit_document")
+                         for mode, turns in transcripts.items()}
+    print(f"Validator results: {validator_results['verbose']} tokens verbose, {validator_results['compact']} compact\n")
+    print(f"{'turn':<6}{'verbose tokens':>16}{'compact tokens':>16}{'saved':>8}")
+    totals = {"verbose": 0, "compact": 0}
+    for turn, (verbose, compact) in enumerate(zip(transcripts["verbose"], transcripts["compact"]), 1):
+        counts = {"verbose": tokens(verbose), "compact": tokens(compact)}
+        for mode in totals:
+            totals[mode] += counts[mode]
+        print(f"{turn:<6}{counts['verbose']:>16}{counts['compact']:>16}"
+              f"{1 - counts['compact'] / counts['verbose']:>8.0%}")
+    print(f"{'total':<6}{totals['verbose']:>16}{totals['compact']:>16}{1 - totals['compact'] / totals['verbose']:>8.0%}")
+
+    if not args.live:
+        return
+    from openai import OpenAI
+
+    client = OpenAI(api_key=os.environ.get("GATEWAY_MODEL_ACCESS_KEY", ""), base_url=os.environ["GATEWAY_URL"])
+    names = {call["function"]["name"] for message in transcripts["verbose"][-1] for call in message.get("tool_calls", [])}
+    tools = [{"type": "function", "function": {"name": name, "parameters": {"type": "object"}}} for name in sorted(names)]
+    print(f"\nLive ({args.model}, median of {args.repeat}, max_tokens=1 so latency is mostly prefill)")
+    print(f"{'turn':<6}{'mode':<10}{'prompt tokens':>15}{'latency ms':>12}")
+    for turn in range(len(transcripts["verbose"])):
+        for mode in ("verbose", "compact"):
+            durations, prompt_tokens = [], None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                response = client.chat.completions.create(model=args.model, messages=transcripts[mode][turn],
+                                                          tools=tools, max_tokens=1)
+                durations.append(time.perf_counter() - start)
+                prompt_tokens = response.usage.prompt_tokens if response.usage else None
+            print(f"{turn + 1:<6}{mode:<10}{prompt_tokens if prompt_tokens is not None else '-':>15}"
+                  f"{statistics.median(durations) * 1000:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Credit validation benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    storage_parser = subparsers.add_parser("storage", help="Object storage throughput")
+    storage_parser.add_argument("--backend", default="local", choices=["local", "s3"])
+    storage_parser.add_argument("--objects", type=int, default=200)
+    storage_parser.add_argument("--size-kb", type=int, default=1024)
+    storage_parser.add_argument("--concurrency", type=int, default=32)
+    storage_parser.set_defaults(func=bench_storage)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Image ingestion stage timings and throughput")
+    ingest_parser.add_argument("--repeat", type=int, default=3)
+    ingest_parser.add_argument("--workers", type=int, default=0, help="Process pool size (default: available CPUs)")
+    ingest_parser.set_defaults(func=bench_ingest)
+
+    address_parser = subparsers.add_parser("address", help="Address index build time and lookup latency")
+    address_parser.add_argument("--rows", type=int, default=1_000_000)
+    address_parser.add_argument("--lookups", type=int, default=2000)
+    address_parser.add_argument("--index-dir", default="", help="Keep the CSV and index here (default: temp dir)")
+    address_parser.set_defaults(func=bench_address)
+
+    fraud_parser = subparsers.add_parser("fraud-rules", help="Fraud rule compile time and match throughput")
+    fraud_parser.add_argument("--rules", type=int, default=5000)
+    fraud_parser.add_argument("--regex-rules", type=int, default=50)
+    fraud_parser.add_argument("--texts", type=int, default=5000)
+    fraud_parser.set_defaults(func=bench_fraud_rules)
+
+    employment_parser = subparsers.add_parser("employment", help="Employment store import time and lookup latency")
+    employment_parser.add_argument("--rows", type=int, default=1_000_000)
+    employment_parser.add_argument("--lookups", type=int, default=5000)
+    employment_parser.add_argument("--db", default="", help="Keep the database here (default: temp dir)")
+    employment_parser.set_defaults(func=bench_employment)
+
+    match_parser = subparsers.add_parser("employer-match", help="Employer name matching accuracy and throughput")
+    match_parser.add_argument("--employers", type=int, default=100_000)
+    match_parser.add_argument("--queries", type=int, default=5000)
+    match_parser.set_defaults(func=bench_employer_match)
+
+    results_parser = subparsers.add_parser("tool-results", help="Per-turn agent input tokens, verbose vs compact results")
+    results_parser.add_argument("--live", action="store_true", help="Also time each turn against GATEWAY_URL")
+    results_parser.add_argument("--model", default="bedrock/claude-4.5-sonnet")
+    results_parser.add_argument("--repeat", type=int, default=3)
+    results_parser.set_defaults(func=bench_tool_results)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
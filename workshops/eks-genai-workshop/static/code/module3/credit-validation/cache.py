@@ -0,0 +1,353 @@
+"""
+Caches for the credit validation services.
+
+AsyncLRUCache: in-process async cache with LRU eviction, TTL expiry and
+single-flight loading. Concurrent get_or_load calls for the same key share
+one in-flight load instead of each hitting S3 or the model. Entries are
+bounded by a byte budget (via `sizeof`) and/or an entry count, and expire
+after `ttl_seconds`.
+
+DiskCache: persistent JSON result cache in a local directory, evicting the
+least recently used files when the directory exceeds its size budget.
+
+ToolResultCache: per-tool AsyncLRUCaches for MCP tool functions, keyed by
+canonicalized arguments. Randomized tools are registered as uncached with
+a reason, so every tool's caching decision shows up in stats(); tools that
+are only partly deterministic cache the results accepted by `cache_if`.
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional
+
+from mcp.server.fastmcp import Context
+
+logger = logging.getLogger(__name__)
+
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true"
+TOOL_CACHE_TTL_SECONDS = float(os.getenv("TOOL_CACHE_TTL_SECONDS", "300"))
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "10000"))
+
+
+class AsyncLRUCache:
+    """
+    LRU + TTL cache with single-flight loading and hit/miss/eviction counters.
+
+    Args:
+        name: Name used in stats output
+        max_bytes: Total size budget (sum of sizeof(value)), None for unbounded
+        max_entries: Maximum number of entries, None for unbounded
+        ttl_seconds: Entry lifetime, None for no expiry
+        sizeof: Size of a value in bytes
+        cacheable: Whether a loaded value may be cached (None values never are)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_bytes: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        sizeof: Callable[[Any], int] = len,
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sizeof = sizeof
+        self.cacheable = cacheable
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._bytes = 0
+        self.counters = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expirations": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a cached value (refreshing its LRU position) or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, size, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            self._remove(key)
+            self.counters["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        """Insert a value, evicting least recently used entries over budget"""
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        self._entries[key] = (value, size, expires_at)
+        self._bytes += size
+        while self._entries and (
+            (self.max_bytes is not None and self._bytes > self.max_bytes)
+            or (self.max_entries is not None and len(self._entries) > self.max_entries)
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.counters["evictions"] += 1
+
+    def invalidate(self, key: Hashable):
+        if key in self._entries:
+            self._remove(key)
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value, or run `loader` once for all concurrent callers.
+        None results, results rejected by `cacheable` and exceptions are not cached.
+
+        The load runs in its own task: a cancelled caller stops waiting but the
+        load carries on for the other callers (and is cached when it completes).
+        """
+        value = self.get(key)
+        if value is not None:
+            self.counters["hits"] += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.counters["coalesced"] += 1
+        else:
+            self.counters["misses"] += 1
+            task = self._inflight[key] = asyncio.ensure_future(self._load(key, loader))
+            # Mark retrieved so a failure nobody waits for doesn't log "exception never retrieved"
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            if value is not None and self.cacheable(value):
+                self.put(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"] + self.counters["coalesced"]
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            **self.counters,
+            "hit_ratio": round((self.counters["hits"] + self.counters["coalesced"]) / lookups, 4) if lookups else 0.0,
+        }
+
+
+class DiskCache:
+    """
+    Persistent JSON cache on local disk with size-based LRU eviction.
+    Blocking - call from a thread in async code.
+
+    Args:
+        name: Name used in stats output
+        directory: Cache directory (created if missing)
+        max_bytes: Total size budget for cached files
+    """
+
+    def __init__(self, name: str, directory: str, max_bytes: int):
+        self.name = name
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._bytes = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(".json"))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = json.loads(f.read())
+            # Access time drives eviction order
+            os.utime(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        return value
+
+    def put(self, key: str, value: Any):
+        path = self._path(key)
+        body = json.dumps(value).encode("utf-8")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        with self._lock:
+            try:
+                self._bytes -= os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, path)
+            self._bytes += len(body)
+            self.counters["writes"] += 1
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remove least recently used files until under 90% of the budget"""
+        entries = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in entries:
+            if self._bytes <= self.max_bytes * 0.9:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            self._bytes -= size
+            self.counters["evictions"] += 1
+        logger.info(f"{self.name}: evicted down to {self._bytes} bytes")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "directory": self.directory,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            **self.counters,
+        }
+
+
+def _canonical(value: Any, casefold: bool = False) -> Any:
+    """Argument value with insignificant differences removed (whitespace, int vs float, key order)"""
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        return value.casefold() if casefold else value
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(key): _canonical(item, casefold) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item, casefold) for item in value]
+    return str(value)
+
+
+class ToolResultCache:
+    """
+    Result caches for a server's MCP tools, one AsyncLRUCache per tool.
+
+    Apply below @mcp.tool so FastMCP still sees the tool's signature:
+
+        @mcp.tool(description="...")
+        @tool_cache.cached(ttl_seconds=300, casefold=("applicant_email",))
+        async def validate_income_employment(applicant_email: str, ...): ...
+
+        @mcp.tool(description="...")
+        @tool_cache.uncached("mock data is randomized per call")
+        async def verify_address_ownership(...): ...
+
+    Args:
+        name: Server name used in stats output
+        enabled: False makes cached() a no-op (TOOL_CACHE_ENABLED)
+        ttl_seconds: Default entry lifetime (TOOL_CACHE_TTL_SECONDS)
+        max_entries: Default per-tool LRU bound (TOOL_CACHE_MAX_ENTRIES)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = TOOL_CACHE_ENABLED,
+        ttl_seconds: float = TOOL_CACHE_TTL_SECONDS,
+        max_entries: int = TOOL_CACHE_MAX_ENTRIES,
+    ):
+        self.name = name
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.caches: Dict[str, AsyncLRUCache] = {}
+        self.uncached_tools: Dict[str, str] = {}
+
+    def cached(
+        self,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        casefold: Iterable[str] = (),
+        cache_if: Optional[Callable[[Any], bool]] = None,
+    ) -> Callable:
+        """
+        Cache an async tool's results by its arguments
+
+        Args:
+            ttl_seconds: Entry lifetime for this tool (default: the cache's ttl_seconds)
+            max_entries: LRU bound for this tool (default: the cache's max_entries)
+            casefold: Arguments compared case-insensitively (e.g. emails)
+            cache_if: Cache only results for which this returns True (e.g. not randomized ones)
+        """
+        casefold = frozenset(casefold)
+
+        def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+            if not self.enabled:
+                return func
+            signature = inspect.signature(func)
+            cache = self.caches[func.__name__] = AsyncLRUCache(
+                func.__name__,
+                max_entries=max_entries or self.max_entries,
+                ttl_seconds=ttl_seconds if ttl_seconds is not None else self.ttl_seconds,
+                sizeof=lambda value: len(json.dumps(value, default=str)),
+                cacheable=cache_if or (lambda value: True),
+            )
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = json.dumps(
+                    {name: _canonical(value, name in casefold) for name, value in bound.arguments.items()
+                     if not isinstance(value, Context)},
+                    sort_keys=True, separators=(",", ":"),
+                )
+                return await cache.get_or_load(key, lambda: func(*args, **kwargs))
+
+            return wrapper
+
+        return decorator
+
+    def uncached(self, reason: str) -> Callable:
+        """Record that a tool is deliberately not cached (e.g. randomized results)"""
+
+        def decorator(func: Callable) -> Callable:
+            self.uncached_tools[func.__name__] = reason
+            return func
+
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "enabled": self.enabled,
+            "tools": {name: cache.stats() for name, cache in self.caches.items()},
+            "uncached": dict(self.uncached_tools),
+        }
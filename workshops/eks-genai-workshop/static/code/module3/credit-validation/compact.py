@@ -0,0 +1,56 @@
+"""
+Compact tool results for the credit validation MCP servers.
+
+In the ReAct loop every tool result stays in the conversation and is sent
+to the model again on each later turn, so verbose results (English
+recommendation sentences, nested standardized_address / risk_assessment
+objects, fields echoing the arguments) grow the prompt with every step.
+
+Validator tools take a `compact` argument. Compact results are flat, use
+short keys, carry enum codes instead of prose (e.g. "rec": "PROCEED") and
+drop fields that repeat the arguments or another field. They are returned
+as minified JSON text, since FastMCP serializes dict results with two-space
+indentation. Verbose output stays the default for other clients.
+
+compact_fields and compact_json are used by the servers to build compact results;
+compact_tools is used by the agent to request them without exposing the
+argument to the model.
+"""
+
+import json
+from typing import Any, Dict, List
+
+COMPACT_ARG = "compact"
+
+
+def compact_fields(result: Dict[str, Any], fields: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Flat subset of a verbose result
+
+    Args:
+        result: Verbose tool result
+        fields: Verbose field path ("risk_assessment.risk_level") -> compact key, in output order
+
+    Returns:
+        dict: Compact keys for the fields present; None values and empty lists are left out
+    """
+    compact = {}
+    for path, key in fields.items():
+        value = result
+        for part in path.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        if value is not None and value != []:
+            compact[key] = value
+    return compact
+
+
+def compact_json(result: Dict[str, Any]) -> str:
+    """Compact result as JSON text without whitespace"""
+    return json.dumps(result, separators=(",", ":"), default=str)
+
+
+def compact_tools(tools: List[Any]) -> List[Any]:
+    """Tools that request compact results; the compact argument is hidden from the model"""
+    from mcp_registry import inject_tool_arg
+
+    return inject_tool_arg(tools, COMPACT_ARG, lambda: True)
@@ -7,11 +7,15 @@ from langchain_mcp_adapters.client import MultiServerMCPClient
 from langgraph.prebuilt import create_react_agent
 from langchain_mcp_adapters.tools import load_mcp_tools
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-from langchain_openai import ChatOpenAI
+from langchain_core.callbacks import AsyncCallbackHandler
+from admission import AdmittedChatOpenAI, admission, admission_lane, is_rate_limit_error, lane_tools
+from compact import compact_tools
 from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Query, UploadFile, File
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Query, UploadFile, File, Form
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Optional
 import os
 from mcp import ClientSession
 import asyncio
@@ -23,6 +27,10 @@ import json
 from PIL import Image
 import io
 from utils import generate_256_bit_hex_key
+from jobs import JobQueue, JobWorkerPool, RetryableJobError
+from mcp_registry import ServersUnavailable, ToolRegistry
+from tool_memo import decision_model, memo_stats, memoized_run, memoized_tools
+from underwriting_pipeline import Emit, message_text, run_pipeline, summarize_result
 import logging
 
 
@@ -45,7 +53,7 @@ except ImportError:
         logger.info("Warning: Langfuse not available. Tracing will be disabled.")
         LANGFUSE_AVAILABLE = False
         CallbackHandler = None
-from utils import store_object, encode_image
+from utils import astore_image, aprepare_image, shutdown_ingest_pool
 
 
 
@@ -81,13 +89,17 @@ else:
 # Configure LLM with token limits to avoid rate limiting
 llm_model = "bedrock/claude-4.5-sonnet"
 
-model = ChatOpenAI(
+# Calls wait for the model's request/token budget and are re-queued after 429s
+# (see admission.py), so the SDK's own retries are disabled
+model = AdmittedChatOpenAI(
     model=llm_model, 
     temperature=0, 
     api_key=model_key, 
     base_url=api_gateway_url,
     max_tokens=5000,  # Limit response tokens
-    timeout=300       # Add timeout
+    timeout=300,      # Add timeout
+    max_retries=0,
+    stream_usage=True
 )
 
 # MCP Servers configuration for credit underwriting with image processing
@@ -95,9 +107,22 @@ mcp_address_validator = os.getenv("MCP_ADDRESS_VALIDATOR", "http://mcp-address-v
 mcp_employment_validator = os.getenv("MCP_EMPLOYMENT_VALIDATOR", "http://mcp-employment-validator:5200")
 mcp_image_processor = os.getenv("MCP_IMAGE_PROCESSOR", "http://mcp-image-processor:8400")
 
+# Batch processing: default and maximum number of applications run concurrently
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+
+# "react": the agent plans every tool call; "pipeline": fixed extract -> parallel checks -> one
+# decision call, falling back to the agent when the extraction is incomplete
+UNDERWRITING_MODE = os.getenv("UNDERWRITING_MODE", "react")
+# SSE progress stream: comment line sent after this many idle seconds so proxies keep the connection
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+# Tool results kept in the agent's conversation: "compact" (short keys and codes, see compact.py)
+# or "verbose" (full results, e.g. to compare per-turn input tokens)
+TOOL_RESULT_MODE = os.getenv("TOOL_RESULT_MODE", "compact")
+
 mcp_servers = {
     "image_processor": {
-        "url": mcp_address_validator + "/sse",  # Image processing server
+        "url": mcp_image_processor + "/sse",  # Image processing server
         "transport": "sse",
     },
     "income_employment_validation_service": {
@@ -105,14 +130,99 @@ mcp_servers = {
         "transport": "sse",
     },
     "address_validation_service": {
-        "url": mcp_image_processor + "/sse",  # Address validation server
+        "url": mcp_address_validator + "/sse",  # Address validation server
         "transport": "sse",
     }
 }
 
-app = FastAPI(title="Credit Underwriting Agent with Image ID Support")
+
+
+def build_graph(tools):
+    """Compile the ReAct credit underwriting graph for the given tools"""
+    # Configure callbacks - only include langfuse if available
+    callbacks = []
+    if langfuse_handler is not None:
+        callbacks.append(langfuse_handler)
+
+    # Every result is re-sent on each later turn, so validators are asked for compact results
+    if TOOL_RESULT_MODE == "compact":
+        tools = compact_tools(tools)
+    # The image processor admits its vision calls in the caller's lane (batch jobs yield to uploads)
+    tools = lane_tools(tools)
+    # Repeated calls within a run are answered from the run's memo; a looping run loses its tools
+    tools = memoized_tools(tools)
+    graph = create_react_agent(decision_model(model, tools), tools, debug=True)
+    return graph.with_config({
+        "run_name": "credit_underwriting_agent_with_image_id",
+        "callbacks": callbacks,
+        "tags": ["loan-processing", "agent", "langgraph"],
+        "metadata": {
+            "langfuse_session_id": "loan-buddy",
+            "langfuse_tags": ["loan-processing", "agent", "langgraph"],
+        },
+        "recursion_limit": 20,
+    })
+
+
+class ModelTurnRecorder(AsyncCallbackHandler):
+    """Input/output tokens and latency of each model call in one agent run"""
+
+    def __init__(self):
+        self.turns = []
+        self._started = {}
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    async def on_llm_end(self, response, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        message = getattr(response.generations[0][0], "message", None) if response.generations else None
+        usage = getattr(message, "usage_metadata", None) or {}
+        self.turns.append({
+            "input_tokens": usage.get("input_tokens"),
+            "output_tokens": usage.get("output_tokens"),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1) if started else None,
+        })
+
+
+# Long-lived MCP sessions and compiled graph, shared by all requests
+tool_registry = ToolRegistry(mcp_servers, build_graph)
+
+
+async def run_underwriting_job(payload: dict) -> dict:
+    """Job handler: underwrite one stored image; rate limiting and missing MCP servers are retried with backoff"""
+    admission_lane.set("batch")
+    try:
+        result = await underwrite_image(payload["image_id"], payload.get("mode"))
+    except ServersUnavailable as e:
+        raise RetryableJobError(str(e))
+    if result["status"] == "RATE_LIMITED":
+        raise RetryableJobError(result["message"])
+    return result
+
+
+# Asynchronous job API: persistent local queue drained by JOB_WORKERS workers
+job_pool: Optional[JobWorkerPool] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global job_pool
+    logger.info("🔧 Connecting to MCP servers...")
+    await tool_registry.start()
+    job_pool = JobWorkerPool(JobQueue(), run_underwriting_job)
+    job_pool.start()
+    yield
+    await job_pool.stop()
+    job_pool.queue.close()
+    await tool_registry.stop()
+    shutdown_ingest_pool()
+
+
+app = FastAPI(title="Credit Underwriting Agent with Image ID Support", lifespan=lifespan)
 
 # You are given a set of MCP tools to perform these tasks:
+# - Use 'analyze_credit_document' to extract applicant information and check document authenticity in one call
 # - Use 'extract_credit_application_data' to extract applicant information from documents
 # - Use 'validate_document_authenticity' to check document quality and authenticity
 # - Use 'validate_income_employment' to verify employment and income information
@@ -128,7 +238,7 @@ Your task is to process credit applications by analyzing uploaded documents and
 
 
 Follow these instructions:
-1. First, extract credit application data from the uploaded document using the image processing tools
+1. First, analyze the uploaded document with 'analyze_credit_document', which returns the extracted application data and the document authenticity checks in a single call
 2. Then validate the extracted information using income, employment and address validation tools
 3. Make a final credit decision based on all validation results
 4. Present a comprehensive credit assessment to the user
@@ -144,115 +254,203 @@ user_prompt = """Process this credit application using the provided image ID. Ex
 Validate income, employment and address using tools. Return JSON with APPROVED/REJECTED decision."""
 
 
+async def store_uploaded_image(image_bytes: bytes) -> Optional[str]:
+    """
+    Normalize and store an uploaded credit application image in S3
+
+    Args:
+        image_bytes: Raw uploaded image bytes
+
+    Returns:
+        str: Generated image ID if stored, None otherwise
+    """
+    # Normalize to JPEG bytes off the event loop; stored as binary with dimension/hash metadata
+    jpeg_bytes, metadata, timings = await aprepare_image(image_bytes)
+    logger.info(
+        f"🖼️ Ingested {metadata['source-width']}x{metadata['source-height']} image: "
+        + ", ".join(f"{stage} {ms:.1f}" for stage, ms in timings.items())
+    )
+    
+    # Generate unique image ID
+    image_id = generate_256_bit_hex_key()
+    
+    # Store image in S3
+    if not await astore_image(jpeg_bytes, metadata, image_id):
+        return None
+    
+    logger.info(f"✅ Image stored in S3 with ID: {image_id}")
+    return image_id
+
+
+async def underwrite_image(image_id: str, mode: Optional[str] = None, emit: Optional[Emit] = None) -> dict:
+    """
+    Underwrite an image already stored in S3 and report end-to-end latency
+
+    Args:
+        image_id: Unique identifier for the image in S3
+        mode: "react" or "pipeline" (default: UNDERWRITING_MODE)
+        emit: Progress callback for tool_start / tool_end / token events
+
+    Returns:
+        dict: COMPLETED or RATE_LIMITED result for the application
+    """
+    mode = mode or UNDERWRITING_MODE
+    start_time = time.perf_counter()
+    pipeline_result = None
+    try:
+        if mode == "pipeline":
+            await tool_registry.get_graph()  # waits for the MCP sessions
+            callbacks = [langfuse_handler] if langfuse_handler is not None else []
+            pipeline_result = await run_pipeline(lane_tools(tool_registry.tools), model, image_id, callbacks, emit)
+        ran_pipeline = pipeline_result is not None and "credit_assessment" in pipeline_result
+        if ran_pipeline:
+            result = {
+                "status": "COMPLETED",
+                "image_id": image_id,
+                "credit_assessment": pipeline_result["credit_assessment"],
+                "processing_note": "Processed with the parallel validation pipeline and one decision call",
+            }
+        else:
+            if pipeline_result is not None:
+                logger.info(f"Pipeline falling back to the agent for {image_id}: {pipeline_result['fallback_reason']}")
+            result = await underwrite_image_react(image_id, emit)
+    except Exception as e:
+        # Only reached once the admission controller's retries are exhausted
+        if is_rate_limit_error(e):
+            logger.warning(f"Rate limit encountered: {e}")
+            return {
+                "status": "RATE_LIMITED",
+                "message": "Rate limit encountered. Please try again later.",
+                "image_id": image_id,
+                "recommendation": "Wait a few minutes before retrying"
+            }
+        raise
+
+    elapsed_seconds = round(time.perf_counter() - start_time, 3)
+    result["mode"] = "pipeline" if ran_pipeline else "react"
+    if pipeline_result is not None:
+        result["pipeline_timings_ms"] = pipeline_result["timings_ms"]
+        if "fallback_reason" in pipeline_result:
+            result["fallback_reason"] = pipeline_result["fallback_reason"]
+    result["elapsed_seconds"] = elapsed_seconds
+    logger.info(f"⏱️ Underwrote {image_id} in {elapsed_seconds:.2f}s (requested {mode}, ran {result['mode']})")
+    return result
+
+
+async def underwrite_image_react(image_id: str, emit: Optional[Emit] = None) -> dict:
+    """
+    Run the ReAct credit underwriting graph for an image already stored in S3
+
+    Args:
+        image_id: Unique identifier for the image in S3
+        emit: Progress callback; switches the run to event streaming
+
+    Returns:
+        dict: COMPLETED result for the application
+    """
+    # Use the shared compiled graph backed by persistent MCP sessions
+    graph = await tool_registry.get_graph()
+    
+    # Create user prompt with image ID
+    user_prompt_with_id = HumanMessage(content=f"""
+    Please process this credit application and provide a comprehensive credit assessment.
+    
+    Image_Id: {image_id}
+    
+    Please:
+    1. Extract all applicant information from the document using the tools
+    2. Verify employment and income information
+    3. Verify address information
+    4. Provide a final credit decision with reasoning
+    
+    Return a structured assessment with your recommendation.
+    """)
+    
+    inputs = {
+        "messages": [user_prompt_with_id],
+        "system": SystemMessage(content=system_prompt)
+    }
+    
+    logger.info("🤖 Processing credit application with agent...")
+    
+    final_message = None
+    turns = ModelTurnRecorder()
+    config = {"callbacks": [turns]}
+    with memoized_run() as tool_run:
+        if emit is None:
+            async for s in graph.astream(inputs, config=config, stream_mode="values"):
+                message = s["messages"][-1]
+                if isinstance(message, tuple):
+                    logger.info(message)
+                else:
+                    message.pretty_print()
+                
+                if isinstance(message, AIMessage):
+                    final_message = message.content
+                    logger.info(f"Final credit assessment: {final_message}")
+        else:
+            tool_started = {}
+            async for event in graph.astream_events(inputs, config=config, version="v2"):
+                kind = event["event"]
+                if kind == "on_tool_start":
+                    tool_started[event["run_id"]] = time.perf_counter()
+                    await emit("tool_start", {"tool": event["name"], "input": event["data"].get("input")})
+                elif kind == "on_tool_end":
+                    output = event["data"].get("output")
+                    started = tool_started.pop(event["run_id"], None)
+                    await emit("tool_end", {
+                        "tool": event["name"],
+                        "summary": summarize_result(getattr(output, "content", output)),
+                        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1) if started else None,
+                    })
+                elif kind == "on_chat_model_stream":
+                    text = message_text(event["data"]["chunk"].content)
+                    if text:
+                        await emit("token", {"text": text})
+                elif kind == "on_chat_model_end":
+                    message = event["data"].get("output")
+                    if message is not None and not getattr(message, "tool_calls", None):
+                        final_message = message.content
+            logger.info(f"Final credit assessment: {final_message}")
+    
+    return {
+        "status": "COMPLETED",
+        "image_id": image_id,
+        "credit_assessment": final_message,
+        "processing_note": "Image uploaded to S3 and processed using image ID with MCP tools",
+        "tool_memo": tool_run.stats(),
+        "tool_result_mode": TOOL_RESULT_MODE,
+        "model_turns": turns.turns,
+    }
+
+
 @app.post("/api/process_credit_application_with_upload")
-async def process_credit_application_with_upload(image_file: UploadFile = File(...)):
+async def process_credit_application_with_upload(
+    image_file: UploadFile = File(...),
+    mode: Optional[str] = Query(default=None, pattern="^(react|pipeline)$")
+):
     """
     Process credit application with uploaded image file
     This endpoint uploads the image to S3 and processes it using image ID
+    (mode: "react" agent or the parallel "pipeline", default UNDERWRITING_MODE)
     """
     
     try:
         logger.info("🔄 Starting credit application processing with uploaded image...")
         
-        # Step 1: Read and process the uploaded image
+        # Step 1: Read and store the uploaded image
         logger.info("📄 Processing uploaded credit application image...")
         image_bytes = await image_file.read()
-        
-        # Encode image to base64 for storage
-        credit_app_image = encode_image(image_bytes)
-        
-        # Generate unique image ID
-        image_id = generate_256_bit_hex_key()
-        
-        # Store image in S3
-        if not store_object(credit_app_image, image_id):
+        image_id = await store_uploaded_image(image_bytes)
+        if image_id is None:
             return {
                 "status": "ERROR",
                 "message": "Failed to store image in S3",
                 "recommendation": "Please try again"
             }
         
-        logger.info(f"✅ Image stored in S3 with ID: {image_id}")
-        
-        # Step 2: Use MCP client to get tools and process the application
-        logger.info("🔧 Loading MCP tools...")
-        client = MultiServerMCPClient(mcp_servers)
-        tools = await client.get_tools()
-        
-        logger.info(f"Available tools: {[tool.name for tool in tools]}")
-        
-        # Create the agent with tools
-        graph = create_react_agent(model, tools, debug=True)
-        
-        # Configure callbacks - only include langfuse if available
-        callbacks = []
-        if langfuse_handler is not None:
-            callbacks.append(langfuse_handler)
-        
-        graph = graph.with_config({
-            "run_name": "credit_underwriting_agent_with_image_id",
-            "callbacks": callbacks,
-            "tags": ["loan-processing", "agent", "langgraph"],
-            "metadata": {
-                "langfuse_session_id": "loan-buddy",
-                "langfuse_tags": ["loan-processing", "agent", "langgraph"],
-            },
-            "recursion_limit": 20,
-        })
-        
-        # Create user prompt with image ID
-        user_prompt_with_id = HumanMessage(content=f"""
-        Please process this credit application and provide a comprehensive credit assessment.
-        
-        Image_Id: {image_id}
-        
-        Please:
-        1. Extract all applicant information from the document using the tools
-        2. Verify employment and income information
-        3. Verify address information
-        4. Provide a final credit decision with reasoning
-        
-        Return a structured assessment with your recommendation.
-        """)
-        
-        inputs = {
-            "messages": [user_prompt_with_id],
-            "system": SystemMessage(content=system_prompt)
-        }
-        
-        logger.info("🤖 Processing credit application with agent...")
-        
-        final_message = None
-        try:
-            async for s in graph.astream(inputs, stream_mode="values"):
-                message = s["messages"][-1]
-                if isinstance(message, tuple):
-                    logger.info(message)
-                else:
-                    message.pretty_print()
-                    
-                if isinstance(message, AIMessage):
-                    final_message = message.content
-                    logger.info(f"Final credit assessment: {final_message}")
-                    
-        except Exception as e:
-            if "RateLimitError" in str(e) or "429" in str(e):
-                logger.warning(f"Rate limit encountered: {e}")
-                return {
-                    "status": "RATE_LIMITED",
-                    "message": "Rate limit encountered. Please try again later.",
-                    "image_id": image_id,
-                    "recommendation": "Wait a few minutes before retrying"
-                }
-            else:
-                raise e
-        
-        return {
-            "status": "COMPLETED",
-            "image_id": image_id,
-            "credit_assessment": final_message,
-            "processing_note": "Image uploaded to S3 and processed using image ID with MCP tools"
-        }
+        # Step 2: Run the underwriting agent against the stored image
+        return await underwrite_image(image_id, mode)
         
     except Exception as e:
         logger.error(f"Error processing credit application: {e}")
@@ -262,25 +460,217 @@ async def process_credit_application_with_upload(image_file: UploadFile = File(.
             "recommendation": "Please check the image format and try again"
         }
 
+def _sse(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/api/process_credit_application_stream")
+async def process_credit_application_stream(
+    image_file: UploadFile = File(...),
+    mode: Optional[str] = Query(default=None, pattern="^(react|pipeline)$")
+):
+    """
+    Process an uploaded credit application, streaming progress as server-sent events:
+    received, stored (image_id), tool_start / tool_end (with a result summary) per tool,
+    token (assessment text as generated) and finally complete (the same result as the
+    upload endpoint) or error
+    """
+    image_bytes = await image_file.read()
+
+    async def event_stream():
+        yield _sse("received", {"filename": image_file.filename, "bytes": len(image_bytes)})
+        try:
+            image_id = await store_uploaded_image(image_bytes)
+        except Exception as e:
+            logger.error(f"Error storing uploaded image: {e}")
+            image_id = None
+        if image_id is None:
+            yield _sse("error", {"status": "ERROR", "message": "Failed to store image in S3"})
+            return
+        yield _sse("stored", {"image_id": image_id})
+
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def emit(event: str, data: dict):
+            await queue.put((event, data))
+
+        async def run():
+            try:
+                await queue.put(("complete", await underwrite_image(image_id, mode, emit)))
+            except Exception as e:
+                logger.error(f"Error processing credit application {image_id}: {e}")
+                await queue.put(("error", {
+                    "status": "ERROR",
+                    "image_id": image_id,
+                    "message": "An error occurred while processing your application"
+                }))
+            finally:
+                await queue.put(None)
+
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if item is None:
+                    break
+                yield _sse(*item)
+        finally:
+            # Client disconnected - don't leave an orphaned agent run
+            task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/api/process_credit_applications_batch")
+async def process_credit_applications_batch(
+    image_files: List[UploadFile] = File(default=[]),
+    image_ids: List[str] = Form(default=[]),
+    concurrency: int = Query(default=BATCH_CONCURRENCY, ge=1, le=BATCH_MAX_CONCURRENCY),
+    mode: Optional[str] = Query(default=None, pattern="^(react|pipeline)$")
+):
+    """
+    Process a batch of credit applications
+    Accepts uploaded image files and/or a manifest of image IDs already stored in S3,
+    runs up to `concurrency` applications at once and streams one NDJSON line per
+    application as soon as it finishes (completion order, not submission order)
+    """
+    if not image_files and not image_ids:
+        raise HTTPException(status_code=400, detail="Provide image_files and/or image_ids")
+
+    logger.info(f"🔄 Starting batch of {len(image_files) + len(image_ids)} credit applications (concurrency={concurrency})...")
+
+    # Read uploads now (the files are closed once this handler returns); normalizing and
+    # storing them happens per entry under the semaphore, overlapping with underwriting
+    entries = [{"source": image_file.filename, "upload": await image_file.read(), "image_id": None}
+               for image_file in image_files]
+    entries.extend({"source": "manifest", "upload": None, "image_id": image_id} for image_id in image_ids)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process_entry(index: int, entry: dict) -> dict:
+        result = {"index": index, "source": entry["source"]}
+        admission_lane.set("batch")  # interactive uploads are admitted first
+        async with semaphore:
+            start_time = time.perf_counter()
+            upload = entry.pop("upload")
+            if upload is not None:
+                try:
+                    entry["image_id"] = await store_uploaded_image(upload)
+                except Exception as e:
+                    logger.error(f"Error storing {entry['source']}: {e}")
+                del upload
+                if entry["image_id"] is None:
+                    result.update({"status": "ERROR", "message": "Failed to store image in S3"})
+                    result["elapsed_seconds"] = round(time.perf_counter() - start_time, 3)
+                    return result
+            try:
+                result.update(await underwrite_image(entry["image_id"], mode))
+            except Exception as e:
+                logger.error(f"Error processing credit application {entry['image_id']}: {e}")
+                result.update({
+                    "status": "ERROR",
+                    "image_id": entry["image_id"],
+                    "message": "An error occurred while processing this application"
+                })
+            result["elapsed_seconds"] = round(time.perf_counter() - start_time, 3)
+        return result
+
+    async def stream_results():
+        tasks = [asyncio.create_task(process_entry(i, entry)) for i, entry in enumerate(entries)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+        finally:
+            # Client disconnected or stream aborted - don't leave orphaned agent runs
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(
+    image_file: Optional[UploadFile] = File(default=None),
+    image_id: Optional[str] = Form(default=None),
+    mode: Optional[str] = Query(default=None, pattern="^(react|pipeline)$")
+):
+    """
+    Queue a credit application (uploaded image or an image ID already in S3) and
+    return its job ID right away; poll /api/jobs/{job_id} for status and
+    /api/jobs/{job_id}/result for the assessment
+    """
+    if (image_file is None) == (image_id is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of image_file or image_id")
+    if image_file is not None:
+        image_id = await store_uploaded_image(await image_file.read())
+        if image_id is None:
+            raise HTTPException(status_code=502, detail="Failed to store image in S3")
+    job_id = await job_pool.submit({"image_id": image_id, "mode": mode})
+    return {"job_id": job_id, "status": "queued", "image_id": image_id}
+
+@app.get("/api/jobs")
+async def job_stats():
+    """Worker pool size and job counts by status"""
+    return await asyncio.to_thread(job_pool.stats)
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Status, attempts and last error of a job"""
+    job = await asyncio.to_thread(job_pool.queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    job.pop("result")
+    return job
+
+@app.get("/api/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    """Assessment of a finished job (202 with the status while it is queued or running)"""
+    job = await asyncio.to_thread(job_pool.queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    if job["status"] == "succeeded":
+        return job["result"]
+    if job["status"] == "failed":
+        return {"status": "ERROR", "job_id": job_id, "message": job["error"], "attempts": job["attempts"]}
+    return JSONResponse(status_code=202, content={"job_id": job_id, "status": job["status"], "attempts": job["attempts"]})
+
+@app.get("/api/admission")
+async def admission_stats():
+    """Model gateway budgets, queue lengths, waits and 429 counts"""
+    return admission.stats()
+
+@app.get("/api/tool_memo")
+async def tool_memo_stats():
+    """Tool calls avoided by per-run memoization, the time they saved and detected call loops"""
+    return {**memo_stats, "saved_seconds": round(memo_stats["saved_seconds"], 3)}
+
 @app.get("/api/tools")
 async def list_available_tools():
     """List all available MCP tools"""
     try:
-        client = MultiServerMCPClient(mcp_servers)
-        tools = await client.get_tools()
+        tool_servers = tool_registry.tool_servers()
         
         tool_info = []
-        for tool in tools:
+        for tool in tool_registry.tools:
             tool_info.append({
                 "name": tool.name,
                 "description": tool.description,
-                "server": "determined_by_port"  # Could be enhanced to show which server
+                "server": tool_servers.get(tool.name)
             })
         
         return {
             "status": "success",
             "available_tools": tool_info,
-            "total_tools": len(tool_info)
+            "total_tools": len(tool_info),
+            "registry_status": tool_registry.status(),
+            "servers": tool_registry.server_status()
         }
     except Exception as e:
         logger.error(f"Error listing tools: {e}")
@@ -289,19 +679,39 @@ async def list_available_tools():
             "message": "Unable to retrieve tools list"
         }
 
+@app.post("/api/tools/refresh")
+async def refresh_tools():
+    """Re-list tools on every connected MCP server and recompile the graph"""
+    await tool_registry.refresh()
+    return {
+        "status": "success",
+        "message": "Tool refresh requested",
+        "servers": tool_registry.server_status()
+    }
+
 @app.get("/api/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "credit_underwriting_agent_with_image_id"}
+    """Health check endpoint; mcp_status is "degraded" while some MCP servers are not connected"""
+    return {
+        "status": "healthy",
+        "service": "credit_underwriting_agent_with_image_id",
+        "mcp_status": tool_registry.status(),
+        "missing_servers": tool_registry.missing_servers(),
+    }
 
 if __name__ == "__main__":
     logger.info("Starting Credit Underwriting Agent with Image ID Support...")
     logger.info("Available endpoints:")
     logger.info("- POST /api/process_credit_application_with_upload - Upload and process new image")
+    logger.info("- POST /api/process_credit_application_stream - Upload and process, streams SSE progress")
+    logger.info("- POST /api/jobs - Queue an application, returns a job ID (GET /api/jobs/{id}[/result])")
+    logger.info("- POST /api/process_credit_applications_batch - Process many images/IDs, streams NDJSON")
     logger.info("- POST /api/process_credit_application_by_id - Process existing image by ID")
     logger.info("- POST /api/extract_data_only - Extract data without full processing")
     logger.info("- POST /api/process_credit_application - Process sample image (legacy)")
     logger.info("- GET /api/tools - List available MCP tools")
+    logger.info("- GET /api/tool_memo - Repeated tool calls avoided within agent runs")
+    logger.info("- POST /api/tools/refresh - Reload MCP tools")
     logger.info("- GET /api/health - Health check")
 
     uvicorn.run("credit-underwriting-agent:app", host="0.0.0.0", port=8080, reload=True)
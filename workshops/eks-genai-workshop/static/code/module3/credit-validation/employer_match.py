@@ -0,0 +1,86 @@
+"""
+Fuzzy employer and job title matching for employment verification.
+
+Names extracted from documents rarely match the verification record
+character for character ("Tech Solutions, Inc." vs "Tech Solutions Inc").
+Both sides are normalized - lowercased, punctuation removed, legal suffixes
+(Inc, LLC, Corp, ...) stripped from employers and common abbreviations
+(Sr, Mgr, Eng, ...) expanded in job titles - and compared by trigram
+similarity (Dice coefficient), giving a confidence between 0 and 1.
+Normalized forms and trigram sets are memoized, since the same employers
+and titles recur across applicants.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import List
+
+EMPLOYER_MATCH_MIN_CONFIDENCE = float(os.getenv("EMPLOYER_MATCH_MIN_CONFIDENCE", "0.8"))
+JOB_TITLE_MATCH_MIN_CONFIDENCE = float(os.getenv("JOB_TITLE_MATCH_MIN_CONFIDENCE", "0.85"))
+# Distinct names whose normalized form and trigrams are kept
+NORMALIZE_CACHE_SIZE = 65536
+
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "llp", "lp", "ltd", "limited", "corp", "corporation", "co", "company",
+    "plc", "pllc", "pc", "na", "gmbh", "ag", "sa", "bv", "pty",
+}
+TITLE_ABBREVIATIONS = {
+    "sr": "senior", "snr": "senior", "jr": "junior", "mgr": "manager", "mngr": "manager",
+    "eng": "engineer", "engr": "engineer", "dev": "developer", "asst": "assistant", "assoc": "associate",
+    "dir": "director", "admin": "administrator", "coord": "coordinator", "rep": "representative",
+    "tech": "technician", "spec": "specialist", "exec": "executive", "vp": "vice president",
+    "svp": "senior vice president", "ceo": "chief executive officer", "cfo": "chief financial officer",
+    "cto": "chief technology officer", "rn": "registered nurse",
+}
+_SEPARATORS = re.compile(r"[^a-z0-9]+")
+
+
+def _words(text: str) -> List[str]:
+    # Dots join ("L.L.C." -> "llc", "N.A." -> "na"); other punctuation separates words
+    text = (text or "").lower().replace("&", " and ").replace(".", "").replace("'", "")
+    return _SEPARATORS.sub(" ", text).split()
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_employer(name: str) -> str:
+    """Lowercase employer name without punctuation, a leading "the" or trailing legal suffixes"""
+    words = _words(name)
+    if words[:1] == ["the"] and len(words) > 1:
+        words = words[1:]
+    end = len(words)
+    while end > 1 and words[end - 1] in LEGAL_SUFFIXES:
+        end -= 1
+    return " ".join(words[:end])
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_job_title(title: str) -> str:
+    """Lowercase job title without punctuation, with common abbreviations expanded"""
+    return " ".join(TITLE_ABBREVIATIONS.get(word, word) for word in _words(title))
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _trigrams(normalized: str) -> frozenset:
+    padded = f" {normalized} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: str, b: str) -> float:
+    """Trigram Dice similarity of two normalized names (1.0 if equal, 0.0 if either is empty)"""
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    a_trigrams, b_trigrams = _trigrams(a), _trigrams(b)
+    return 2 * len(a_trigrams & b_trigrams) / (len(a_trigrams) + len(b_trigrams))
+
+
+def employer_confidence(reported: str, verified: str) -> float:
+    """Confidence that a reported employer names the verified employer"""
+    return similarity(normalize_employer(reported or ""), normalize_employer(verified or ""))
+
+
+def job_title_confidence(reported: str, verified: str) -> float:
+    """Confidence that a reported job title names the verified job title"""
+    return similarity(normalize_job_title(reported or ""), normalize_job_title(verified or ""))
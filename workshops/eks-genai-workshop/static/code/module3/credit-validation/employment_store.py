@@ -0,0 +1,286 @@
+"""
+Employment record stores for the income/employment validator.
+
+MemoryEmploymentStore serves a dict (the workshop's mock data).
+SQLiteEmploymentStore serves a verification extract imported into SQLite:
+one table keyed by normalized email (WITHOUT ROWID, so a lookup is a single
+B-tree search), read through memory-mapped I/O. The database file lives on
+disk and in the page cache, so worker processes share it instead of each
+loading millions of records.
+
+Imports write a new database next to the target and os.replace() it into
+place. Servers notice the new file (inode, modification time or size
+changed) within EMPLOYMENT_DB_RELOAD_INTERVAL seconds and open fresh
+connections; lookups in progress finish against the old file.
+
+Import a CSV extract (columns: email, employer, job_title, annual_income,
+employment_status, years_employed, employment_verified, income_verified,
+last_verification_date):
+
+    python employment_store.py import employees.csv /data/employment.db
+"""
+
+import abc
+import csv
+import logging
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EMPLOYMENT_DB_RELOAD_INTERVAL = float(os.getenv("EMPLOYMENT_DB_RELOAD_INTERVAL", "5"))
+EMPLOYMENT_DB_MMAP_BYTES = int(os.getenv("EMPLOYMENT_DB_MMAP_BYTES", str(1024 * 1024 * 1024)))
+IMPORT_BATCH_ROWS = 50_000
+# Emails per query in get_many (kept well below SQLite's bound parameter limit)
+LOOKUP_BATCH_ROWS = 500
+
+COLUMNS = (
+    "employer", "job_title", "annual_income", "employment_status", "years_employed",
+    "employment_verified", "income_verified", "last_verification_date",
+)
+_SCHEMA = """
+CREATE TABLE employment (
+    email TEXT PRIMARY KEY,
+    employer TEXT NOT NULL,
+    job_title TEXT NOT NULL,
+    annual_income REAL NOT NULL,
+    employment_status TEXT NOT NULL,
+    years_employed REAL NOT NULL,
+    employment_verified INTEGER NOT NULL,
+    income_verified INTEGER NOT NULL,
+    last_verification_date TEXT
+) WITHOUT ROWID;
+CREATE TABLE import_info (key TEXT PRIMARY KEY, value TEXT);
+"""
+_SELECT = f"SELECT {', '.join(COLUMNS)} FROM employment WHERE email = ?"
+_SELECT_MANY = f"SELECT email, {', '.join(COLUMNS)} FROM employment WHERE email IN ({{}})"
+
+
+def normalize_email(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def _flag(value: Any) -> int:
+    if isinstance(value, str):
+        return int(value.strip().lower() in ("true", "1", "yes", "y"))
+    return int(bool(value))
+
+
+def _number(value: Any) -> Optional[float]:
+    """Finite number from a CSV field, or None if blank or not a number"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _record(row: Tuple) -> Dict[str, Any]:
+    record = dict(zip(COLUMNS, row))
+    record["employment_verified"] = bool(record["employment_verified"])
+    record["income_verified"] = bool(record["income_verified"])
+    return record
+
+
+class EmploymentStore(abc.ABC):
+    """Email -> employment record lookups"""
+
+    @abc.abstractmethod
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        """Record for an email (case-insensitive), or None if not found"""
+
+    def get_many(self, emails: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Records for each email in order (None where not found)"""
+        return [self.get(email) for email in emails]
+
+    @abc.abstractmethod
+    def __len__(self):
+        """Number of records"""
+
+
+class MemoryEmploymentStore(EmploymentStore):
+    """Records held in a dict keyed by email"""
+
+    def __init__(self, records: Dict[str, Dict[str, Any]]):
+        self._records = {normalize_email(email): record for email, record in records.items()}
+
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        return self._records.get(normalize_email(email))
+
+    def __len__(self):
+        return len(self._records)
+
+
+class SQLiteEmploymentStore(EmploymentStore):
+    """
+    Read-only SQLite store with per-thread connections, reopened when the
+    database file is replaced
+
+    Args:
+        path: Database written by import_employment_records
+        reload_interval: Minimum seconds between checks for a replaced file
+    """
+
+    def __init__(self, path: str, reload_interval: float = EMPLOYMENT_DB_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.generation = 0
+        self._version = self._file_version()
+        self._checked_at = time.monotonic()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        logger.info(f"Opened employment store {path} ({len(self)} records)")
+
+    def _file_version(self) -> Tuple[int, int, int]:
+        stat = os.stat(self.path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _check_reload(self):
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                version = self._file_version()
+            except OSError as e:
+                logger.error(f"Employment store {self.path} unavailable, keeping open connections: {e}")
+                return
+            if version != self._version:
+                self._version = version
+                self.generation += 1
+                logger.info(f"Employment store {self.path} replaced, reopening (generation {self.generation})")
+
+    def _connection(self) -> sqlite3.Connection:
+        if time.monotonic() - self._checked_at >= self.reload_interval:
+            self._check_reload()
+        local = self._local
+        if getattr(local, "generation", None) != self.generation:
+            if getattr(local, "connection", None) is not None:
+                local.connection.close()
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            connection.execute(f"PRAGMA mmap_size = {EMPLOYMENT_DB_MMAP_BYTES}")
+            local.connection = connection
+            local.generation = self.generation
+        return local.connection
+
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(_SELECT, (normalize_email(email),)).fetchone()
+        return _record(row) if row else None
+
+    def get_many(self, emails: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Records for each email in order, fetched LOOKUP_BATCH_ROWS keys per query"""
+        connection = self._connection()
+        keys = [normalize_email(email) for email in emails]
+        unique = list(dict.fromkeys(keys))
+        found = {}
+        for offset in range(0, len(unique), LOOKUP_BATCH_ROWS):
+            batch = unique[offset:offset + LOOKUP_BATCH_ROWS]
+            for row in connection.execute(_SELECT_MANY.format(", ".join("?" * len(batch))), batch):
+                found[row[0]] = _record(row[1:])
+        return [found.get(key) for key in keys]
+
+    def __len__(self):
+        row = self._connection().execute("SELECT value FROM import_info WHERE key = 'rows'").fetchone()
+        return int(row[0]) if row else 0
+
+
+def import_employment_records(rows: Iterable[Dict[str, Any]], path: str, source: str = "") -> int:
+    """
+    Bulk import records into a new database and atomically replace `path`
+
+    Args:
+        rows: Records with an email plus the fields in COLUMNS
+        path: Target database file
+        source: Description stored with the import
+
+    Returns:
+        int: Number of records imported (duplicate emails keep the last record). Rows without
+        an email or with a blank or non-numeric annual_income / years_employed are skipped,
+        counted in import_info and logged.
+    """
+    building = f"{path}.{os.getpid()}.building"
+    if os.path.exists(building):
+        os.remove(building)
+    connection = sqlite3.connect(building)
+    try:
+        # Nothing to recover if the import dies half way: the target is untouched
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("PRAGMA cache_size = -262144")
+        connection.executescript(_SCHEMA)
+        # Rows arrive in arbitrary order; staging them and inserting sorted by
+        # email builds the primary key B-tree sequentially instead of by random inserts
+        connection.execute("CREATE TEMP TABLE staging AS SELECT * FROM employment WHERE 0")
+        skipped = {"email": 0, "annual_income": 0, "years_employed": 0}
+
+        def values():
+            for row in rows:
+                email = normalize_email(row.get("email"))
+                if not email:
+                    skipped["email"] += 1
+                    continue
+                # A blank income or tenure is unknown, not zero: validators divide by the income
+                annual_income, years_employed = _number(row.get("annual_income")), _number(row.get("years_employed"))
+                if annual_income is None or years_employed is None:
+                    skipped["annual_income" if annual_income is None else "years_employed"] += 1
+                    continue
+                yield (
+                    email,
+                    str(row.get("employer") or ""),
+                    str(row.get("job_title") or ""),
+                    annual_income,
+                    str(row.get("employment_status") or ""),
+                    years_employed,
+                    _flag(row.get("employment_verified")),
+                    _flag(row.get("income_verified")),
+                    row.get("last_verification_date") or None,
+                )
+
+        insert = f"INSERT INTO staging VALUES ({', '.join('?' * (len(COLUMNS) + 1))})"
+        batch = []
+        for value in values():
+            batch.append(value)
+            if len(batch) >= IMPORT_BATCH_ROWS:
+                connection.executemany(insert, batch)
+                batch.clear()
+        connection.executemany(insert, batch)
+        # Ties sort by arrival, so the last record for a duplicate email wins
+        connection.execute("INSERT OR REPLACE INTO employment SELECT * FROM staging ORDER BY email, rowid")
+        connection.execute("DROP TABLE staging")
+
+        count = connection.execute("SELECT COUNT(*) FROM employment").fetchone()[0]
+        connection.executemany("INSERT INTO import_info VALUES (?, ?)", [
+            ("rows", str(count)),
+            ("skipped_rows", str(sum(skipped.values()))),
+            ("source", source),
+            ("imported_at", datetime.now(timezone.utc).isoformat()),
+        ])
+        connection.commit()
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+
+    os.replace(building, path)
+    logger.info(f"Imported {count} employment records into {path}")
+    if any(skipped.values()):
+        logger.warning(f"Skipped {sum(skipped.values())} employment rows without a usable value "
+                       f"(by first missing field: {skipped})")
+    return count
+
+
+def read_employment_csv(path: str) -> Iterable[Dict[str, str]]:
+    """Stream employment records from a CSV file with a header row"""
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 4 or sys.argv[1] != "import":
+        print("Usage: python employment_store.py import <employees.csv> <employment.db>")
+        sys.exit(1)
+    import_employment_records(read_employment_csv(sys.argv[2]), sys.argv[3], source=os.path.abspath(sys.argv[2]))
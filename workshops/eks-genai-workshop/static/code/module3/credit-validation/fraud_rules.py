@@ -0,0 +1,212 @@
+"""
+Compiled fraud rules for the address validator.
+
+Rules are weighted patterns loaded from a JSON file (FRAUD_RULES_PATH):
+
+    {
+      "rules": [
+        {"id": "po-box", "type": "literal", "patterns": ["po box", "p.o. box"],
+         "score": 30, "indicator": "PO Box address not acceptable for residential verification"},
+        {"id": "unit-range", "type": "regex", "patterns": ["\\\\b\\\\d+-\\\\d+\\\\b"], "score": 10,
+         "indicator": "Hyphenated unit range"}
+      ]
+    }
+
+Literal patterns (case-insensitive substrings) are compiled into one
+Aho-Corasick automaton and regex patterns into one combined expression, so a
+check is a single pass over the text however many rules there are; only at
+positions where some regex matches is every regex tried, so regex rules
+matching at the same position are all reported. A rule
+scores once no matter how many of its patterns match. The rule file is
+re-read when its modification time or size changes; the new rule set is
+compiled off to the side and swapped in with one assignment, and a file that
+fails to compile leaves the previous rules in place.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FRAUD_RULES_PATH = os.getenv(
+    "FRAUD_RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "fraud-rules.json")
+)
+# Minimum seconds between modification time checks of the rule file
+FRAUD_RULES_RELOAD_INTERVAL = float(os.getenv("FRAUD_RULES_RELOAD_INTERVAL", "5"))
+
+
+class FraudRule(NamedTuple):
+    id: str
+    score: int
+    indicator: str
+
+
+class RuleMatch(NamedTuple):
+    rule_id: str
+    score: int
+    indicator: str
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher reporting every (possibly overlapping) match"""
+
+    def __init__(self, patterns: List[Tuple[str, int]]):
+        """
+        Args:
+            patterns: (pattern, value) pairs; matching reports the values
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[Tuple[int, ...]] = [()]
+        for pattern, value in patterns:
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._outputs.append(())
+                node = next_node
+            self._outputs[node] += (value,)
+
+        # Breadth-first failure links; outputs of the failure state are inherited
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._outputs[child] += self._outputs[self._fail[child]]
+
+    def __len__(self):
+        return len(self._goto)
+
+    def search(self, text: str) -> set:
+        """Values of all patterns occurring in `text`"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                found.update(outputs[node])
+        return found
+
+
+class CompiledRules:
+    """An immutable, compiled rule set"""
+
+    def __init__(self, config: Dict[str, Any], source: str = ""):
+        self.source = source
+        self.rules: List[FraudRule] = []
+        literals: List[Tuple[str, int]] = []
+        regexes: List[str] = []
+        self._regex_rules: Dict[str, int] = {}
+        seen = set()
+
+        for spec in config.get("rules", []):
+            rule_id = str(spec["id"])
+            if rule_id in seen:
+                raise ValueError(f"Duplicate fraud rule id: {rule_id}")
+            seen.add(rule_id)
+            rule_type = spec.get("type", "literal")
+            patterns = spec.get("patterns") or [spec["pattern"]]
+            index = len(self.rules)
+            self.rules.append(FraudRule(rule_id, int(spec.get("score", 0)), spec.get("indicator", rule_id)))
+
+            if rule_type == "literal":
+                literals.extend((pattern.lower(), index) for pattern in patterns if pattern)
+            elif rule_type == "regex":
+                for pattern in patterns:
+                    re.compile(pattern)  # report the offending rule rather than the combined expression
+                    group = f"r{len(self._regex_rules)}"
+                    self._regex_rules[group] = index
+                    regexes.append(f"(?P<{group}>{pattern})")
+            else:
+                raise ValueError(f"Unknown fraud rule type '{rule_type}' for rule {rule_id}")
+
+        self._automaton = AhoCorasick(literals)
+        # Lookahead so every start position is tried; it only reports the first regex matching at a
+        # position, so each such position is re-checked with one optional lookahead per regex
+        self._regex = re.compile("(?=" + "|".join(regexes) + ")", re.IGNORECASE) if regexes else None
+        self._regex_at = re.compile("".join(f"(?={regex})?" for regex in regexes), re.IGNORECASE) if regexes else None
+
+    def __len__(self):
+        return len(self.rules)
+
+    def match(self, text: str) -> List[RuleMatch]:
+        """Rules matching `text`, highest score first"""
+        matched = self._automaton.search(text.lower())
+        if self._regex is not None:
+            for match in self._regex.finditer(text):
+                groups = self._regex_at.match(text, match.start()).groupdict()
+                matched.update(self._regex_rules[group] for group, value in groups.items() if value is not None)
+        rules = sorted((self.rules[index] for index in matched), key=lambda rule: (-rule.score, rule.id))
+        return [RuleMatch(rule.id, rule.score, rule.indicator) for rule in rules]
+
+
+class FraudRuleEngine:
+    """
+    Fraud rules loaded from a JSON file, reloaded when the file changes
+
+    Args:
+        path: Rule file path
+        reload_interval: Minimum seconds between modification time checks
+    """
+
+    def __init__(self, path: str = FRAUD_RULES_PATH, reload_interval: float = FRAUD_RULES_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.rules = CompiledRules({"rules": []})
+        self._version: Optional[Tuple[int, int]] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> bool:
+        """
+        Re-read and compile the rule file if it changed
+
+        Returns:
+            bool: True if a new rule set was swapped in
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+            except OSError as e:
+                logger.error(f"Cannot read fraud rules from {self.path}: {e}")
+                return False
+            version = (stat.st_mtime_ns, stat.st_size)
+            if version == self._version:
+                return False
+            try:
+                with open(self.path) as f:
+                    compiled = CompiledRules(json.load(f), source=self.path)
+            except (ValueError, KeyError, TypeError, re.error) as e:
+                logger.error(f"Invalid fraud rules in {self.path}, keeping {len(self.rules)} current rules: {e}")
+                self._version = version
+                return False
+            self.rules = compiled
+            self._version = version
+            logger.info(f"Loaded {len(compiled)} fraud rules from {self.path}")
+            return True
+
+    def match(self, text: str) -> List[RuleMatch]:
+        """Rules matching `text`, checking the rule file for changes at most every reload_interval"""
+        if self.path is not None and time.monotonic() - self._checked_at >= self.reload_interval:
+            self.reload()
+        return self.rules.match(text)
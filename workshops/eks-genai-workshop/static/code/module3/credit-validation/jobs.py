@@ -0,0 +1,228 @@
+"""
+Persistent job queue and worker pool for asynchronous underwriting.
+
+Submitting a job stores one row in a local SQLite database and returns its
+id immediately; a fixed pool of workers claims queued jobs, runs them and
+records the result. Throughput is set by the worker count, not by how many
+HTTP connections clients keep open, and a client disconnect loses nothing.
+
+An attempt whose handler raises (RetryableJobError for expected failures
+such as rate limiting, or any other exception) is re-queued with exponential backoff until JOB_MAX_ATTEMPTS. Jobs left
+"running" by a pod that died are re-queued when the next queue opens the
+database, so keep JOB_DB_PATH on a persistent volume to survive restarts.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "/tmp/loan-buddy-jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+# Idle workers re-check the queue this often (new submissions wake them immediately)
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_queued ON jobs (status, available_at, created_at);
+"""
+_COLUMNS = ("id", "status", "payload", "attempts", "max_attempts", "available_at",
+            "created_at", "started_at", "finished_at", "result", "error")
+
+
+class RetryableJobError(Exception):
+    """Raised by a handler for a failure worth retrying (e.g. rate limiting)"""
+
+
+def _job(row: Tuple) -> Dict[str, Any]:
+    job = dict(zip(_COLUMNS, row))
+    job["payload"] = json.loads(job["payload"])
+    job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+    return job
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue. Blocking - call from a thread in async code.
+
+    Args:
+        path: Database file (created if missing)
+        max_attempts: Attempts per job before it is marked failed
+        retry_base_seconds: Backoff before the second attempt; doubles per attempt
+    """
+
+    def __init__(self, path: str = JOB_DB_PATH, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 retry_base_seconds: float = JOB_RETRY_BASE_SECONDS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.executescript(_SCHEMA)
+        recovered = self._execute(
+            "UPDATE jobs SET status = 'queued', available_at = ? WHERE status = 'running'", (time.time(),)
+        ).rowcount
+        if recovered:
+            logger.warning(f"Re-queued {recovered} jobs interrupted by a restart")
+
+    def _execute(self, sql: str, params: Tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._connection.execute(sql, params)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def submit(self, payload: Dict[str, Any]) -> str:
+        """Queue a job and return its id"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (id, status, payload, max_attempts, available_at, created_at) VALUES (?, 'queued', ?, ?, ?, ?)",
+            (job_id, json.dumps(payload), self.max_attempts, now, now),
+        )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically mark the oldest available queued job running and return it"""
+        now = time.time()
+        row = self._execute(
+            f"""UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?
+                WHERE id = (SELECT id FROM jobs WHERE status = 'queued' AND available_at <= ?
+                            ORDER BY created_at LIMIT 1)
+                RETURNING {', '.join(_COLUMNS)}""",
+            (now, now),
+        ).fetchone()
+        return _job(row) if row else None
+
+    def complete(self, job_id: str, result: Any):
+        self._execute(
+            "UPDATE jobs SET status = 'succeeded', result = ?, error = NULL, finished_at = ? WHERE id = ?",
+            (json.dumps(result, default=str), time.time(), job_id),
+        )
+
+    def fail(self, job: Dict[str, Any], error: str) -> bool:
+        """
+        Record a failed attempt, re-queueing with backoff while attempts remain
+
+        Returns:
+            bool: True if the job will be retried
+        """
+        if job["attempts"] < job["max_attempts"]:
+            delay = self.retry_base_seconds * 2 ** (job["attempts"] - 1)
+            self._execute(
+                "UPDATE jobs SET status = 'queued', available_at = ?, error = ? WHERE id = ?",
+                (time.time() + delay, error, job["id"]),
+            )
+            return True
+        self._execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+            (error, time.time(), job["id"]),
+        )
+        return False
+
+    def counts(self) -> Dict[str, int]:
+        counts = dict(self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in JOB_STATUSES}
+
+    def next_available_in(self) -> Optional[float]:
+        """Seconds until the earliest queued job becomes available (None if nothing is queued)"""
+        row = self._execute("SELECT MIN(available_at) FROM jobs WHERE status = 'queued'").fetchone()
+        return max(0.0, row[0] - time.time()) if row and row[0] is not None else None
+
+
+class JobWorkerPool:
+    """
+    Workers draining a JobQueue
+
+    Args:
+        queue: Job queue
+        handler: async handler(payload) -> result; raise RetryableJobError (or any
+                 exception) to fail the attempt
+        workers: Number of jobs run concurrently
+    """
+
+    def __init__(self, queue: JobQueue, handler: Callable[[Dict[str, Any]], Awaitable[Any]], workers: int = JOB_WORKERS):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.running = 0
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    async def submit(self, payload: Dict[str, Any]) -> str:
+        """Queue a job, wake an idle worker and return the job id"""
+        job_id = await asyncio.to_thread(self.queue.submit, payload)
+        self._wakeup.set()
+        return job_id
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._work(i), name=f"job-worker-{i}") for i in range(self.workers)]
+        logger.info(f"Started {self.workers} job workers on {self.queue.path}")
+
+    async def stop(self):
+        """Cancel workers; jobs they were running are re-queued on the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _work(self, worker: int):
+        while True:
+            self._wakeup.clear()
+            job = await asyncio.to_thread(self.queue.claim)
+            if job is None:
+                wait = await asyncio.to_thread(self.queue.next_available_in)
+                timeout = JOB_POLL_INTERVAL if wait is None else min(wait, JOB_POLL_INTERVAL)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self.running += 1
+            start = time.perf_counter()
+            try:
+                result = await self.handler(job["payload"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                retrying = await asyncio.to_thread(self.queue.fail, job, f"{type(e).__name__}: {e}")
+                logger.warning(f"Job {job['id']} attempt {job['attempts']} failed ({e}); "
+                               f"{'retrying' if retrying else 'giving up'}")
+            else:
+                await asyncio.to_thread(self.queue.complete, job["id"], result)
+                logger.info(f"Job {job['id']} succeeded in {time.perf_counter() - start:.2f}s (worker {worker})")
+            finally:
+                self.running -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "running": self.running, "jobs": self.queue.counts()}
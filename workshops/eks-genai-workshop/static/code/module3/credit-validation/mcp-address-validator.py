@@ -1,12 +1,86 @@
 # Address Validation MCP Server
 # https://modelcontextprotocol.io/quickstart/server
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
+import asyncio
+import json
+import logging
+import os
 import random
 import re
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from address_index import AddressIndex, build_address_index
+from cache import ToolResultCache
+from compact import compact_fields, compact_json
+from fraud_rules import FraudRuleEngine
+from zip_table import ZipTable, build_zip_table
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Reference address index built with `python address_index.py build <csv> <dir>`;
+# without one, the mock records below are indexed at startup
+ADDRESS_INDEX_DIR = os.getenv("ADDRESS_INDEX_DIR", "")
+# ZIP -> state/county/city table built with `python zip_table.py build <csv> <file>`;
+# without one, the ZIPs of the mock records are used
+ZIP_TABLE_PATH = os.getenv("ZIP_TABLE_PATH", "")
+# Batch validation: rows per tool call and per streamed chunk
+BATCH_MAX_ADDRESSES = int(os.getenv("ADDRESS_BATCH_MAX_ADDRESSES", "5000"))
+BATCH_CHUNK_SIZE = int(os.getenv("ADDRESS_BATCH_CHUNK_SIZE", "1000"))
 
 mcp = FastMCP("address_validation_service", host="0.0.0.0", port=8000)
 
+ADDRESS_RECOMMENDATIONS = {
+    "PROCEED": "Address verified successfully. Proceed with application.",
+    "VERIFY_FURTHER": "Address valid but medium risk. Consider additional verification.",
+    "REQUEST_DOCS_OR_REJECT": "Address validation failed or high risk. Request additional documentation or reject.",
+}
+FRAUD_RECOMMENDATIONS = {
+    "STANDARD_VERIFICATION": "Low fraud risk. Proceed with standard verification.",
+    "ADDITIONAL_VERIFICATION": "Medium fraud risk. Perform additional verification checks.",
+    "REJECT_OR_EXTENSIVE_DOCS": "High fraud risk detected. Reject application or require extensive documentation.",
+}
+OWNERSHIP_RECOMMENDATIONS = {
+    "OWNERSHIP_VERIFIED": "Property ownership verified. Excellent stability indicator.",
+    "STABLE_RENTAL": "Stable rental history verified. Good residency indicator.",
+    "VERIFY_STABILITY": "Limited residency verification. Consider additional stability checks.",
+}
+
+# Compact results (compact=True): verbose field -> short key. The standardized address echoes
+# the arguments; fraud indicators are reported as rule ids / flag codes instead of sentences
+COMPACT_ADDRESS_FIELDS = {
+    "validation_status": "status",
+    "address_verification.is_valid_address": "addr_ok",
+    "address_verification.is_residential": "residential",
+    "address_verification.delivery_point_valid": "deliverable",
+    "address_verification.reference_match": "ref_match",
+    "zip_consistency.zip_known": "zip_known",
+    "zip_consistency.mismatches": "zip_mismatch",
+    "risk_assessment.risk_level": "risk",
+    "risk_assessment.risk_score": "risk_score",
+    "risk_assessment.validation_score": "score",
+}
+COMPACT_FRAUD_FIELDS = {
+    "fraud_check_status": "status",
+    "fraud_score": "score",
+    "fraud_level": "level",
+    "address_history_months": "history_months",
+    "additional_verification_required": "extra_verification",
+}
+COMPACT_OWNERSHIP_FIELDS = {
+    "ownership_status": "status",
+    "ownership_verified": "verified",
+    "ownership_score": "score",
+    "residency_months": "months",
+    "stability_rating": "stability",
+}
+
 # Mock address database with validation results
 mock_address_database = {
     "123 main st": {
@@ -63,12 +137,67 @@ mock_address_database = {
     }
 }
 
+
+def _load_address_index() -> AddressIndex:
+    """Open the reference index, or index the mock database when none is configured"""
+    if ADDRESS_INDEX_DIR and os.path.exists(os.path.join(ADDRESS_INDEX_DIR, "meta.json")):
+        index = AddressIndex(ADDRESS_INDEX_DIR)
+        logger.info(f"Loaded address index with {len(index)} rows from {ADDRESS_INDEX_DIR}")
+        return index
+    if ADDRESS_INDEX_DIR:
+        logger.warning(f"No address index at {ADDRESS_INDEX_DIR}, using the mock address database")
+    directory = os.path.join(tempfile.mkdtemp(prefix="address-index-"), "index")
+    build_address_index(
+        ({**data, "street": data["standardized_address"] or key} for key, data in mock_address_database.items()),
+        directory,
+    )
+    return AddressIndex(directory)
+
+address_index = _load_address_index()
+
+def _load_zip_table() -> ZipTable:
+    """Map the ZIP reference table, or build one from the mock database"""
+    if ZIP_TABLE_PATH and os.path.exists(ZIP_TABLE_PATH):
+        table = ZipTable(ZIP_TABLE_PATH)
+        logger.info(f"Loaded ZIP table with {len(table)} ZIP codes from {ZIP_TABLE_PATH}")
+        return table
+    if ZIP_TABLE_PATH:
+        logger.warning(f"No ZIP table at {ZIP_TABLE_PATH}, using the mock address database")
+    path = os.path.join(tempfile.mkdtemp(prefix="zip-table-"), "zip-table.bin")
+    build_zip_table(
+        ({"zip": data["zip_code"], "state": data["state"], "county": data["county"], "city": data["city"]}
+         for data in mock_address_database.values() if data["zip_code"]),
+        path,
+    )
+    return ZipTable(path)
+
+zip_table = _load_zip_table()
+
+# Weighted fraud patterns from FRAUD_RULES_PATH, reloaded when the file changes
+fraud_rules = FraudRuleEngine()
+
+# Repeated calls with the same arguments (within a run or across retries) are served from memory
+tool_cache = ToolResultCache("address_validation_service")
+
+@mcp.custom_route("/stats", methods=["GET"])
+async def stats(request: Request) -> JSONResponse:
+    """Tool result cache counters for this server"""
+    return JSONResponse({"tool_cache": tool_cache.stats()})
+
+def _reference_match(result) -> bool:
+    """Whether a validate_address result came from the reference index (unknown addresses get a randomized mock)"""
+    if isinstance(result, str):
+        return json.loads(result).get("ref_match", "none") != "none"
+    return result["address_verification"]["reference_match"] != "none"
+
 @mcp.tool(description="Validates and standardizes applicant's residential address")
+@tool_cache.cached(casefold=("street_address", "city", "state"), cache_if=_reference_match)
 async def validate_address(
     street_address: str,
     city: str,
     state: str,
-    zip_code: str
+    zip_code: str,
+    compact: bool = False
 ):
     """
     Validates and standardizes applicant's residential address.
@@ -78,33 +207,29 @@ async def validate_address(
         city: City name
         state: State abbreviation or full name
         zip_code: ZIP or postal code
+        compact: Return short keys and codes (COMPACT_ADDRESS_FIELDS) instead of the verbose result
         
     Returns:
         Address validation result with standardized format and risk assessment
     """
     
-    # Normalize input for lookup
-    normalized_street = street_address.lower().strip()
-    
-    # Check if address exists in mock database
-    address_data = None
-    for key, data in mock_address_database.items():
-        if key in normalized_street or normalized_street in key:
-            address_data = data
-            break
+    # Exact match on the normalized street, else the closest fuzzy match
+    address_data = address_index.lookup(street_address, city, state, zip_code)
     
     if not address_data:
         # Generate mock response for unknown addresses
         address_data = _generate_mock_address_response(street_address, city, state, zip_code)
     
-    # Validate ZIP code format
+    # Validate ZIP code format, then that the ZIP belongs to the stated city and state
     zip_valid = _validate_zip_code(zip_code)
+    zip_consistency = zip_table.check(zip_code if zip_valid else "", city, state)
     
     # Calculate overall validation score
     validation_score = _calculate_address_validation_score(address_data, zip_valid)
+    recommendation = _address_recommendation(address_data["is_valid"], address_data["risk_score"])
     
-    return {
-        "validation_status": "VALID" if address_data["is_valid"] and zip_valid else "INVALID",
+    result = {
+        "validation_status": "VALID" if address_data["is_valid"] and zip_valid and zip_consistency["state_match"] is not False else "INVALID",
         "standardized_address": {
             "street": address_data["standardized_address"],
             "city": address_data["city"] or city,
@@ -117,75 +242,168 @@ async def validate_address(
             "is_residential": address_data["is_residential"],
             "delivery_point_valid": address_data["delivery_point"] == "Valid",
             "address_type": address_data["address_type"],
-            "occupancy_status": address_data["occupancy_status"]
+            "occupancy_status": address_data["occupancy_status"],
+            "reference_match": address_data.get("match_type", "none"),
+            "match_score": address_data.get("match_score", 0.0)
         },
+        "zip_consistency": zip_consistency,
         "risk_assessment": {
             "risk_score": address_data["risk_score"],
             "risk_level": _get_risk_level(address_data["risk_score"]),
             "validation_score": validation_score
         },
-        "recommendation": _get_address_recommendation(address_data["is_valid"], address_data["risk_score"])
+        "recommendation": ADDRESS_RECOMMENDATIONS[recommendation]
+    }
+    if compact:
+        return compact_json({**compact_fields(result, COMPACT_ADDRESS_FIELDS), "rec": recommendation})
+    return result
+
+@mcp.tool(description="Validates a list of addresses in one call (portfolio re-verification); returns column-oriented results per chunk")
+@tool_cache.uncached("batch arguments are rarely repeated and results are large")
+async def validate_addresses_batch(addresses: List[Dict[str, str]], ctx: Context, chunk_size: int = BATCH_CHUNK_SIZE):
+    """
+    Validates many addresses in one call, scoring each chunk column-wise.
+    
+    Args:
+        addresses: Addresses with street_address, city, state and zip_code
+        chunk_size: Rows per chunk; progress is reported after each chunk
+        
+    Returns:
+        Summary counts plus, per chunk, column-oriented results in input order
+    """
+    if len(addresses) > BATCH_MAX_ADDRESSES:
+        return {"error": f"At most {BATCH_MAX_ADDRESSES} addresses per call, got {len(addresses)}"}
+    chunk_size = max(1, min(chunk_size, BATCH_MAX_ADDRESSES))
+    
+    chunks = []
+    for offset in range(0, len(addresses), chunk_size):
+        # Index lookups are CPU-bound; keep the event loop free between chunks
+        chunk = await asyncio.to_thread(_validate_address_chunk, addresses[offset:offset + chunk_size])
+        chunks.append({"offset": offset, "count": len(chunk["validation_status"]), "columns": chunk})
+        done = offset + chunks[-1]["count"]
+        await ctx.report_progress(done, len(addresses), f"Validated {done}/{len(addresses)} addresses")
+    
+    statuses = [status for chunk in chunks for status in chunk["columns"]["validation_status"]]
+    risk_levels = [level for chunk in chunks for level in chunk["columns"]["risk_level"]]
+    return {
+        "total": len(addresses),
+        "summary": {
+            "valid": statuses.count("VALID"),
+            "invalid": statuses.count("INVALID"),
+            "risk_levels": {level: risk_levels.count(level) for level in ("LOW", "MEDIUM", "HIGH")},
+        },
+        "chunks": chunks,
+    }
+
+def _validate_address_chunk(addresses: List[Dict[str, str]]) -> Dict[str, list]:
+    """Look up a chunk of addresses and score it column-wise (same rules as validate_address)"""
+    street = [str(address.get("street_address") or "") for address in addresses]
+    city = [str(address.get("city") or "") for address in addresses]
+    state = [str(address.get("state") or "") for address in addresses]
+    zip_code = [str(address.get("zip_code") or "") for address in addresses]
+    
+    records = []
+    for row in range(len(addresses)):
+        record = address_index.lookup(street[row], city[row], state[row], zip_code[row])
+        records.append(record or _generate_mock_address_response(street[row], city[row], state[row], zip_code[row]))
+    
+    is_valid = np.array([record["is_valid"] for record in records], dtype=bool)
+    is_residential = np.array([record["is_residential"] for record in records], dtype=bool)
+    delivery_point_valid = np.array([record["delivery_point"] == "Valid" for record in records], dtype=bool)
+    risk_score = np.array([record["risk_score"] for record in records], dtype=np.int64)
+    zip_valid = _validate_zip_codes(zip_code)
+    consistency = zip_table.check_many(zip_code, city, state)
+    state_mismatch = consistency["state_mismatch"] & zip_valid
+    city_mismatch = consistency["city_mismatch"] & zip_valid
+    
+    validation_score = 40 * is_valid + 30 * is_residential + 20 * delivery_point_valid + 10 * zip_valid
+    risk_level = np.select([risk_score <= 30, risk_score <= 60], ["LOW", "MEDIUM"], "HIGH")
+    recommendation = np.select(
+        [is_valid & (risk_score <= 30), is_valid & (risk_score <= 60)],
+        [ADDRESS_RECOMMENDATIONS["PROCEED"], ADDRESS_RECOMMENDATIONS["VERIFY_FURTHER"]],
+        ADDRESS_RECOMMENDATIONS["REQUEST_DOCS_OR_REJECT"],
+    )
+    
+    return {
+        "validation_status": np.where(is_valid & zip_valid & ~state_mismatch, "VALID", "INVALID").tolist(),
+        "street": [record["standardized_address"] for record in records],
+        "city": [record["city"] or city[row] for row, record in enumerate(records)],
+        "state": [record["state"] or state[row] for row, record in enumerate(records)],
+        "zip_code": [record["zip_code"] or zip_code[row] for row, record in enumerate(records)],
+        "is_residential": is_residential.tolist(),
+        "zip_state_mismatch": state_mismatch.tolist(),
+        "zip_city_mismatch": city_mismatch.tolist(),
+        "reference_match": [record.get("match_type", "none") for record in records],
+        "risk_score": risk_score.tolist(),
+        "risk_level": risk_level.tolist(),
+        "validation_score": validation_score.tolist(),
+        "recommendation": recommendation.tolist(),
     }
 
 @mcp.tool(description="Performs additional address verification checks including fraud detection")
-async def perform_address_fraud_check(street_address: str, applicant_name: str):
+@tool_cache.uncached("manual review flag and address history are randomized per call")
+async def perform_address_fraud_check(street_address: str, applicant_name: str, compact: bool = False):
     """
     Performs additional address verification including fraud detection.
     
     Args:
         street_address: Street address to verify
         applicant_name: Name of the applicant
+        compact: Return short keys and codes (COMPACT_FRAUD_FIELDS, "flags") instead of the verbose result
         
     Returns:
         Fraud check results and additional verification data
     """
     
-    normalized_street = street_address.lower().strip()
-    
-    # Mock fraud indicators
-    fraud_indicators = []
-    fraud_score = 0
-    
-    # Check for common fraud patterns
-    if "po box" in normalized_street or "p.o. box" in normalized_street:
-        fraud_indicators.append("PO Box address not acceptable for residential verification")
-        fraud_score += 30
-    
-    if any(word in normalized_street for word in ["fake", "test", "invalid", "xxx"]):
-        fraud_indicators.append("Address contains suspicious keywords")
-        fraud_score += 50
+    # Configured fraud patterns, matched in one pass
+    matched_rules = fraud_rules.match(street_address.strip())
+    fraud_indicators = [rule.indicator for rule in matched_rules]
+    flags = [rule.rule_id for rule in matched_rules]
+    fraud_score = sum(rule.score for rule in matched_rules)
     
     # Random additional checks
     if random.random() < 0.1:  # 10% chance of flagging for additional review
         fraud_indicators.append("Address flagged for manual review")
+        flags.append("manual-review")
         fraud_score += 20
     
     # Check address history (mock)
     address_history_months = random.randint(1, 60)
     if address_history_months < 6:
         fraud_indicators.append("Recent address change - less than 6 months")
+        flags.append("recent-address-change")
         fraud_score += 15
     
     fraud_level = "HIGH" if fraud_score >= 50 else "MEDIUM" if fraud_score >= 25 else "LOW"
+    recommendation = _fraud_recommendation(fraud_score, fraud_level)
     
-    return {
+    result = {
         "fraud_check_status": "PASSED" if fraud_score < 50 else "FAILED",
         "fraud_score": fraud_score,
         "fraud_level": fraud_level,
         "fraud_indicators": fraud_indicators,
+        "matched_rules": [{"rule_id": rule.rule_id, "score": rule.score} for rule in matched_rules],
         "address_history_months": address_history_months,
         "additional_verification_required": fraud_score >= 25,
-        "recommendation": _get_fraud_recommendation(fraud_score, fraud_level)
+        "recommendation": FRAUD_RECOMMENDATIONS[recommendation]
     }
+    if compact:
+        compact_result = compact_fields(result, COMPACT_FRAUD_FIELDS)
+        if flags:
+            compact_result["flags"] = flags
+        return compact_json({**compact_result, "rec": recommendation})
+    return result
 
 @mcp.tool(description="Verifies address ownership and residency status")
-async def verify_address_ownership(street_address: str, applicant_name: str):
+@tool_cache.uncached("mock ownership data is randomized per call")
+async def verify_address_ownership(street_address: str, applicant_name: str, compact: bool = False):
     """
     Verifies address ownership and residency status.
     
     Args:
         street_address: Address to verify ownership for
         applicant_name: Name of the applicant
+        compact: Return short keys and codes (COMPACT_OWNERSHIP_FIELDS) instead of the verbose result
         
     Returns:
         Ownership verification results
@@ -208,21 +426,38 @@ async def verify_address_ownership(street_address: str, applicant_name: str):
         ownership_score = 50
     else:
         ownership_score = 20
+    recommendation = _ownership_recommendation(ownership_status, residency_months)
     
-    return {
+    result = {
         "ownership_status": ownership_status,
         "residency_months": residency_months,
         "ownership_verified": ownership_status in ["Owner", "Renter"],
         "ownership_score": ownership_score,
         "stability_rating": "HIGH" if residency_months >= 24 else "MEDIUM" if residency_months >= 12 else "LOW",
-        "recommendation": _get_ownership_recommendation(ownership_status, residency_months)
+        "recommendation": OWNERSHIP_RECOMMENDATIONS[recommendation]
     }
+    if compact:
+        return compact_json({**compact_fields(result, COMPACT_OWNERSHIP_FIELDS), "rec": recommendation})
+    return result
 
 def _validate_zip_code(zip_code: str) -> bool:
     """Validate ZIP code format"""
     zip_pattern = r'^\d{5}(-\d{4})?$'
     return bool(re.match(zip_pattern, zip_code.strip()))
 
+def _validate_zip_codes(zip_codes: List[str]) -> np.ndarray:
+    """Vectorized _validate_zip_code: 12345 or 12345-6789"""
+    if not zip_codes:
+        return np.zeros(0, dtype=bool)
+    stripped = np.char.strip(np.array(zip_codes, dtype=str))
+    lengths = np.char.str_len(stripped)
+    # One character per column; shorter values are padded with empty strings
+    chars = stripped.astype("U10").view("U1").reshape(len(zip_codes), 10)
+    digits = np.char.isdigit(chars)
+    five = digits[:, :5].all(axis=1)
+    plus_four = (chars[:, 5] == "-") & digits[:, 6:].all(axis=1)
+    return ((lengths == 5) & five) | ((lengths == 10) & five & plus_four)
+
 def _generate_mock_address_response(street: str, city: str, state: str, zip_code: str) -> dict:
     """Generate mock response for unknown addresses"""
     # Randomly determine if address is valid (80% chance)
@@ -281,32 +516,32 @@ def _get_risk_level(risk_score: int) -> str:
     else:
         return "HIGH"
 
-def _get_address_recommendation(is_valid: bool, risk_score: int) -> str:
-    """Generate recommendation based on address validation"""
+def _address_recommendation(is_valid: bool, risk_score: int) -> str:
+    """Recommendation code (ADDRESS_RECOMMENDATIONS) based on address validation"""
     if is_valid and risk_score <= 30:
-        return "Address verified successfully. Proceed with application."
+        return "PROCEED"
     elif is_valid and risk_score <= 60:
-        return "Address valid but medium risk. Consider additional verification."
+        return "VERIFY_FURTHER"
     else:
-        return "Address validation failed or high risk. Request additional documentation or reject."
+        return "REQUEST_DOCS_OR_REJECT"
 
-def _get_fraud_recommendation(fraud_score: int, fraud_level: str) -> str:
-    """Generate fraud check recommendation"""
+def _fraud_recommendation(fraud_score: int, fraud_level: str) -> str:
+    """Fraud check recommendation code (FRAUD_RECOMMENDATIONS)"""
     if fraud_level == "LOW":
-        return "Low fraud risk. Proceed with standard verification."
+        return "STANDARD_VERIFICATION"
     elif fraud_level == "MEDIUM":
-        return "Medium fraud risk. Perform additional verification checks."
+        return "ADDITIONAL_VERIFICATION"
     else:
-        return "High fraud risk detected. Reject application or require extensive documentation."
+        return "REJECT_OR_EXTENSIVE_DOCS"
 
-def _get_ownership_recommendation(ownership_status: str, residency_months: int) -> str:
-    """Generate ownership verification recommendation"""
+def _ownership_recommendation(ownership_status: str, residency_months: int) -> str:
+    """Ownership verification recommendation code (OWNERSHIP_RECOMMENDATIONS)"""
     if ownership_status == "Owner":
-        return "Property ownership verified. Excellent stability indicator."
+        return "OWNERSHIP_VERIFIED"
     elif ownership_status == "Renter" and residency_months >= 12:
-        return "Stable rental history verified. Good residency indicator."
+        return "STABLE_RENTAL"
     else:
-        return "Limited residency verification. Consider additional stability checks."
+        return "VERIFY_STABILITY"
 
 if __name__ == "__main__":
     print("Starting Address Validator MCP Server on port 8000...")
@@ -1,9 +1,9 @@
 """
 MCP Server for Image Processing
 This server handles image processing tasks including:
-1. Loading images from S3 using image_id
-2. Encoding images to base64
-3. Extracting information from images using LLM
+1. Loading images (binary JPEG objects) from S3 using image_id
+2. Encoding images to base64 when building the vision request
+3. Extracting information and validating authenticity with one LLM vision call
 4. Returning structured JSON responses
 """
 
@@ -19,10 +19,21 @@ import os
 from langchain_openai import ChatOpenAI
 import json
 import secrets
+import asyncio
+import hashlib
+import time
+import httpx
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Dict, Optional, Tuple
 
 
 from mcp.server.fastmcp import FastMCP
-from utils import load_object, load_image_bytes, encode_image_from_bytes
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from admission import admission, estimate_tokens, set_lane
+from cache import AsyncLRUCache, DiskCache
+from structured_output import JSONObjectScanner, schema_violations
+from utils import aload_image, to_base64, fit_image_for_vision, VISION_TOKEN_BUDGET, VISION_GRAYSCALE
 
 # Initialize MCP server
 mcp = FastMCP("Image-Processor", host="0.0.0.0", port=8000)
@@ -36,55 +47,128 @@ model_key = os.environ.get("GATEWAY_MODEL_ACCESS_KEY", "")
 api_gateway_url = os.environ.get("GATEWAY_URL", "")
 
 # Vision model configuration
-vision_model = "bedrock/claude-4.5-sonnet"
-client = openai.OpenAI(
+vision_model = os.getenv("VISION_MODEL", "bedrock/claude-4.5-sonnet")
+VISION_MAX_CONCURRENCY = int(os.getenv("VISION_MAX_CONCURRENCY", "8"))
+VISION_TIMEOUT_SECONDS = float(os.getenv("VISION_TIMEOUT_SECONDS", "300"))
+# Streamed analyses stop at this deadline and return whatever parsed so far
+VISION_STREAM_TIMEOUT_SECONDS = float(os.getenv("VISION_STREAM_TIMEOUT_SECONDS", "120"))
+VISION_MAX_TOKENS = int(os.getenv("VISION_MAX_TOKENS", "8000"))
+
+# Async client so 10-30s vision calls don't block the event loop; the HTTP pool
+# keeps one warm connection per allowed in-flight request
+client = openai.AsyncOpenAI(
     api_key=model_key,            
-    base_url=api_gateway_url 
+    base_url=api_gateway_url,
+    timeout=VISION_TIMEOUT_SECONDS,
+    # 429s are retried by the admission controller, which pauses the model's whole budget
+    max_retries=0,
+    http_client=openai.DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=VISION_MAX_CONCURRENCY * 2,
+            max_keepalive_connections=VISION_MAX_CONCURRENCY,
+            keepalive_expiry=60,
+        ),
+        timeout=httpx.Timeout(VISION_TIMEOUT_SECONDS, connect=10.0),
+    ),
 )
 
+# Bound in-flight vision requests; queue wait is tracked so /stats shows
+# whether VISION_MAX_CONCURRENCY is the bottleneck
+vision_semaphore = asyncio.Semaphore(VISION_MAX_CONCURRENCY)
+vision_stats = {
+    "max_concurrency": VISION_MAX_CONCURRENCY,
+    "in_flight": 0,
+    "waiting": 0,
+    "requests": 0,
+    "queue_wait_total_ms": 0.0,
+    "queue_wait_max_ms": 0.0,
+}
 
 
+@asynccontextmanager
+async def vision_slot():
+    """Wait for a vision request slot, recording the queue wait"""
+    vision_stats["waiting"] += 1
+    start = time.perf_counter()
+    try:
+        await vision_semaphore.acquire()
+    finally:
+        vision_stats["waiting"] -= 1
+    wait_ms = (time.perf_counter() - start) * 1000
+    vision_stats["requests"] += 1
+    vision_stats["queue_wait_total_ms"] += wait_ms
+    vision_stats["queue_wait_max_ms"] = max(vision_stats["queue_wait_max_ms"], wait_ms)
+    vision_stats["in_flight"] += 1
+    try:
+        yield wait_ms
+    finally:
+        vision_stats["in_flight"] -= 1
+        vision_semaphore.release()
 
-
-@mcp.tool(
-    name="extract_credit_application_data",
-    description="Extract credit application data from an image. Takes an image_id parameter and returns structured JSON with applicant information including name, email, income, employer, address, and loan amount."
+# Vision-ready image bytes and metadata shared by all tools: one S3 fetch and one
+# resize per image_id, even when the agent calls several tools for it concurrently
+image_cache = AsyncLRUCache(
+    "image_cache",
+    sizeof=lambda image: len(image[0]),
+    max_bytes=int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    ttl_seconds=float(os.getenv("IMAGE_CACHE_TTL_SECONDS", "900")),
 )
-async def extract_credit_application_data(image_id: str) -> str:
+
+
+@mcp.custom_route("/stats", methods=["GET"])
+async def stats(request: Request) -> JSONResponse:
+    """Cache and concurrency counters for this server"""
+    vision = dict(vision_stats)
+    vision["queue_wait_avg_ms"] = round(vision["queue_wait_total_ms"] / vision["requests"], 2) if vision["requests"] else 0.0
+    return JSONResponse({
+        "vision": vision,
+        "image_cache": image_cache.stats(),
+        "analysis_cache": analysis_cache.stats(),
+        "result_cache": result_cache.stats() if result_cache is not None else None,
+        "admission": admission.stats(),
+    })
+
+
+async def load_image_for_vision(image_id: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
     """
-    Extract credit application data from image stored in S3
+    Load an image (cached by image_id) fitted to the per-call vision token budget
     
     Args:
         image_id: Unique identifier for the image in S3
         
     Returns:
-        str: JSON string containing extracted credit application data
+        tuple: (JPEG bytes ready for the vision request, metadata), None if not found
     """
-    logger.info("**************** Extract Credit Application Data Tool ****************")
+    return await image_cache.get_or_load(image_id, lambda: _fetch_image_for_vision(image_id))
+
+
+async def _fetch_image_for_vision(image_id: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+    """
+    Load an image from S3 and fit it to the per-call vision token budget
     
-    try:
-        # Load image from S3 using the base64 content method (for backward compatibility)
-        base64_image = load_object(image_id)
-        
-        if not base64_image:
-            # Try loading as image bytes if base64 method fails
-            image_bytes = load_image_bytes(image_id)
-            if image_bytes:
-                base64_image = encode_image_from_bytes(image_bytes)
-            else:
-                return json.dumps({
-                    "error": "Image not found",
-                    "image_id": image_id,
-                    "status": "failed"
-                })
-        
-        # System prompt for credit application data extraction
-        extraction_system_prompt = """You are an expert in extracting credit application data from images.
-        
-        IMPORTANT: Today's date is 1st September 2024. Use this as your reference when evaluating dates on documents.
+    Args:
+        image_id: Unique identifier for the image in S3
         
-        Extract ONLY the following data from this credit application image and return it in JSON format:
-        {
+    Returns:
+        tuple: (JPEG bytes ready for the vision request, metadata), None if not found
+    """
+    # Load JPEG bytes from S3 (legacy base64 objects are decoded transparently)
+    image = await aload_image(image_id)
+    if image is None:
+        return None
+    jpeg_bytes, metadata = image
+    
+    # Older objects may be larger than the budget - resize off the event loop
+    return await asyncio.to_thread(
+        fit_image_for_vision, jpeg_bytes, metadata, VISION_TOKEN_BUDGET, VISION_GRAYSCALE, vision_model
+    )
+
+
+
+
+
+# Prompt sections shared by the combined analysis
+extraction_schema = """{
             "name": "full name of applicant",
             "email": "email address", 
             "income": annual_income_as_number,
@@ -98,202 +182,352 @@ async def extract_credit_application_data(image_id: str) -> str:
             "loan_amount": loan_amount_as_number,
             "loan_purpose": "purpose of loan",
             "ssn_last_4": "last 4 digits of SSN if visible"
+        }"""
+
+authenticity_schema = """{
+            "document_quality": "excellent|good|fair|poor",
+            "completeness_score": score_0_to_100,
+            "required_fields_present": ["list", "of", "present", "fields"],
+            "missing_fields": ["list", "of", "missing", "fields"],
+            "fraud_indicators": ["list", "of", "potential", "fraud", "signs"],
+            "authenticity_score": score_0_to_100,
+            "recommendation": "ACCEPT|REVIEW|REJECT",
+            "notes": "additional observations"
+        }"""
+
+# Expected types for the combined analysis (null is accepted for any field)
+analysis_schema = {
+    "extraction": {
+        "name": str, "email": str, "income": (int, float), "employer": str, "job_title": str,
+        "employment_years": (int, float), "address": str, "city": str, "state": str, "zip": (str, int),
+        "loan_amount": (int, float), "loan_purpose": str, "ssn_last_4": (str, int),
+    },
+    "authenticity": {
+        "document_quality": str, "completeness_score": (int, float), "required_fields_present": list,
+        "missing_fields": list, "fraud_indicators": list, "authenticity_score": (int, float),
+        "recommendation": str, "notes": str,
+    },
+}
+
+# System prompt for single-pass extraction and authenticity validation
+analysis_system_prompt = """You are an expert in extracting credit application data from images and in document authenticity validation for credit applications.
+        
+        IMPORTANT: Today's date is 1st September 2024. Use this as your reference when evaluating dates on documents. Any dates before today are in the past and should not be flagged as future dates.
+        
+        Analyze this credit application image once and return a single JSON object with two sections:
+        {
+        "extraction": """ + extraction_schema + """,
+        "authenticity": """ + authenticity_schema + """
         }
         
-        Important instructions:
-        - Return ONLY valid JSON, no other text
+        For "extraction":
         - Use null for missing fields
         - Convert numeric values to numbers, not strings
         - Be precise and accurate
+        
+        For "authenticity", look for:
+        - Document clarity and quality
+        - Presence of required fields (name, income, employer, address, etc.)
+        - Signs of tampering or alteration
+        - Consistency in fonts and formatting
+        - Logical data relationships
+        - Do NOT flag dates before September 1, 2024 as future dates
+        
+        Return ONLY valid JSON, no other text.
         """
+
+analysis_user_prompt = "Extract all credit application data from this image and validate the authenticity and quality of the document. Return as JSON."
+
+# Combined analysis per image_id: the extraction and authenticity tools are
+# served from one vision call instead of each sending the image to the model
+analysis_cache = AsyncLRUCache(
+    "analysis_cache",
+    max_entries=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "1024")),
+    ttl_seconds=float(os.getenv("IMAGE_CACHE_TTL_SECONDS", "900")),
+)
+
+
+# Persistent results keyed by document content rather than the random image_id,
+# so resubmitted scans and ops retries return without a model call. The prompt
+# version changes whenever the prompts do, invalidating older results.
+PROMPT_VERSION = hashlib.sha256((analysis_system_prompt + analysis_user_prompt).encode("utf-8")).hexdigest()[:12]
+VISION_RESULT_CACHE_DIR = os.getenv("VISION_RESULT_CACHE_DIR", "/tmp/loan-buddy-vision-cache")
+result_cache = None
+if VISION_RESULT_CACHE_DIR:
+    result_cache = DiskCache(
+        "result_cache",
+        VISION_RESULT_CACHE_DIR,
+        max_bytes=int(os.getenv("VISION_RESULT_CACHE_MAX_BYTES", str(512 * 1024 * 1024))),
+    )
+
+
+class AnalysisError(Exception):
+    """Raised when a document cannot be analyzed; never cached"""
+
+    def __init__(self, message: str, raw_response: Optional[str] = None):
+        super().__init__(message)
+        self.raw_response = raw_response
+
+
+async def analyze_document(image_id: str, force_refresh: bool = False) -> dict:
+    """
+    Extract application data and validate authenticity in one vision call
+    (cached by image_id in memory and by document content on disk)
+    
+    Args:
+        image_id: Unique identifier for the image in S3
+        force_refresh: Ignore cached results and re-run the vision model
         
-        user_prompt = "Extract all credit application data from this image and return as JSON."
+    Returns:
+        dict: {"extraction": {...}, "authenticity": {...}}
+    """
+    if force_refresh:
+        analysis_cache.invalidate(image_id)
+    analysis = await analysis_cache.get_or_load(image_id, lambda: _run_analysis(image_id, force_refresh))
+    if analysis.get("partial") or analysis.get("schema_violations"):
+        # Surface partial or malformed results, but let the next call retry
+        analysis_cache.invalidate(image_id)
+    return analysis
+
+
+async def _run_analysis(image_id: str, force_refresh: bool = False) -> dict:
+    image = await load_image_for_vision(image_id)
+    if image is None:
+        raise AnalysisError("Image not found")
+    jpeg_bytes, metadata = image
+    
+    content_key = f"{hashlib.sha256(jpeg_bytes).hexdigest()}:{PROMPT_VERSION}:{vision_model}"
+    if result_cache is not None and not force_refresh:
+        cached = await asyncio.to_thread(result_cache.get, content_key)
+        if cached is not None:
+            logger.info(f"Vision result cache hit for {image_id}")
+            return cached
+    
+    # Make streaming API call to vision model
+    analysis, partial = await _stream_analysis(image_id, jpeg_bytes, metadata)
+    
+    if analysis is None:
+        raise AnalysisError("Could not extract valid JSON from image")
+    
+    complete_sections = all(isinstance(analysis.get(name), dict) for name in ("extraction", "authenticity"))
+    if not complete_sections and not partial:
+        raise AnalysisError("Could not extract valid JSON from image", json.dumps(analysis))
+    
+    if partial:
+        analysis["partial"] = True
+        return analysis
+    # Fields missing or of the wrong type are reported with the result and never cached
+    violations = schema_violations(analysis, analysis_schema)
+    if violations:
+        logger.warning(f"Document analysis for {image_id} does not match schema: {violations}")
+        analysis["schema_violations"] = violations
+    elif result_cache is not None:
+        await asyncio.to_thread(result_cache.put, content_key, analysis)
+    return analysis
+
+
+async def _stream_analysis(image_id: str, jpeg_bytes: bytes, metadata: Dict[str, str]) -> Tuple[Optional[dict], bool]:
+    """
+    Stream the vision completion through an incremental JSON parser, closing the
+    stream as soon as the top-level object is complete
+    
+    A vision slot is only taken once the call is admitted and is held for the
+    request and its stream, so callers waiting on the token budget or a 429
+    pause don't keep slots from admitted callers.
+    
+    Args:
+        image_id: Image identifier, for logging
+        jpeg_bytes: Vision-ready JPEG bytes
+        metadata: Image metadata (dimensions, estimated tokens), logged per vision call
         
-        # Make API call to vision model
-        response = client.chat.completions.create(
-            model=vision_model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": extraction_system_prompt,
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": user_prompt,
-                        },                        
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            }
+    Returns:
+        tuple: (parsed object or None, True if the object is partial because of a timeout)
+    """
+    scanner = JSONObjectScanner()
+    start = time.perf_counter()
+    # Image tokens are bounded by the per-call budget; output is reconciled below
+    estimated_tokens = (VISION_TOKEN_BUDGET + estimate_tokens(analysis_system_prompt + analysis_user_prompt)
+                        + min(VISION_MAX_TOKENS, 2000))
+    
+    async def open_stream():
+        """One admitted attempt: take a slot and start the stream (the slot is released on failure)"""
+        slot = AsyncExitStack()
+        queue_wait_ms = await slot.enter_async_context(vision_slot())
+        try:
+            return await _create_stream(jpeg_bytes), slot, queue_wait_ms
+        except BaseException:
+            await slot.aclose()
+            raise
+    
+    stream, slot, queue_wait_ms = await admission.call(vision_model, open_stream, estimated_tokens)
+    # Logged per vision call; image loads are cached and shared, so they undercount requests
+    logger.info(
+        f"Vision request for {image_id}: {metadata['width']}x{metadata['height']}, "
+        f"payload {len(jpeg_bytes) * 4 // 3} bytes (base64), ~{metadata['estimated-tokens']} tokens, "
+        f"waited {queue_wait_ms:.0f} ms for a slot"
+    )
+    
+    timed_out = False
+    async with slot:
+        try:
+            async with asyncio.timeout(VISION_STREAM_TIMEOUT_SECONDS):
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if scanner.feed(chunk.choices[0].delta.content):
+                            break
+        except TimeoutError:
+            timed_out = True
+        finally:
+            # Stop generation early: anything after the closing brace is wasted tokens
+            await stream.close()
+    
+    # The stream is closed early, so usage is not reported; count the output we received
+    admission.budget(vision_model).reconcile(
+        estimated_tokens, estimated_tokens - min(VISION_MAX_TOKENS, 2000) + estimate_tokens(scanner.text)
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(
+        f"Vision stream {'complete' if scanner.complete else 'incomplete'} after {elapsed_ms:.0f} ms, "
+        f"{len(scanner.text)} chars of JSON{' (timed out)' if timed_out else ''}"
+    )
+    if scanner.complete:
+        return scanner.result(), False
+    return scanner.partial_object(), True
+
+
+def _create_stream(jpeg_bytes: bytes):
+    """Streaming vision completion request for the combined analysis"""
+    return client.chat.completions.create(
+        model=vision_model,
+        messages=[
+            {
+                "role": "system",
+                "content": analysis_system_prompt,
+            },
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": analysis_user_prompt,
+                    },                        
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:image/jpeg;base64,{to_base64(jpeg_bytes)}"
                         }
-                    ]
-                }
-            ],
-            max_tokens=8000,
-            temperature=0.1
-        )    
-
-        extracted_content = response.choices[0].message.content
-        logger.info(f"Extracted credit application data: {extracted_content}")
+                    }
+                ]
+            }
+        ],
+        max_tokens=VISION_MAX_TOKENS,
+        temperature=0.1,
+        stream=True,
+    )
+
+
+def _section(analysis: dict, name: str) -> str:
+    """JSON for one section of the combined analysis"""
+    section = analysis.get(name)
+    if not isinstance(section, dict):
+        raise AnalysisError(f"Document analysis did not return '{name}' before the model timed out")
+    if analysis.get("partial"):
+        section = {**section, "partial": True}
+    violations = [violation for violation in analysis.get("schema_violations", []) if violation.startswith(f"{name}.")]
+    if violations:
+        section = {**section, "schema_violations": violations}
+    return json.dumps(section)
+
+
+def _analysis_error(image_id: str, error: Exception) -> str:
+    result = {
+        "error": str(error),
+        "image_id": image_id,
+        "status": "failed"
+    }
+    if getattr(error, "raw_response", None):
+        result["raw_response"] = error.raw_response
+    return json.dumps(result)
+
+
+@mcp.tool(
+    name="analyze_credit_document",
+    description="Extract credit application data AND validate document authenticity in a single pass. Takes an image_id parameter and returns JSON with an 'extraction' section (name, email, income, employer, address, loan amount, ...) and an 'authenticity' section (quality, completeness, fraud indicators, recommendation). Prefer this over calling the two separate tools. Set force_refresh=true only to force re-analysis."
+)
+async def analyze_credit_document(image_id: str, force_refresh: bool = False, lane: str = "interactive") -> str:
+    """
+    Extract credit application data and validate document authenticity with one vision call
+    
+    Args:
+        image_id: Unique identifier for the image in S3
+        force_refresh: Re-run the vision model even if a cached result exists
+        lane: Admission lane for the vision call ("interactive" or "batch"), set by the agent
         
-        # Validate JSON response
-        try:
-            # Try to parse as JSON to validate
-            parsed_data = json.loads(extracted_content)
-            return extracted_content
-        except json.JSONDecodeError:
-            # If not valid JSON, try to extract JSON from the response
-            import re
-            json_match = re.search(r'\{.*\}', extracted_content, re.DOTALL)
-            if json_match:
-                json_content = json_match.group()
-                # Validate the extracted JSON
-                json.loads(json_content)
-                return json_content
-            else:
-                # Return error if no valid JSON found
-                return json.dumps({
-                    "error": "Could not extract valid JSON from image",
-                    "raw_response": extracted_content,
-                    "image_id": image_id,
-                    "status": "failed"
-                })
+    Returns:
+        str: JSON string with "extraction" and "authenticity" sections
+    """
+    logger.info("**************** Analyze Credit Document Tool ****************")
+    set_lane(lane)
+    
+    try:
+        return json.dumps(await analyze_document(image_id, force_refresh))
+    except Exception as e:
+        logger.error(f"Error analyzing credit document: {e}")
+        return _analysis_error(image_id, e)
+
+
+@mcp.tool(
+    name="extract_credit_application_data",
+    description="Extract credit application data from an image. Takes an image_id parameter and returns structured JSON with applicant information including name, email, income, employer, address, and loan amount."
+)
+async def extract_credit_application_data(image_id: str, force_refresh: bool = False, lane: str = "interactive") -> str:
+    """
+    Extract credit application data from image stored in S3
+    (served from the combined document analysis)
+    
+    Args:
+        image_id: Unique identifier for the image in S3
+        force_refresh: Re-run the vision model even if a cached result exists
+        lane: Admission lane for the vision call ("interactive" or "batch"), set by the agent
         
+    Returns:
+        str: JSON string containing extracted credit application data
+    """
+    logger.info("**************** Extract Credit Application Data Tool ****************")
+    set_lane(lane)
+    
+    try:
+        return _section(await analyze_document(image_id, force_refresh), "extraction")
     except Exception as e:
         logger.error(f"Error extracting credit application data: {e}")
-        return json.dumps({
-            "error": str(e),
-            "image_id": image_id,
-            "status": "failed"
-        })
+        return _analysis_error(image_id, e)
+
 
 @mcp.tool(
     name="validate_document_authenticity",
     description="Validate the authenticity of a credit application document. Takes an image_id parameter and returns validation results including document quality, completeness, and potential fraud indicators."
 )
-async def validate_document_authenticity(image_id: str) -> str:
+async def validate_document_authenticity(image_id: str, force_refresh: bool = False, lane: str = "interactive") -> str:
     """
     Validate document authenticity and quality
+    (served from the combined document analysis)
     
     Args:
         image_id: Unique identifier for the image in S3
+        force_refresh: Re-run the vision model even if a cached result exists
+        lane: Admission lane for the vision call ("interactive" or "batch"), set by the agent
         
     Returns:
         str: JSON string containing document validation results
     """
     logger.info("**************** Validate Document Authenticity Tool ****************")
+    set_lane(lane)
     
     try:
-        # Load image from S3
-        base64_image = load_object(image_id)
-        
-        if not base64_image:
-            # Try loading as image bytes if base64 method fails
-            image_bytes = load_image_bytes(image_id)
-            if image_bytes:
-                base64_image = encode_image_from_bytes(image_bytes)
-            else:
-                return json.dumps({
-                    "error": "Image not found",
-                    "image_id": image_id,
-                    "status": "failed"
-                })
-        
-        # System prompt for document validation
-        validation_system_prompt = """You are an expert in document authenticity validation for credit applications.
-        
-        IMPORTANT: Today's date is 1st September 2024. Use this as your reference when evaluating dates on documents. Any dates before today are in the past and should not be flagged as future dates.
-        
-        Analyze this credit application document and return validation results in JSON format:
-        {
-            "document_quality": "excellent|good|fair|poor",
-            "completeness_score": score_0_to_100,
-            "required_fields_present": ["list", "of", "present", "fields"],
-            "missing_fields": ["list", "of", "missing", "fields"],
-            "fraud_indicators": ["list", "of", "potential", "fraud", "signs"],
-            "authenticity_score": score_0_to_100,
-            "recommendation": "ACCEPT|REVIEW|REJECT",
-            "notes": "additional observations"
-        }
-        
-        Look for:
-        - Document clarity and quality
-        - Presence of required fields (name, income, employer, address, etc.)
-        - Signs of tampering or alteration
-        - Consistency in fonts and formatting
-        - Logical data relationships
-        - Do NOT flag dates before September 1, 2024 as future dates
-        
-        Return ONLY valid JSON, no other text.
-        """
-        
-        user_prompt = "Validate the authenticity and quality of this credit application document."
-        
-        # Make API call to vision model
-        response = client.chat.completions.create(
-            model=vision_model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": validation_system_prompt,
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": user_prompt,
-                        },                        
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=8000,
-            temperature=0.1
-        )    
-
-        validation_content = response.choices[0].message.content
-        logger.info(f"Document validation results: {validation_content}")
-        
-        # Validate JSON response
-        try:
-            # Try to parse as JSON to validate
-            parsed_data = json.loads(validation_content)
-            return validation_content
-        except json.JSONDecodeError:
-            # If not valid JSON, try to extract JSON from the response
-            import re
-            json_match = re.search(r'\{.*\}', validation_content, re.DOTALL)
-            if json_match:
-                json_content = json_match.group()
-                # Validate the extracted JSON
-                json.loads(json_content)
-                return json_content
-            else:
-                # Return error if no valid JSON found
-                return json.dumps({
-                    "error": "Could not extract valid JSON from validation",
-                    "raw_response": validation_content,
-                    "image_id": image_id,
-                    "status": "failed"
-                })
-        
+        return _section(await analyze_document(image_id, force_refresh), "authenticity")
     except Exception as e:
         logger.error(f"Error validating document authenticity: {e}")
-        return json.dumps({
-            "error": str(e),
-            "image_id": image_id,
-            "status": "failed"
-        })
+        return _analysis_error(image_id, e)
 
 if __name__ == "__main__":
     print("Starting Image Processor MCP Server on port 8000...")
@@ -1,12 +1,69 @@
 # Income and Employment Validation MCP Server
 # https://modelcontextprotocol.io/quickstart/server
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
+import asyncio
+import logging
+import os
 import random
 from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from cache import ToolResultCache
+from compact import compact_fields, compact_json
+from employer_match import (
+    EMPLOYER_MATCH_MIN_CONFIDENCE, JOB_TITLE_MATCH_MIN_CONFIDENCE, employer_confidence, job_title_confidence,
+)
+from employment_store import EmploymentStore, MemoryEmploymentStore, SQLiteEmploymentStore
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
 
 mcp = FastMCP("income_employment_validation_service", host="0.0.0.0", port=8000)
 
+# Verification extract imported with `python employment_store.py import <csv> <db>`;
+# without one, the mock records below are served from memory
+EMPLOYMENT_DB_PATH = os.getenv("EMPLOYMENT_DB_PATH", "")
+# Batch validation: applicants per tool call and per streamed chunk
+BATCH_MAX_APPLICANTS = int(os.getenv("INCOME_BATCH_MAX_APPLICANTS", "10000"))
+BATCH_CHUNK_SIZE = int(os.getenv("INCOME_BATCH_CHUNK_SIZE", "1000"))
+
+EMPLOYMENT_RECOMMENDATIONS = {
+    "PROCEED": "Employment and income verified successfully. Proceed with application.",
+    "REQUEST_PAY_STUBS": "Employment verified but income discrepancy found. Request recent pay stubs.",
+    "REQUEST_DOCS_OR_REJECT": "Employment verification failed. Request additional documentation or reject application.",
+    "REQUEST_EMPLOYMENT_DOCS": "Request additional employment documentation",
+    "CORRECT_INPUT": "Reported income or employment years missing or not a number. Correct the application data and resubmit.",
+}
+STABILITY_RECOMMENDATIONS = {
+    "LOW_RISK": "Strong employment stability. Low risk for income disruption.",
+    "VERIFY_INCOME": "Moderate employment stability. Consider additional income verification.",
+    "HIGH_RISK": "Unstable employment history. High risk - consider rejection or require co-signer.",
+}
+
+# Compact results (compact=True): verbose field -> short key. The verified employer, title and
+# years are summarized by the match fields; employment status is reported by the stability check
+COMPACT_INCOME_FIELDS = {
+    "validation_status": "status",
+    "employment_verified": "emp_ok",
+    "income_verified": "inc_ok",
+    "employment_years_verified": "years_ok",
+    "income_variance_percentage": "inc_var_pct",
+    "employer_match_confidence": "employer_match",
+    "job_title_match_confidence": "title_match",
+    "risk_level": "risk",
+}
+COMPACT_STABILITY_FIELDS = {
+    "stability_status": "status",
+    "stability_score": "score",
+    "years_employed": "years",
+    "employment_status": "type",
+}
+
 # Mock employment database
 mock_employment_database = {
     "john.doe@email.com": {
@@ -41,13 +98,34 @@ mock_employment_database = {
     }
 }
 
+def _load_employment_store() -> EmploymentStore:
+    """Open the SQLite employment store, or serve the mock database"""
+    if EMPLOYMENT_DB_PATH and os.path.exists(EMPLOYMENT_DB_PATH):
+        return SQLiteEmploymentStore(EMPLOYMENT_DB_PATH)
+    if EMPLOYMENT_DB_PATH:
+        logger.warning(f"No employment database at {EMPLOYMENT_DB_PATH}, using the mock employment database")
+    return MemoryEmploymentStore(mock_employment_database)
+
+employment_store = _load_employment_store()
+
+# Repeated calls with the same arguments (within a run or across retries) are served
+# from memory; the TTL also bounds how long results outlive an employment database reload
+tool_cache = ToolResultCache("income_employment_validation_service")
+
+@mcp.custom_route("/stats", methods=["GET"])
+async def stats(request: Request) -> JSONResponse:
+    """Tool result cache counters for this server"""
+    return JSONResponse({"tool_cache": tool_cache.stats()})
+
 @mcp.tool(description="Validates applicant's income and employment status through external verification")
+@tool_cache.cached(casefold=("applicant_email",))
 async def validate_income_employment(
     applicant_email: str, 
     reported_income: float, 
     reported_employer: str, 
     reported_job_title: str,
-    reported_employment_years: float
+    reported_employment_years: float,
+    compact: bool = False
 ):
     """
     Validates applicant's income and employment status through external verification.
@@ -58,32 +136,41 @@ async def validate_income_employment(
         reported_employer: Employer name reported by applicant
         reported_job_title: Job title reported by applicant
         reported_employment_years: Years of employment reported by applicant
+        compact: Return short keys and codes (COMPACT_INCOME_FIELDS) instead of the verbose result
     
     Returns:
         Validation result with employment and income verification status
     """
     
-    # Check if applicant exists in mock database
-    if applicant_email not in mock_employment_database:
+    # Check if applicant exists in the employment records
+    applicant_data = employment_store.get(applicant_email)
+    if applicant_data is None:
+        if compact:
+            return compact_json({"status": "FAILED", "emp_ok": False, "inc_ok": False, "reason": "NOT_FOUND",
+                                 "rec": "REQUEST_EMPLOYMENT_DOCS"})
         return {
             "validation_status": "FAILED",
             "employment_verified": False,
             "income_verified": False,
             "reason": "Applicant not found in employment verification system",
-            "recommendation": "Request additional employment documentation"
+            "recommendation": EMPLOYMENT_RECOMMENDATIONS["REQUEST_EMPLOYMENT_DOCS"]
         }
     
-    applicant_data = mock_employment_database[applicant_email]
-    
-    # Verify employment details
+    # Verify employment details (tolerates punctuation, legal suffixes and abbreviations)
+    employer_match_confidence = employer_confidence(reported_employer, applicant_data["employer"])
+    job_title_match_confidence = job_title_confidence(reported_job_title, applicant_data["job_title"])
     employment_match = (
-        applicant_data["employer"].lower() == reported_employer.lower() and
-        applicant_data["job_title"].lower() == reported_job_title.lower()
+        employer_match_confidence >= EMPLOYER_MATCH_MIN_CONFIDENCE and
+        job_title_match_confidence >= JOB_TITLE_MATCH_MIN_CONFIDENCE
     )
     
     # Verify income (allow 10% variance)
-    income_variance = abs(applicant_data["annual_income"] - reported_income) / applicant_data["annual_income"]
-    income_match = income_variance <= 0.10
+    # A record without a positive income on file cannot verify the reported income
+    if applicant_data["annual_income"] > 0:
+        income_variance = abs(applicant_data["annual_income"] - reported_income) / applicant_data["annual_income"]
+    else:
+        income_variance = None
+    income_match = income_variance is not None and income_variance <= 0.10
     
     # Verify employment duration (allow 6 months variance)
     years_variance = abs(applicant_data["years_employed"] - reported_employment_years)
@@ -99,8 +186,9 @@ async def validate_income_employment(
     else:
         validation_status = "FAILED"
         risk_level = "HIGH"
+    recommendation = _employment_recommendation(validation_status, risk_level)
     
-    return {
+    result = {
         "validation_status": validation_status,
         "employment_verified": employment_match and applicant_data["employment_verified"],
         "income_verified": income_match and applicant_data["income_verified"],
@@ -108,33 +196,170 @@ async def validate_income_employment(
         "verified_income": applicant_data["annual_income"],
         "verified_employer": applicant_data["employer"],
         "verified_job_title": applicant_data["job_title"],
+        "employer_match_confidence": round(employer_match_confidence, 3),
+        "job_title_match_confidence": round(job_title_match_confidence, 3),
         "verified_employment_years": applicant_data["years_employed"],
         "employment_status": applicant_data["employment_status"],
         "risk_level": risk_level,
         "last_verification_date": applicant_data["last_verification_date"],
-        "income_variance_percentage": round(income_variance * 100, 2) if 'income_variance' in locals() else 0,
-        "recommendation": _get_employment_recommendation(validation_status, risk_level)
+        "income_variance_percentage": round(income_variance * 100, 2) if income_variance is not None else None,
+        "recommendation": EMPLOYMENT_RECOMMENDATIONS[recommendation]
+    }
+    if compact:
+        return compact_json({**compact_fields(result, COMPACT_INCOME_FIELDS), "rec": recommendation})
+    return result
+
+@mcp.tool(description="Validates income and employment for a list of applicants in one call (portfolio re-underwriting); returns column-oriented results per chunk")
+@tool_cache.uncached("batch arguments are rarely repeated and results are large")
+async def validate_income_employment_batch(applicants: List[Dict[str, Any]], ctx: Context, chunk_size: int = BATCH_CHUNK_SIZE):
+    """
+    Validates many applicants in one call, classifying each chunk column-wise.
+    
+    Args:
+        applicants: Applicants with applicant_email, reported_income, reported_employer,
+                    reported_job_title and reported_employment_years
+        chunk_size: Rows per chunk; progress is reported after each chunk
+        
+    Returns:
+        Summary counts plus, per chunk, column-oriented results in input order. Rows whose
+        reported income or years are not numbers have status INVALID_INPUT and list them in invalid_fields.
+    """
+    if len(applicants) > BATCH_MAX_APPLICANTS:
+        return {"error": f"At most {BATCH_MAX_APPLICANTS} applicants per call, got {len(applicants)}"}
+    chunk_size = max(1, min(chunk_size, BATCH_MAX_APPLICANTS))
+    
+    chunks = []
+    for offset in range(0, len(applicants), chunk_size):
+        # Store lookups block; keep the event loop free between chunks
+        chunk = await asyncio.to_thread(_validate_income_chunk, applicants[offset:offset + chunk_size])
+        chunks.append({"offset": offset, "count": len(chunk["validation_status"]), "columns": chunk})
+        done = offset + chunks[-1]["count"]
+        await ctx.report_progress(done, len(applicants), f"Validated {done}/{len(applicants)} applicants")
+    
+    statuses = [status for chunk in chunks for status in chunk["columns"]["validation_status"]]
+    found = sum(found for chunk in chunks for found in chunk["columns"]["found"])
+    return {
+        "total": len(applicants),
+        "summary": {
+            "passed": statuses.count("PASSED"),
+            "partial": statuses.count("PARTIAL"),
+            "failed": statuses.count("FAILED"),
+            "invalid_input": statuses.count("INVALID_INPUT"),
+            "not_found": len(applicants) - found,
+        },
+        "chunks": chunks,
+    }
+
+def _validate_income_chunk(applicants: List[Dict[str, Any]]) -> Dict[str, list]:
+    """Look up a chunk of applicants and classify it column-wise (same rules as validate_income_employment)"""
+    records = employment_store.get_many([str(applicant.get("applicant_email") or "") for applicant in applicants])
+    found = np.array([record is not None for record in records], dtype=bool)
+    known = [record or {} for record in records]
+    
+    def reported(field: str) -> np.ndarray:
+        """Numeric column; missing or unparseable values (e.g. "$85,000") are NaN"""
+        values = []
+        for applicant in applicants:
+            try:
+                value = float(applicant.get(field))
+            except (TypeError, ValueError):
+                value = np.nan
+            values.append(value if np.isfinite(value) else np.nan)
+        return np.array(values, dtype=np.float64)
+    
+    reported_income = reported("reported_income")
+    reported_years = reported("reported_employment_years")
+    invalid_fields = [
+        [field for field, invalid in (("reported_income", income), ("reported_employment_years", years)) if invalid]
+        for income, years in zip(np.isnan(reported_income), np.isnan(reported_years))
+    ]
+    invalid_input = np.array([bool(fields) for fields in invalid_fields], dtype=bool)
+    
+    verified_income = np.array([record.get("annual_income", np.nan) for record in known], dtype=np.float64)
+    # As in validate_income_employment, an income on file <= 0 cannot verify anything
+    verified_income = np.where(verified_income > 0, verified_income, np.nan)
+    verified_years = np.array([record.get("years_employed", np.nan) for record in known], dtype=np.float64)
+    employment_on_file = np.array([record.get("employment_verified", False) for record in known], dtype=bool)
+    income_on_file = np.array([record.get("income_verified", False) for record in known], dtype=bool)
+    
+    # Normalization is memoized, so recurring employers and titles are only normalized once
+    employer_match_confidence = np.array([
+        employer_confidence(str(applicant.get("reported_employer") or ""), record.get("employer", ""))
+        for applicant, record in zip(applicants, known)
+    ], dtype=np.float64)
+    job_title_match_confidence = np.array([
+        job_title_confidence(str(applicant.get("reported_job_title") or ""), record.get("job_title", ""))
+        for applicant, record in zip(applicants, known)
+    ], dtype=np.float64)
+    employment_match = found & (employer_match_confidence >= EMPLOYER_MATCH_MIN_CONFIDENCE) & (
+        job_title_match_confidence >= JOB_TITLE_MATCH_MIN_CONFIDENCE
+    )
+    
+    # Income within 10%, employment duration within 6 months
+    with np.errstate(divide="ignore", invalid="ignore"):
+        income_variance = np.abs(verified_income - reported_income) / verified_income
+    income_match = found & (income_variance <= 0.10)
+    years_match = found & (np.abs(verified_years - reported_years) <= 0.5)
+    
+    # Rows with unusable reported numbers are reported as invalid input rather than failed
+    passed = ~invalid_input & employment_match & income_match & years_match & employment_on_file
+    partial = ~invalid_input & ~passed & employment_match & employment_on_file
+    validation_status = np.select([invalid_input, passed, partial], ["INVALID_INPUT", "PASSED", "PARTIAL"], "FAILED")
+    risk_level = np.select([passed, partial], ["LOW", "MEDIUM"], "HIGH")
+    recommendation = np.select(
+        [invalid_input, passed, partial, found],
+        [EMPLOYMENT_RECOMMENDATIONS["CORRECT_INPUT"], EMPLOYMENT_RECOMMENDATIONS["PROCEED"],
+         EMPLOYMENT_RECOMMENDATIONS["REQUEST_PAY_STUBS"], EMPLOYMENT_RECOMMENDATIONS["REQUEST_DOCS_OR_REJECT"]],
+        EMPLOYMENT_RECOMMENDATIONS["REQUEST_EMPLOYMENT_DOCS"],
+    )
+    variance_percentage = np.round(income_variance * 100, 2)
+    
+    return {
+        "applicant_email": [applicant.get("applicant_email") for applicant in applicants],
+        "found": found.tolist(),
+        "validation_status": validation_status.tolist(),
+        "invalid_fields": invalid_fields,
+        "employment_verified": (employment_match & employment_on_file).tolist(),
+        "income_verified": (income_match & income_on_file).tolist(),
+        "employment_years_verified": years_match.tolist(),
+        "verified_income": [record.get("annual_income") for record in known],
+        "verified_employer": [record.get("employer") for record in known],
+        "verified_job_title": [record.get("job_title") for record in known],
+        "employer_match_confidence": np.round(employer_match_confidence, 3).tolist(),
+        "job_title_match_confidence": np.round(job_title_match_confidence, 3).tolist(),
+        "verified_employment_years": [record.get("years_employed") for record in known],
+        "employment_status": [record.get("employment_status") for record in known],
+        "risk_level": risk_level.tolist(),
+        "last_verification_date": [record.get("last_verification_date") for record in known],
+        "income_variance_percentage": [
+            float(value) if np.isfinite(value) else None for value in variance_percentage
+        ],
+        "recommendation": recommendation.tolist(),
     }
 
 @mcp.tool(description="Checks employment stability and income consistency over time")
-async def check_employment_stability(applicant_email: str):
+@tool_cache.cached(casefold=("applicant_email",))
+async def check_employment_stability(applicant_email: str, compact: bool = False):
     """
     Checks employment stability and income consistency for the applicant.
     
     Args:
         applicant_email: Email address of the applicant
+        compact: Return short keys and codes (COMPACT_STABILITY_FIELDS) instead of the verbose result
         
     Returns:
         Employment stability assessment
     """
     
-    if applicant_email not in mock_employment_database:
+    applicant_data = employment_store.get(applicant_email)
+    if applicant_data is None:
+        if compact:
+            return compact_json({"status": "UNKNOWN", "reason": "NO_HISTORY"})
         return {
             "stability_status": "UNKNOWN",
             "reason": "No employment history found"
         }
     
-    applicant_data = mock_employment_database[applicant_email]
     years_employed = applicant_data["years_employed"]
     employment_status = applicant_data["employment_status"]
     
@@ -151,32 +376,36 @@ async def check_employment_stability(applicant_email: str):
     else:
         stability_status = "UNSTABLE"
         stability_score = 40
+    recommendation = _stability_recommendation(stability_status)
     
-    return {
+    result = {
         "stability_status": stability_status,
         "stability_score": stability_score,
         "years_employed": years_employed,
         "employment_status": employment_status,
-        "recommendation": _get_stability_recommendation(stability_status)
+        "recommendation": STABILITY_RECOMMENDATIONS[recommendation]
     }
+    if compact:
+        return compact_json({**compact_fields(result, COMPACT_STABILITY_FIELDS), "rec": recommendation})
+    return result
 
-def _get_employment_recommendation(validation_status: str, risk_level: str) -> str:
-    """Generate recommendation based on validation results"""
+def _employment_recommendation(validation_status: str, risk_level: str) -> str:
+    """Recommendation code (EMPLOYMENT_RECOMMENDATIONS) based on validation results"""
     if validation_status == "PASSED":
-        return "Employment and income verified successfully. Proceed with application."
+        return "PROCEED"
     elif validation_status == "PARTIAL":
-        return "Employment verified but income discrepancy found. Request recent pay stubs."
+        return "REQUEST_PAY_STUBS"
     else:
-        return "Employment verification failed. Request additional documentation or reject application."
+        return "REQUEST_DOCS_OR_REJECT"
 
-def _get_stability_recommendation(stability_status: str) -> str:
-    """Generate recommendation based on stability assessment"""
+def _stability_recommendation(stability_status: str) -> str:
+    """Recommendation code (STABILITY_RECOMMENDATIONS) based on stability assessment"""
     if stability_status == "STABLE":
-        return "Strong employment stability. Low risk for income disruption."
+        return "LOW_RISK"
     elif stability_status == "MODERATE":
-        return "Moderate employment stability. Consider additional income verification."
+        return "VERIFY_INCOME"
     else:
-        return "Unstable employment history. High risk - consider rejection or require co-signer."
+        return "HIGH_RISK"
 
 if __name__ == "__main__":
     print("Starting Income Validator MCP Server on port 8000...")
@@ -0,0 +1,201 @@
+"""
+Long-lived MCP tool registry for the credit underwriting agent.
+
+Keeps one SSE session open per MCP server, loads each server's tools once and
+compiles the ReAct graph only when the tool set changes. A background task per
+server pings its session and reconnects (with backoff) when the server restarts,
+so request handlers only pay for model and tool calls.
+
+The registry is ready once every configured server is connected. While some
+are missing it is degraded: the graph is compiled from the tools available
+(for listing), but get_graph waits for the missing servers and then raises
+ServersUnavailable instead of running the agent without them.
+"""
+
+import asyncio
+import copy
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.tools import StructuredTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+
+logger = logging.getLogger(__name__)
+
+MCP_PING_INTERVAL = float(os.getenv("MCP_PING_INTERVAL", "15"))
+MCP_RECONNECT_MAX_DELAY = float(os.getenv("MCP_RECONNECT_MAX_DELAY", "30"))
+
+
+class ServersUnavailable(Exception):
+    """Raised when configured MCP servers are still not connected"""
+
+    def __init__(self, missing: List[str]):
+        super().__init__(f"MCP servers not connected: {', '.join(missing)}")
+        self.missing = missing
+
+
+def inject_tool_arg(tools: List[Any], arg: str, value: Callable[[], Any]) -> List[Any]:
+    """
+    Tools that pass `arg` = value() on every call; the argument is removed from the
+    schema the model sees. Tools without the argument are returned unchanged.
+
+    Args:
+        tools: MCP tools
+        arg: Tool argument set by the agent rather than the model
+        value: Called per tool call (e.g. to read a contextvar)
+    """
+    wrapped = []
+    for tool in tools:
+        schema = tool.args_schema if isinstance(getattr(tool, "args_schema", None), dict) else None
+        if not isinstance(tool, StructuredTool) or tool.coroutine is None or \
+                arg not in (schema or {}).get("properties", {}):
+            wrapped.append(tool)
+            continue
+        schema = copy.deepcopy(schema)
+        del schema["properties"][arg]
+        if arg in schema.get("required", []):
+            schema["required"].remove(arg)
+
+        def bind(tool):
+            async def call(**kwargs):
+                return await tool.coroutine(**{**kwargs, arg: value()})
+            return call
+
+        wrapped.append(StructuredTool(
+            name=tool.name,
+            description=tool.description,
+            args_schema=schema,
+            coroutine=bind(tool),
+            response_format=tool.response_format,
+            metadata=tool.metadata,
+        ))
+    return wrapped
+
+
+class ToolRegistry:
+    """
+    Holds persistent MCP sessions, their tools and the compiled agent graph.
+
+    Args:
+        connections: MultiServerMCPClient connection mapping (server name -> config)
+        build_graph: Callable that compiles a graph from a list of tools
+    """
+
+    def __init__(self, connections: Dict[str, Dict[str, Any]], build_graph: Callable[[List[Any]], Any]):
+        self.connections = connections
+        self.client = MultiServerMCPClient(connections)
+        self._build_graph = build_graph
+        self._tools: Dict[str, List[Any]] = {}
+        self._refresh_events: Dict[str, asyncio.Event] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._ready = asyncio.Event()
+        self.graph = None
+
+    @property
+    def tools(self) -> List[Any]:
+        """Flat list of tools from every connected server"""
+        return [tool for server_tools in self._tools.values() for tool in server_tools]
+
+    def server_status(self) -> Dict[str, bool]:
+        """Connection state per MCP server"""
+        return {name: name in self._tools for name in self.connections}
+
+    def missing_servers(self) -> List[str]:
+        """Configured servers without a connected session"""
+        return [name for name in self.connections if name not in self._tools]
+
+    def status(self) -> str:
+        """"ready" (every server connected), "degraded" (some) or "unavailable" (none)"""
+        missing = self.missing_servers()
+        if not missing:
+            return "ready"
+        return "degraded" if len(missing) < len(self.connections) else "unavailable"
+
+    def tool_servers(self) -> Dict[str, str]:
+        """Map tool name -> MCP server name"""
+        return {tool.name: name for name, server_tools in self._tools.items() for tool in server_tools}
+
+    async def start(self, wait_timeout: float = 10.0):
+        """Start one supervisor task per server and wait briefly for all of them to connect"""
+        for name in self.connections:
+            self._refresh_events[name] = asyncio.Event()
+            self._tasks.append(asyncio.create_task(self._supervise(name), name=f"mcp-{name}"))
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=wait_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ MCP servers not connected yet: {self.missing_servers()}, "
+                           f"continuing to retry in the background")
+
+    async def stop(self):
+        """Cancel supervisor tasks, closing their sessions"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._tools.clear()
+        self.graph = None
+
+    async def refresh(self):
+        """Ask every connected server to re-list its tools"""
+        for event in self._refresh_events.values():
+            event.set()
+
+    async def get_graph(self, timeout: float = 10.0):
+        """
+        Return the current compiled graph, waiting briefly for servers that are not connected yet
+
+        Raises:
+            ServersUnavailable: If some configured servers are still not connected after `timeout`
+        """
+        if not self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                raise ServersUnavailable(self.missing_servers()) from None
+        return self.graph
+
+    def _publish(self, name: str, server_tools: Optional[List[Any]]):
+        """Update the tools for one server and recompile the graph"""
+        if server_tools is None:
+            self._tools.pop(name, None)
+        else:
+            self._tools[name] = server_tools
+
+        tools = self.tools
+        self.graph = self._build_graph(tools) if tools else None
+        missing = self.missing_servers()
+        if not missing:
+            self._ready.set()
+        else:
+            self._ready.clear()
+        logger.info(f"🔧 Tool registry updated ({name}, {self.status()}): {[tool.name for tool in tools]}")
+        if missing:
+            logger.warning(f"⚠️ Tool registry degraded, waiting for: {missing}")
+
+    async def _supervise(self, name: str):
+        """Keep a session to one server open, reconnecting with exponential backoff"""
+        delay = 1.0
+        refresh_event = self._refresh_events[name]
+        while True:
+            try:
+                async with self.client.session(name) as session:
+                    self._publish(name, await load_mcp_tools(session))
+                    delay = 1.0
+                    while True:
+                        try:
+                            await asyncio.wait_for(refresh_event.wait(), timeout=MCP_PING_INTERVAL)
+                            refresh_event.clear()
+                            self._publish(name, await load_mcp_tools(session))
+                        except asyncio.TimeoutError:
+                            await asyncio.wait_for(session.send_ping(), timeout=MCP_PING_INTERVAL)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"MCP server '{name}' unavailable: {e}. Reconnecting in {delay:.0f}s")
+
+            if name in self._tools:
+                self._publish(name, None)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MCP_RECONNECT_MAX_DELAY)
@@ -0,0 +1,250 @@
+"""
+Object storage backends for the credit validation services.
+
+Every backend exposes blocking methods (put/get/get_object/iter_chunks) and
+async equivalents (aput/aget/aget_object/astream). The async methods run on a
+dedicated thread pool sized to the HTTP connection pool, so S3 round trips
+never block the event loop and concurrency is bounded explicitly instead of
+by the default executor.
+
+Backends:
+    s3     - boto3 with an explicit connection pool and multipart uploads
+             for large scans (S3_ENDPOINT_URL allows MinIO or a moto server)
+    local  - files under LOCAL_STORAGE_DIR, for development and benchmarks
+             without AWS
+"""
+
+import abc
+import asyncio
+import io
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterator, NamedTuple, Optional
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "s3")
+S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME", "loan-buddy-bucket")
+AWS_REGION = os.getenv("AWS_REGION", "us-west-2")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", str(8 * 1024 * 1024)))
+S3_MULTIPART_CHUNKSIZE = int(os.getenv("S3_MULTIPART_CHUNKSIZE", str(8 * 1024 * 1024)))
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", "/tmp/loan-buddy-storage")
+# Simulated per-request round trip for the local backend, to benchmark concurrency realistically
+LOCAL_STORAGE_LATENCY_MS = float(os.getenv("LOCAL_STORAGE_LATENCY_MS", "0"))
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+class StorageError(Exception):
+    """Raised when a storage operation fails"""
+
+
+class ObjectNotFound(StorageError):
+    """Raised when the requested object does not exist"""
+
+
+class StoredObject(NamedTuple):
+    """Object body with its content type and user metadata"""
+    body: bytes
+    content_type: str
+    metadata: Dict[str, str]
+
+
+class ObjectStorage(abc.ABC):
+    """Base class providing async wrappers over a backend's blocking calls"""
+
+    location = ""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+
+    @abc.abstractmethod
+    def put(self, key: str, body: bytes, content_type: str, metadata: Optional[Dict[str, str]] = None) -> None:
+        """Store an object"""
+
+    @abc.abstractmethod
+    def get_object(self, key: str) -> StoredObject:
+        """Object body, content type and metadata (raises ObjectNotFound)"""
+
+    def get(self, key: str) -> bytes:
+        return self.get_object(key).body
+
+    @abc.abstractmethod
+    def iter_chunks(self, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """Object body in chunks of at most chunk_size bytes"""
+
+    def uri(self, key: str) -> str:
+        return f"{self.location}/{key}"
+
+    async def run(self, func, *args):
+        """Run a blocking call on this backend's thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def aput(self, key: str, body: bytes, content_type: str, metadata: Optional[Dict[str, str]] = None) -> None:
+        await self.run(self.put, key, body, content_type, metadata)
+
+    async def aget(self, key: str) -> bytes:
+        return await self.run(self.get, key)
+
+    async def aget_object(self, key: str) -> StoredObject:
+        return await self.run(self.get_object, key)
+
+    async def astream(self, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Yield the object in chunks without holding it in memory"""
+        chunks = await self.run(self.iter_chunks, key, chunk_size)
+        sentinel = object()
+        while True:
+            chunk = await self.run(next, chunks, sentinel)
+            if chunk is sentinel:
+                break
+            yield chunk
+
+
+class S3Storage(ObjectStorage):
+    """S3 backend with an explicit connection pool and multipart uploads"""
+
+    def __init__(
+        self,
+        bucket: str = S3_BUCKET_NAME,
+        region: str = AWS_REGION,
+        endpoint_url: Optional[str] = S3_ENDPOINT_URL,
+        max_pool_connections: int = S3_MAX_POOL_CONNECTIONS,
+        multipart_threshold: int = S3_MULTIPART_THRESHOLD,
+        multipart_chunksize: int = S3_MULTIPART_CHUNKSIZE,
+    ):
+        super().__init__(max_workers=max_pool_connections)
+        self.bucket = bucket
+        self.location = f"s3://{bucket}"
+        self.multipart_threshold = multipart_threshold
+        self.client = boto3.client(
+            "s3",
+            region_name=region,
+            endpoint_url=endpoint_url,
+            config=Config(max_pool_connections=max_pool_connections, retries={"mode": "adaptive"}),
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max(1, max_pool_connections // 4),
+        )
+
+    def put(self, key: str, body: bytes, content_type: str, metadata: Optional[Dict[str, str]] = None) -> None:
+        extra_args = {"ContentType": content_type, "Metadata": metadata or {}}
+        try:
+            if len(body) < self.multipart_threshold:
+                self.client.put_object(Bucket=self.bucket, Key=key, Body=body, **extra_args)
+            else:
+                self.client.upload_fileobj(
+                    io.BytesIO(body), self.bucket, key,
+                    ExtraArgs=extra_args,
+                    Config=self.transfer_config,
+                )
+        except ClientError as e:
+            raise StorageError(str(e)) from e
+
+    def _get(self, key: str) -> dict:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                raise ObjectNotFound(self.uri(key)) from e
+            raise StorageError(str(e)) from e
+
+    def get_object(self, key: str) -> StoredObject:
+        response = self._get(key)
+        return StoredObject(
+            body=response["Body"].read(),
+            content_type=response.get("ContentType", "application/octet-stream"),
+            metadata=response.get("Metadata", {}),
+        )
+
+    def iter_chunks(self, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        return iter(self._get(key)["Body"].iter_chunks(chunk_size))
+
+
+class LocalStorage(ObjectStorage):
+    """Filesystem backend used as a stand-in for S3 in development and benchmarks"""
+
+    def __init__(
+        self,
+        root: str = LOCAL_STORAGE_DIR,
+        max_workers: int = S3_MAX_POOL_CONNECTIONS,
+        latency_ms: float = LOCAL_STORAGE_LATENCY_MS,
+    ):
+        super().__init__(max_workers=max_workers)
+        self.root = root
+        self.latency = latency_ms / 1000
+        self.location = f"file://{root}"
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        if "/" in key or key.startswith("."):
+            raise StorageError(f"Invalid object key: {key}")
+        return os.path.join(self.root, key)
+
+    def _write(self, path: str, body: bytes):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def put(self, key: str, body: bytes, content_type: str, metadata: Optional[Dict[str, str]] = None) -> None:
+        path = self._path(key)
+        # Content type and metadata live in a sidecar file, like S3 object headers
+        sidecar = {"content_type": content_type, "metadata": metadata or {}}
+        self._write(f"{path}.meta", json.dumps(sidecar).encode("utf-8"))
+        self._write(path, body)
+
+    def get_object(self, key: str) -> StoredObject:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+        except FileNotFoundError as e:
+            raise ObjectNotFound(self.uri(key)) from e
+        try:
+            with open(f"{path}.meta", "rb") as f:
+                sidecar = json.loads(f.read())
+        except FileNotFoundError:
+            sidecar = {}
+        return StoredObject(
+            body=body,
+            content_type=sidecar.get("content_type", "application/octet-stream"),
+            metadata=sidecar.get("metadata", {}),
+        )
+
+    def iter_chunks(self, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            f = open(self._path(key), "rb")
+        except FileNotFoundError as e:
+            raise ObjectNotFound(self.uri(key)) from e
+
+        def chunks():
+            with f:
+                while chunk := f.read(chunk_size):
+                    yield chunk
+
+        return chunks()
+
+
+def create_storage(backend: str = STORAGE_BACKEND) -> ObjectStorage:
+    """Create the storage backend selected by STORAGE_BACKEND"""
+    if backend == "local":
+        return LocalStorage()
+    if backend == "s3":
+        return S3Storage()
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,152 @@
+"""
+Incremental parsing of JSON objects from streamed model output.
+
+JSONObjectScanner is fed completion deltas as they arrive. It skips any prose
+before the first '{', tracks nesting (string/escape aware) and reports as
+soon as the top-level object closes and parses, so the caller can stop the
+stream instead of paying for trailing tokens. Balanced text that is not valid
+JSON (e.g. "{see below}") is dropped and scanning resumes at the next '{'
+after its start. If the stream is cut short,
+partial_object() cuts the text after the last complete value, closes the
+open containers and returns what was parsed so far.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class JSONObjectScanner:
+    """Finds the first complete top-level JSON object in a stream of text"""
+
+    def __init__(self):
+        self.complete = False
+        self._result: Optional[Any] = None
+        self._reset()
+
+    def _reset(self):
+        """Forget the current candidate object"""
+        self.buffer: List[str] = []
+        self.started = False
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._length = 0
+        # (position, closers) where the text can be cut and closed validly
+        self._cut_points: List[Tuple[int, str]] = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self.buffer)
+
+    def feed(self, delta: str) -> bool:
+        """
+        Consume a chunk of model output
+
+        Returns:
+            bool: True once the top-level object has closed
+        """
+        if self.complete or not delta:
+            return self.complete
+
+        while delta:
+            delta = self._scan(delta)
+        return self.complete
+
+    def _scan(self, delta: str) -> str:
+        """Scan delta into the current candidate; returns text still to be scanned"""
+        if not self.started:
+            start = delta.find("{")
+            if start < 0:
+                return ""
+            delta = delta[start:]
+            self.started = True
+
+        for index, char in enumerate(delta):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._stack.append("}" if char == "{" else "]")
+                self._cut_points.append((self._length + index + 1, self._closers()))
+            elif char in "}]":
+                self._stack.pop()
+                if not self._stack:
+                    candidate = self.text + delta[:index + 1]
+                    try:
+                        self._result = json.loads(candidate)
+                    except json.JSONDecodeError:
+                        # Not JSON after all: rescan everything after its opening brace
+                        self._reset()
+                        return candidate[1:] + delta[index + 1:]
+                    self.buffer.append(delta[:index + 1])
+                    self._length += index + 1
+                    self.complete = True
+                    return ""
+                self._cut_points.append((self._length + index + 1, self._closers()))
+            elif char == ",":
+                self._cut_points.append((self._length + index, self._closers()))
+
+        self.buffer.append(delta)
+        self._length += len(delta)
+        return ""
+
+    def _closers(self) -> str:
+        return "".join(reversed(self._stack))
+
+    def result(self) -> Optional[Any]:
+        """Parsed object if complete, else None"""
+        return self._result if self.complete else None
+
+    def partial_object(self) -> Optional[Dict[str, Any]]:
+        """
+        Best-effort parse of an incomplete object: cut after the last complete
+        value and close the open containers, falling back to earlier cut points
+        """
+        if not self.started:
+            return None
+        if self.complete:
+            return self.result()
+
+        # Only cut after complete values - a trailing string or number may be truncated
+        text = self.text
+        for position, closers in reversed(self._cut_points):
+            try:
+                parsed = json.loads(text[:position] + closers)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(parsed, dict):
+                return parsed
+        return None
+
+
+def schema_violations(obj: Any, schema: Dict[str, Any], path: str = "") -> List[str]:
+    """
+    Check a parsed object against a simple schema
+
+    Args:
+        obj: Parsed JSON value
+        schema: Mapping of key -> type, tuple of types, or nested schema dict.
+                None is always accepted for leaf fields (missing values are null).
+
+    Returns:
+        list: Human-readable violations, empty if the object matches
+    """
+    if not isinstance(obj, dict):
+        return [f"{path or 'root'}: expected object"]
+
+    violations = []
+    for key, expected in schema.items():
+        field = f"{path}.{key}" if path else key
+        if key not in obj:
+            violations.append(f"{field}: missing")
+        elif isinstance(expected, dict):
+            violations.extend(schema_violations(obj[key], expected, field))
+        elif obj[key] is not None and not isinstance(obj[key], expected):
+            violations.append(f"{field}: unexpected type {type(obj[key]).__name__}")
+    return violations
@@ -0,0 +1,13 @@
+"""
+Unit tests for the credit validation modules.
+
+The services import their modules by file name, so the credit-validation
+directory is put on sys.path. Run from that directory:
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
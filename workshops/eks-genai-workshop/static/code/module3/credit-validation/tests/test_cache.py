@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+
+from cache import AsyncLRUCache
+
+
+def loader(calls, value="value", delay=0.0, fail=False):
+    async def load():
+        calls.append(value)
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("load failed")
+        return value
+
+    return load
+
+
+def test_hits_misses_and_lru_eviction():
+    async def main():
+        cache = AsyncLRUCache("test", max_entries=2)
+        calls = []
+        await cache.get_or_load("a", loader(calls, "A"))
+        await cache.get_or_load("b", loader(calls, "B"))
+        assert await cache.get_or_load("a", loader(calls, "A2")) == "A"
+        await cache.get_or_load("c", loader(calls, "C"))  # evicts b, the least recently used
+        assert cache.get("b") is None
+        assert cache.get("a") == "A"
+        return cache, calls
+
+    cache, calls = asyncio.run(main())
+    assert calls == ["A", "B", "C"]
+    assert cache.counters["hits"] == 1
+    assert cache.counters["evictions"] == 1
+
+
+def test_byte_budget_and_ttl(monkeypatch):
+    cache = AsyncLRUCache("test", max_bytes=10, ttl_seconds=60)
+    cache.put("big", "x" * 11)
+    assert cache.get("big") is None
+    cache.put("a", "x" * 6)
+    cache.put("b", "x" * 6)
+    assert cache.get("a") is None and cache.get("b") == "x" * 6
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert cache.get("b") is None
+    assert cache.counters["expirations"] == 1
+
+
+def test_concurrent_loads_are_coalesced():
+    async def main():
+        cache = AsyncLRUCache("test")
+        calls = []
+        results = await asyncio.gather(*(cache.get_or_load("k", loader(calls, delay=0.01)) for _ in range(3)))
+        return cache, calls, results
+
+    cache, calls, results = asyncio.run(main())
+    assert results == ["value"] * 3
+    assert calls == ["value"]
+    assert cache.counters["coalesced"] == 2
+
+
+def test_failures_and_rejected_values_are_not_cached():
+    async def main():
+        calls = []
+        cache = AsyncLRUCache("test", cacheable=lambda value: value != "mock")
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load("k", loader(calls, fail=True))
+        await cache.get_or_load("k", loader(calls))
+        await cache.get_or_load("m", loader(calls, "mock"))
+        await cache.get_or_load("m", loader(calls, "mock"))
+        return cache, calls
+
+    cache, calls = asyncio.run(main())
+    assert calls == ["value", "value", "mock", "mock"]
+    assert cache.get("k") == "value"
+    assert cache.get("m") is None
+
+
+def test_cancelled_caller_does_not_cancel_the_load_for_other_waiters():
+    async def main():
+        cache = AsyncLRUCache("test")
+        calls = []
+        first = asyncio.create_task(cache.get_or_load("k", loader(calls, delay=0.05)))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(cache.get_or_load("k", loader(calls, delay=0.05)))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result = await second
+        return cache, calls, result, first.cancelled()
+
+    cache, calls, result, cancelled = asyncio.run(main())
+    assert (result, cancelled) == ("value", True)
+    assert calls == ["value"]
+    assert cache.get("k") == "value"
+
+
+def test_load_completes_and_is_cached_when_its_only_caller_is_cancelled():
+    async def main():
+        cache = AsyncLRUCache("test")
+        calls = []
+        caller = asyncio.create_task(cache.get_or_load("k", loader(calls, delay=0.02)))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.sleep(0.05)
+        return cache
+
+    assert asyncio.run(main()).get("k") == "value"
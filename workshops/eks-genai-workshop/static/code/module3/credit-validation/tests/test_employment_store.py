@@ -0,0 +1,103 @@
+import csv
+import os
+import sqlite3
+
+import pytest
+
+from employment_store import (
+    EmploymentStore, MemoryEmploymentStore, SQLiteEmploymentStore, import_employment_records, read_employment_csv,
+)
+
+
+def record(email, **fields):
+    return {
+        "email": email, "employer": "Tech Solutions Inc", "job_title": "Software Engineer",
+        "annual_income": "75000", "employment_status": "Full-time", "years_employed": "3.5",
+        "employment_verified": "true", "income_verified": "false", "last_verification_date": "2024-08-15",
+        **fields,
+    }
+
+
+def import_info(path):
+    connection = sqlite3.connect(path)
+    try:
+        return dict(connection.execute("SELECT key, value FROM import_info").fetchall())
+    finally:
+        connection.close()
+
+
+def test_import_and_lookup(tmp_path):
+    path = os.path.join(tmp_path, "employment.db")
+    count = import_employment_records([record(" John.Doe@Email.com "), record("jane@email.com")], path)
+    assert count == 2
+
+    store = SQLiteEmploymentStore(path)
+    assert len(store) == 2
+    assert store.get("JOHN.DOE@email.com") == {
+        "employer": "Tech Solutions Inc", "job_title": "Software Engineer", "annual_income": 75000.0,
+        "employment_status": "Full-time", "years_employed": 3.5, "employment_verified": True,
+        "income_verified": False, "last_verification_date": "2024-08-15",
+    }
+    assert store.get("unknown@email.com") is None
+    assert [r and r["employer"] for r in store.get_many(["jane@email.com", "x@y.com"])] == ["Tech Solutions Inc", None]
+
+
+def test_duplicate_emails_keep_the_last_record(tmp_path):
+    path = os.path.join(tmp_path, "employment.db")
+    assert import_employment_records([record("a@x.com", employer="Old"), record("A@x.com", employer="New")], path) == 1
+    assert SQLiteEmploymentStore(path).get("a@x.com")["employer"] == "New"
+
+
+def test_rows_without_email_income_or_tenure_are_skipped_and_counted(tmp_path):
+    path = os.path.join(tmp_path, "employment.db")
+    rows = [
+        record("ok@x.com"),
+        record(""),
+        record("blank-income@x.com", annual_income=""),
+        record("bad-income@x.com", annual_income="$85,000"),
+        record("blank-years@x.com", years_employed=None),
+        record("zero@x.com", annual_income="0"),
+    ]
+    assert import_employment_records(rows, path) == 2
+
+    store = SQLiteEmploymentStore(path)
+    assert store.get("blank-income@x.com") is None
+    assert store.get("bad-income@x.com") is None
+    assert store.get("blank-years@x.com") is None
+    # Zero is a value, not a blank; validators treat it as unable to verify income
+    assert store.get("zero@x.com")["annual_income"] == 0.0
+    assert import_info(path)["skipped_rows"] == "4"
+
+
+def test_reimport_replaces_the_database(tmp_path):
+    path = os.path.join(tmp_path, "employment.db")
+    import_employment_records([record("a@x.com")], path)
+    store = SQLiteEmploymentStore(path)
+    assert store.get("a@x.com") is not None
+
+    import_employment_records([record("b@x.com")], path)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".building")]
+    fresh = SQLiteEmploymentStore(path)
+    assert fresh.get("a@x.com") is None
+    assert fresh.get("b@x.com") is not None
+
+
+def test_import_from_csv(tmp_path):
+    csv_path = os.path.join(tmp_path, "employees.csv")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(record("")))
+        writer.writeheader()
+        writer.writerow(record("a@x.com"))
+        writer.writerow(record("b@x.com", annual_income=""))
+    path = os.path.join(tmp_path, "employment.db")
+    assert import_employment_records(read_employment_csv(csv_path), path, source=csv_path) == 1
+    assert import_info(path)["source"] == csv_path
+
+
+def test_memory_store_and_abstract_base():
+    store = MemoryEmploymentStore({"John.Doe@email.com": {"employer": "Tech Solutions Inc"}})
+    assert store.get(" john.doe@EMAIL.com") == {"employer": "Tech Solutions Inc"}
+    assert store.get_many(["john.doe@email.com", "x@y.com"]) == [{"employer": "Tech Solutions Inc"}, None]
+    assert len(store) == 1
+    with pytest.raises(TypeError):
+        EmploymentStore()
@@ -0,0 +1,71 @@
+import json
+import os
+import re
+
+import pytest
+
+from fraud_rules import CompiledRules, FraudRuleEngine
+
+RULES = {
+    "rules": [
+        {"id": "po-box", "type": "literal", "patterns": ["po box", "p.o. box"], "score": 30, "indicator": "PO Box"},
+        {"id": "keyword", "type": "literal", "patterns": ["test", "fake"], "score": 50, "indicator": "Keyword"},
+        {"id": "unit-number", "type": "regex", "patterns": [r"\bapt \d+\b"], "score": 5, "indicator": "Unit"},
+        {"id": "unit-range", "type": "regex", "patterns": [r"\bapt \d+-\d+\b"], "score": 10, "indicator": "Range"},
+        {"id": "box-number", "type": "regex", "patterns": [r"\bbox \d+"], "score": 20, "indicator": "Box"},
+    ]
+}
+
+
+def matched_ids(rules, text):
+    return [match.rule_id for match in rules.match(text)]
+
+
+def test_literal_rules_are_case_insensitive_and_score_once():
+    rules = CompiledRules(RULES)
+    assert matched_ids(rules, "1 Test Rd, Fake Town, PO Box 7") == ["keyword", "po-box", "box-number"]
+    assert matched_ids(rules, "123 Main St") == []
+
+
+def test_regex_rules_matching_at_the_same_position_are_all_reported():
+    rules = CompiledRules(RULES)
+    assert matched_ids(rules, "12 Elm St Apt 12-34") == ["unit-range", "unit-number"]
+    assert matched_ids(rules, "12 Elm St Apt 12") == ["unit-number"]
+
+
+def test_matches_agree_with_checking_each_rule_separately():
+    rules = CompiledRules(RULES)
+    texts = ["apt 1", "apt 1-2 box 3", "p.o. box 9 apt 4-5", "testing apt 77-", "APT 8-9"]
+    for text in texts:
+        expected = {
+            spec["id"] for spec in RULES["rules"] for pattern in spec["patterns"]
+            if (re.search(pattern, text, re.IGNORECASE) if spec["type"] == "regex" else pattern in text.lower())
+        }
+        assert set(matched_ids(rules, text)) == expected, text
+
+
+@pytest.mark.parametrize("config", [
+    {"rules": [{"id": "a", "patterns": ["x"]}, {"id": "a", "patterns": ["y"]}]},
+    {"rules": [{"id": "a", "type": "glob", "patterns": ["x"]}]},
+    {"rules": [{"id": "a", "type": "regex", "patterns": ["(unclosed"]}]},
+])
+def test_invalid_rule_sets_are_rejected(config):
+    with pytest.raises((ValueError, re.error)):
+        CompiledRules(config)
+
+
+def test_engine_reloads_changed_files_and_keeps_rules_on_errors(tmp_path):
+    path = os.path.join(tmp_path, "rules.json")
+    with open(path, "w") as f:
+        json.dump(RULES, f)
+    engine = FraudRuleEngine(path, reload_interval=0)
+    assert matched_ids(engine, "PO Box 1") == ["po-box", "box-number"]
+
+    with open(path, "w") as f:
+        json.dump({"rules": [{"id": "lane", "patterns": ["lane"], "score": 1}]}, f)
+    assert matched_ids(engine, "Memory Lane, PO Box 1") == ["lane"]
+
+    with open(path, "w") as f:
+        f.write("{not json")
+    assert engine.reload() is False
+    assert matched_ids(engine, "Memory Lane") == ["lane"]
@@ -0,0 +1,54 @@
+import asyncio
+import importlib.util
+import os
+
+import pytest
+
+from employment_store import MemoryEmploymentStore
+
+VALIDATOR_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "mcp-income-employment-validator.py")
+
+
+@pytest.fixture
+def validator(monkeypatch):
+    monkeypatch.setenv("EMPLOYMENT_DB_PATH", "")
+    spec = importlib.util.spec_from_file_location("income_employment_validator", VALIDATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def applicant(email, **fields):
+    return {
+        "applicant_email": email, "reported_income": 75000, "reported_employer": "Tech Solutions, Inc.",
+        "reported_job_title": "Software Engineer", "reported_employment_years": 3.5, **fields,
+    }
+
+
+def test_zero_income_on_file_is_not_verifiable_in_single_and_batch(validator):
+    validator.employment_store = MemoryEmploymentStore({
+        "zero@email.com": {**validator.mock_employment_database["john.doe@email.com"], "annual_income": 0.0},
+    })
+    single = asyncio.run(validator.validate_income_employment("zero@email.com", 75000, "Tech Solutions, Inc.",
+                                                              "Software Engineer", 3.5))
+    batch = validator._validate_income_chunk([applicant("zero@email.com")])
+
+    assert single["income_verified"] is False
+    assert single["income_variance_percentage"] is None
+    assert single["validation_status"] == "PARTIAL"
+    assert batch["income_verified"] == [False]
+    assert batch["income_variance_percentage"] == [None]
+    assert batch["validation_status"] == [single["validation_status"]]
+
+
+def test_batch_reports_unparseable_reported_numbers_per_row(validator):
+    chunk = validator._validate_income_chunk([
+        applicant("john.doe@email.com"),
+        applicant("john.doe@email.com", reported_income="$85,000", reported_employment_years="3.5"),
+        applicant("jane.smith@email.com", reported_income=None, reported_employment_years="n/a"),
+    ])
+    assert chunk["validation_status"] == ["PASSED", "INVALID_INPUT", "INVALID_INPUT"]
+    assert chunk["invalid_fields"] == [[], ["reported_income"], ["reported_income", "reported_employment_years"]]
+    assert chunk["income_variance_percentage"][1:] == [None, None]
+    assert chunk["recommendation"][1] == validator.EMPLOYMENT_RECOMMENDATIONS["CORRECT_INPUT"]
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import time
+
+from jobs import JobQueue, JobWorkerPool, RetryableJobError
+
+
+def open_queue(tmp_path, **kwargs):
+    return JobQueue(os.path.join(tmp_path, "jobs.db"), **kwargs)
+
+
+def test_claim_returns_the_oldest_queued_job_once(tmp_path):
+    queue = open_queue(tmp_path)
+    first = queue.submit({"image_id": "a"})
+    second = queue.submit({"image_id": "b"})
+
+    job = queue.claim()
+    assert job["id"] == first
+    assert job["status"] == "running"
+    assert job["attempts"] == 1
+    assert job["payload"] == {"image_id": "a"}
+    assert queue.claim()["id"] == second
+    assert queue.claim() is None
+
+
+def test_complete_stores_the_result(tmp_path):
+    queue = open_queue(tmp_path)
+    job_id = queue.submit({"image_id": "a"})
+    queue.complete(queue.claim()["id"], {"status": "COMPLETED"})
+
+    job = queue.get(job_id)
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"status": "COMPLETED"}
+    assert queue.counts() == {"queued": 0, "running": 0, "succeeded": 1, "failed": 0}
+
+
+def test_failed_attempts_back_off_exponentially_until_max_attempts(tmp_path):
+    queue = open_queue(tmp_path, max_attempts=3, retry_base_seconds=10)
+    job_id = queue.submit({"image_id": "a"})
+
+    before = time.time()
+    assert queue.fail(queue.claim(), "RateLimited") is True
+    job = queue.get(job_id)
+    assert job["status"] == "queued"
+    assert job["error"] == "RateLimited"
+    assert 10 <= job["available_at"] - before < 11
+    # Not claimable until the backoff has passed
+    assert queue.claim() is None
+    assert 9 < queue.next_available_in() <= 10
+
+    queue._execute("UPDATE jobs SET available_at = 0 WHERE id = ?", (job_id,))
+    before = time.time()
+    assert queue.fail(queue.claim(), "RateLimited") is True
+    assert 20 <= queue.get(job_id)["available_at"] - before < 21
+
+    queue._execute("UPDATE jobs SET available_at = 0 WHERE id = ?", (job_id,))
+    assert queue.fail(queue.claim(), "still failing") is False
+    job = queue.get(job_id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 3
+    assert job["error"] == "still failing"
+
+
+def test_running_jobs_are_requeued_when_the_queue_reopens(tmp_path):
+    queue = open_queue(tmp_path)
+    job_id = queue.submit({"image_id": "a"})
+    queue.claim()
+    queue.close()
+
+    reopened = open_queue(tmp_path)
+    job = reopened.get(job_id)
+    assert job["status"] == "queued"
+    assert reopened.claim()["attempts"] == 2
+
+
+def test_worker_pool_retries_then_records_the_result(tmp_path):
+    queue = open_queue(tmp_path, retry_base_seconds=0)
+    attempts = []
+
+    async def handler(payload):
+        attempts.append(payload["image_id"])
+        if len(attempts) == 1:
+            raise RetryableJobError("rate limited")
+        return {"status": "COMPLETED", "image_id": payload["image_id"]}
+
+    async def main():
+        pool = JobWorkerPool(queue, handler, workers=2)
+        pool.start()
+        job_id = await pool.submit({"image_id": "a"})
+        for _ in range(200):
+            if queue.get(job_id)["status"] == "succeeded":
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop()
+        return job_id
+
+    job = queue.get(asyncio.run(main()))
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 2
+    assert job["result"] == {"status": "COMPLETED", "image_id": "a"}
+    assert attempts == ["a", "a"]
@@ -0,0 +1,57 @@
+from structured_output import JSONObjectScanner, schema_violations
+
+
+def scan(*chunks):
+    scanner = JSONObjectScanner()
+    for chunk in chunks:
+        if scanner.feed(chunk):
+            break
+    return scanner
+
+
+def test_skips_prose_and_stops_at_the_closing_brace():
+    scanner = scan('Here is the result: {"a": {"b"', ': [1, 2]}, "c": "x"}', " and trailing text")
+    assert scanner.complete
+    assert scanner.result() == {"a": {"b": [1, 2]}, "c": "x"}
+    assert scanner.text == '{"a": {"b": [1, 2]}, "c": "x"}'
+
+
+def test_braces_inside_strings_and_escapes_do_not_close_the_object():
+    scanner = scan('{"a": "}{", "b": "say \\"}\\""}')
+    assert scanner.result() == {"a": "}{", "b": 'say "}"'}
+
+
+def test_balanced_text_that_is_not_json_is_skipped():
+    scanner = scan("See {the document below}: ", '{"income": 85000}')
+    assert scanner.complete
+    assert scanner.result() == {"income": 85000}
+
+
+def test_invalid_object_rescans_from_the_next_brace_inside_it():
+    scanner = scan('{"a": 1,} {"a": 2}')
+    assert scanner.result() == {"a": 2}
+
+
+def test_not_complete_until_a_parseable_object_closes():
+    scanner = scan("{not json}")
+    assert not scanner.complete
+    assert scanner.result() is None
+
+
+def test_partial_object_cuts_after_the_last_complete_value():
+    scanner = scan('{"extraction": {"name": "Jane", "income": 85000}, "authenticity": {"notes": "trunc')
+    assert not scanner.complete
+    assert scanner.partial_object() == {"extraction": {"name": "Jane", "income": 85000}, "authenticity": {}}
+
+
+def test_partial_object_is_none_before_the_object_starts():
+    assert scan("no json here").partial_object() is None
+
+
+def test_schema_violations():
+    schema = {"name": str, "income": (int, float), "address": {"zip": (str, int)}}
+    assert schema_violations({"name": "Jane", "income": None, "address": {"zip": 90210}}, schema) == []
+    assert schema_violations({"name": 1, "address": {}}, schema) == [
+        "name: unexpected type int", "income: missing", "address.zip: missing",
+    ]
+    assert schema_violations([], schema) == ["root: expected object"]
@@ -0,0 +1,128 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+
+from tool_memo import RunToolMemo, _without_tool_calls, canonical_args, memoized_run, memoized_tools
+
+SCHEMA = {"type": "object", "properties": {"image_id": {"type": "string"}}, "required": ["image_id"]}
+
+
+def counting_tool(name="extract", delay=0.0, fail=False):
+    calls = []
+
+    async def run(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("tool failed")
+        return f"{name}:{kwargs['image_id']}"
+
+    return StructuredTool(name=name, description=name, args_schema=SCHEMA, coroutine=run), calls
+
+
+def test_canonical_args_ignore_order_whitespace_and_number_spelling():
+    assert canonical_args({"a": " x ", "b": 75000.0}) == canonical_args({"b": 75000, "a": "x"})
+    assert canonical_args({"a": 1}) != canonical_args({"a": 2})
+
+
+def test_repeated_call_is_answered_from_the_memo():
+    tool, calls = counting_tool()
+
+    async def main():
+        run = RunToolMemo()
+        first = await run.call(tool, {"image_id": "a"})
+        second = await run.call(tool, {"image_id": " a "})
+        return run, first, second
+
+    run, first, second = asyncio.run(main())
+    assert first == second == "extract:a"
+    assert len(calls) == 1
+    assert run.stats()["avoided_calls"] == 1
+
+
+def test_concurrent_duplicates_share_one_call():
+    tool, calls = counting_tool(delay=0.01)
+
+    async def main():
+        run = RunToolMemo()
+        return await asyncio.gather(*(run.call(tool, {"image_id": "a"}) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["extract:a"] * 3
+    assert len(calls) == 1
+
+
+def test_failures_are_not_memoized():
+    tool, calls = counting_tool(fail=True)
+
+    async def main():
+        run = RunToolMemo()
+        for _ in range(2):
+            try:
+                await run.call(tool, {"image_id": "a"})
+            except RuntimeError:
+                pass
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_cancelling_the_first_caller_keeps_the_call_running_for_duplicates():
+    tool, calls = counting_tool(delay=0.05)
+
+    async def main():
+        run = RunToolMemo()
+        first = asyncio.create_task(run.call(tool, {"image_id": "a"}))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(run.call(tool, {"image_id": "a"}))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first.cancelled()
+
+    assert asyncio.run(main()) == ("extract:a", True)
+    assert len(calls) == 1
+
+
+def test_loop_detection():
+    extract, _ = counting_tool("extract")
+    validate, _ = counting_tool("validate")
+
+    async def call_sequence(sequence):
+        run = RunToolMemo()
+        for tool in sequence:
+            await run.call(tool, {"image_id": "a"})
+            if run.loop_detected:
+                break
+        return run
+
+    assert not asyncio.run(call_sequence([extract, validate])).loop_detected
+    assert asyncio.run(call_sequence([extract, extract])).loop_detected
+    run = asyncio.run(call_sequence([extract, validate, extract, validate, extract]))
+    assert run.loop_detected
+    assert len(run.calls) == 4
+
+
+def test_memoized_tools_only_memoize_inside_a_run():
+    tool, calls = counting_tool()
+    [memoized] = memoized_tools([tool])
+
+    async def main():
+        await memoized.ainvoke({"image_id": "a"})
+        await memoized.ainvoke({"image_id": "a"})
+        with memoized_run() as run:
+            await memoized.ainvoke({"image_id": "a"})
+            await memoized.ainvoke({"image_id": "a"})
+        return run
+
+    run = asyncio.run(main())
+    assert len(calls) == 3
+    assert run.stats()["calls"] == 2
+
+
+def test_forced_decision_drops_tool_calls():
+    message = AIMessage(content="", tool_calls=[{"name": "extract", "args": {"image_id": "a"}, "id": "1"}])
+    stripped = _without_tool_calls(message)
+    assert stripped.tool_calls == []
+    assert stripped.content.startswith("No final decision")
+    plain = AIMessage(content="APPROVED")
+    assert _without_tool_calls(plain) is plain
@@ -0,0 +1,210 @@
+"""
+Per-run tool-call memoization and loop detection for the ReAct agent.
+
+Within one underwriting run the agent sometimes repeats a tool call with
+identical arguments (most expensively extract_credit_application_data, a
+full vision call) or cycles through the same few calls until the recursion
+limit. memoized_tools wraps the MCP tools so that, while a RunToolMemo is
+active for the current run, a repeated call returns the first call's
+result (concurrent duplicates share one in-flight call) instead of
+reaching the MCP server again.
+
+Every call is also appended to the run's call sequence. When its tail is a
+block of calls repeated back to back (A A, or A B A B, ...) the run is
+marked looping and decision_model asks the model for the final decision
+with tool use disabled; tool calls it still makes are dropped, so the graph
+ends after that turn.
+
+Avoided calls, the time they would have taken and detected loops are
+counted per run (RunToolMemo.stats) and for the process (memo_stats).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import BaseTool, StructuredTool
+
+logger = logging.getLogger(__name__)
+
+TOOL_MEMO_ENABLED = os.getenv("TOOL_MEMO_ENABLED", "true").lower() == "true"
+# Longest block of calls (e.g. the four validation checks) recognized as a repeating cycle
+TOOL_LOOP_MAX_CYCLE = int(os.getenv("TOOL_LOOP_MAX_CYCLE", "4"))
+
+FORCE_DECISION_PROMPT = (
+    "You are repeating tool calls you have already made; their results are above and will not change. "
+    "Do not call any more tools. Make the final credit decision (APPROVED or REJECTED) now from the "
+    "information you already have."
+)
+
+# Process-wide counters, summed over every run
+memo_stats = {"runs": 0, "calls": 0, "avoided_calls": 0, "saved_seconds": 0.0, "loops_detected": 0}
+
+
+def canonical_args(args: Dict[str, Any]) -> str:
+    """Argument key that ignores key order, surrounding whitespace and int/float spelling (75000 == 75000.0)"""
+
+    def canonical(value: Any) -> Any:
+        if isinstance(value, str):
+            return value.strip()
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, dict):
+            return {str(key): canonical(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [canonical(item) for item in value]
+        return value
+
+    return json.dumps(canonical(args), sort_keys=True, default=str)
+
+
+class RunToolMemo:
+    """Tool results, call sequence and counters for one agent run"""
+
+    def __init__(self):
+        self._results: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._elapsed: Dict[Tuple[str, str], float] = {}
+        self.calls: List[Tuple[str, str]] = []
+        self.avoided_calls = 0
+        self.saved_seconds = 0.0
+        self.loop_detected = False
+
+    def _record(self, key: Tuple[str, str]):
+        """Append a call and check whether the sequence now ends in a repeated block"""
+        self.calls.append(key)
+        memo_stats["calls"] += 1
+        if self.loop_detected:
+            return
+        for cycle in range(1, min(TOOL_LOOP_MAX_CYCLE, len(self.calls) // 2) + 1):
+            if self.calls[-cycle:] == self.calls[-2 * cycle:-cycle]:
+                self.loop_detected = True
+                memo_stats["loops_detected"] += 1
+                logger.warning(f"Tool call loop detected ({' -> '.join(name for name, _ in self.calls[-cycle:])}); "
+                               f"forcing the final decision")
+                return
+
+    async def call(self, tool: BaseTool, args: Dict[str, Any]) -> Any:
+        """Run tool.coroutine(**args) once per distinct arguments in this run"""
+        key = (tool.name, canonical_args(args))
+        self._record(key)
+        task = self._results.get(key)
+        if task is None:
+            # Own task, so cancelling one caller doesn't cancel duplicates waiting on the call
+            task = self._results[key] = asyncio.ensure_future(self._run(key, tool, args))
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            return await asyncio.shield(task)
+
+        self.avoided_calls += 1
+        memo_stats["avoided_calls"] += 1
+        result = await asyncio.shield(task)
+        saved = self._elapsed.get(key, 0.0)
+        self.saved_seconds += saved
+        memo_stats["saved_seconds"] += saved
+        logger.info(f"♻️ Reused {tool.name} result from earlier in this run (saved {saved:.2f}s)")
+        return result
+
+    async def _run(self, key: Tuple[str, str], tool: BaseTool, args: Dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            result = await tool.coroutine(**args)
+        except BaseException:
+            # Failures are not memoized; a repeat runs the tool again
+            del self._results[key]
+            raise
+        self._elapsed[key] = time.perf_counter() - start
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": len(self.calls),
+            "avoided_calls": self.avoided_calls,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "loop_detected": self.loop_detected,
+        }
+
+
+# Memo of the run in progress; tools called outside a run are not memoized
+current_run: ContextVar[Optional[RunToolMemo]] = ContextVar("current_run", default=None)
+
+
+@contextmanager
+def memoized_run() -> Iterator[RunToolMemo]:
+    """Memoize tool calls made inside the block as one run"""
+    run = RunToolMemo()
+    if not TOOL_MEMO_ENABLED:
+        yield run
+        return
+    memo_stats["runs"] += 1
+    token = current_run.set(run)
+    try:
+        yield run
+    finally:
+        current_run.reset(token)
+
+
+def _memoized(tool: BaseTool) -> BaseTool:
+    if not isinstance(tool, StructuredTool) or tool.coroutine is None:
+        return tool
+
+    async def call(**kwargs):
+        run = current_run.get()
+        if run is None:
+            return await tool.coroutine(**kwargs)
+        return await run.call(tool, kwargs)
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        coroutine=call,
+        response_format=tool.response_format,
+        metadata=tool.metadata,
+    )
+
+
+def memoized_tools(tools: List[BaseTool]) -> List[BaseTool]:
+    """Wrap tools so calls inside a run are memoized and checked for loops"""
+    return [_memoized(tool) for tool in tools]
+
+
+def _without_tool_calls(message: AIMessage) -> AIMessage:
+    """The forced decision turn must end the graph, even if the model ignored tool_choice"""
+    if not message.tool_calls:
+        return message
+    logger.warning(f"Model requested {len(message.tool_calls)} tool calls after the forced decision; dropping them")
+    return AIMessage(
+        content=message.content or "No final decision: the model kept requesting tool calls after a loop was detected.",
+        id=message.id,
+        response_metadata=message.response_metadata,
+        usage_metadata=message.usage_metadata,
+    )
+
+
+def decision_model(model: Any, tools: List[BaseTool]):
+    """
+    Dynamic model for create_react_agent: the model with tools bound, or,
+    once the current run is looping, with tool use disabled, told to decide
+    and with any tool calls removed from its answer (so the graph ends)
+
+    Args:
+        model: Chat model
+        tools: Tools offered to the model
+    """
+    with_tools = model.bind_tools(tools)
+    # Tools stay bound (the conversation contains tool calls) but tool_choice="none" is
+    # not honoured by every gateway, so the answer is stripped of tool calls as well
+    forced = RunnableLambda(lambda messages: [*messages, HumanMessage(content=FORCE_DECISION_PROMPT)]) | \
+        model.bind_tools(tools, tool_choice="none") | RunnableLambda(_without_tool_calls)
+
+    def select(state, runtime):
+        run = current_run.get()
+        return forced if run is not None and run.loop_detected else with_tools
+
+    return select
@@ -0,0 +1,222 @@
+"""
+Deterministic fast path for the credit underwriting agent.
+
+The ReAct agent discovers the workflow one model turn at a time, although
+the dependency graph never changes: document analysis first, then the
+income, employment stability, address and fraud checks, which only depend
+on the extracted fields. The pipeline calls the analysis tool directly,
+fans the four checks out concurrently and calls the model once, for the
+final decision.
+
+run_pipeline reports a fallback_reason instead of a decision when the
+extraction is unusable (analysis error, partial result, missing or
+non-numeric fields) so the caller can fall back to the ReAct agent, which
+can ask for what it needs.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_TOOL = "analyze_credit_document"
+REQUIRED_FIELDS = ("name", "email", "income", "employer", "job_title", "employment_years",
+                   "address", "city", "state", "zip")
+NUMERIC_FIELDS = ("income", "employment_years", "loan_amount")
+# Result fields shown in progress events (verbose and compact results, see compact.py)
+SUMMARY_FIELDS = ("status", "score", "level", "risk", "verified", "_ok", "match", "rec", "reason", "flags", "error")
+
+# Progress callback: emit(event, data), e.g. emit("tool_end", {"tool": ..., "summary": ...})
+Emit = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+decision_prompt = """You are a credit underwriter.
+
+IMPORTANT: Today's date is 1st September 2024. Use this as your reference when evaluating dates on documents.
+
+You are given the data extracted from a credit application document, the document authenticity checks,
+and the results of the income/employment, employment stability, address and address fraud checks.
+All checks have already been run; do not ask for more information.
+
+Make a final credit decision (APPROVED or REJECTED) and present a comprehensive, structured credit
+assessment with your reasoning and recommendation. Return JSON with the decision.
+"""
+
+
+def _tool_json(result: Any) -> Any:
+    """Parse a tool result (a JSON string or a list of text content blocks)"""
+    if isinstance(result, tuple):  # content_and_artifact
+        result = result[0]
+    if isinstance(result, list):
+        result = "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in result)
+    if isinstance(result, str):
+        try:
+            return json.loads(result)
+        except json.JSONDecodeError:
+            return {"raw": result}
+    return result
+
+
+def summarize_result(result: Any, max_chars: int = 300) -> Any:
+    """Status, score, verification and recommendation fields of a tool result, for progress events"""
+    result = _tool_json(result)
+    if isinstance(result, dict):
+        summary = {key: value for key, value in result.items() if any(field in key for field in SUMMARY_FIELDS)}
+        for section in ("extraction", "authenticity"):  # analyze_credit_document
+            if isinstance(result.get(section), dict):
+                summary[section] = summarize_result(result[section], max_chars)
+        if summary:
+            return summary
+    text = json.dumps(result, default=str) if not isinstance(result, str) else result
+    return text if len(text) <= max_chars else text[:max_chars] + "..."
+
+
+def _number(value: Any) -> Optional[float]:
+    """Numeric field from the extraction ("$75,000", "3.5 years" and 75000 all parse)"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"-?\d+(?:\.\d+)?", str(value or "").replace(",", ""))
+    return float(match.group()) if match else None
+
+
+def usable_extraction(analysis: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Check that the analysis has everything the validation tools need
+
+    Returns:
+        tuple: (extraction with numeric fields parsed, "") or (None, reason)
+    """
+    if not isinstance(analysis, dict) or "error" in analysis:
+        return None, f"analysis failed: {analysis.get('error') if isinstance(analysis, dict) else analysis}"
+    if analysis.get("partial"):
+        return None, "analysis is partial"
+    extraction = analysis.get("extraction")
+    if not isinstance(extraction, dict):
+        return None, "analysis has no extraction section"
+    missing = [field for field in REQUIRED_FIELDS if extraction.get(field) in (None, "")]
+    if missing:
+        return None, f"missing fields: {', '.join(missing)}"
+    extraction = dict(extraction)
+    for field in NUMERIC_FIELDS:
+        if field in extraction and extraction[field] is not None:
+            extraction[field] = _number(extraction[field])
+    unparsed = [field for field in ("income", "employment_years") if extraction[field] is None]
+    if unparsed:
+        return None, f"non-numeric fields: {', '.join(unparsed)}"
+    return extraction, ""
+
+
+async def run_pipeline(
+    tools: List[Any], model: Any, image_id: str, callbacks: Optional[list] = None, emit: Optional[Emit] = None
+) -> Dict[str, Any]:
+    """
+    Analyze the document, run the validation checks concurrently and ask the model for the decision
+
+    Args:
+        tools: MCP tools from the tool registry
+        model: Chat model for the final decision
+        image_id: Unique identifier for the image in S3
+        callbacks: LangChain callbacks (tracing) for the decision call
+        emit: Progress callback; receives tool_start / tool_end events and the
+              decision as token events (the decision is then streamed)
+
+    Returns:
+        dict: "fallback_reason" (extraction unusable, nothing else was run) or
+              "credit_assessment", "checks" and per-stage "timings_ms"
+    """
+    by_name = {tool.name: tool for tool in tools}
+    timings = {}
+    missing_tools = [name for name in (ANALYSIS_TOOL, "validate_income_employment", "check_employment_stability",
+                                       "validate_address", "perform_address_fraud_check") if name not in by_name]
+    if missing_tools:
+        return {"fallback_reason": f"tools unavailable: {', '.join(missing_tools)}", "timings_ms": timings}
+
+    async def call_tool(tool_name: str, args: Dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        if emit is not None:
+            await emit("tool_start", {"tool": tool_name, "input": args})
+        try:
+            result = _tool_json(await by_name[tool_name].ainvoke(args))
+        except Exception as e:
+            if tool_name == ANALYSIS_TOOL:
+                raise
+            logger.error(f"Pipeline check {tool_name} failed: {e}")
+            result = {"error": f"{tool_name} failed: {e}"}
+        if emit is not None:
+            await emit("tool_end", {"tool": tool_name, "summary": summarize_result(result),
+                                    "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)})
+        return result
+
+    start = time.perf_counter()
+    analysis = await call_tool(ANALYSIS_TOOL, {"image_id": image_id})
+    timings["analysis"] = round((time.perf_counter() - start) * 1000, 1)
+    extraction, reason = usable_extraction(analysis)
+    if extraction is None:
+        return {"fallback_reason": reason, "timings_ms": timings}
+
+    calls = {
+        "income_employment": ("validate_income_employment", {
+            "applicant_email": str(extraction["email"]),
+            "reported_income": extraction["income"],
+            "reported_employer": str(extraction["employer"]),
+            "reported_job_title": str(extraction["job_title"]),
+            "reported_employment_years": extraction["employment_years"],
+        }),
+        "employment_stability": ("check_employment_stability", {"applicant_email": str(extraction["email"])}),
+        "address": ("validate_address", {
+            "street_address": str(extraction["address"]),
+            "city": str(extraction["city"]),
+            "state": str(extraction["state"]),
+            "zip_code": str(extraction["zip"]),
+        }),
+        "address_fraud": ("perform_address_fraud_check", {
+            "street_address": str(extraction["address"]),
+            "applicant_name": str(extraction["name"]),
+        }),
+    }
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(call_tool(tool_name, args) for tool_name, args in calls.values()))
+    timings["checks"] = round((time.perf_counter() - start) * 1000, 1)
+    checks = dict(zip(calls, results))
+
+    start = time.perf_counter()
+    messages = [
+        SystemMessage(content=decision_prompt),
+        HumanMessage(content=json.dumps({
+            "image_id": image_id,
+            "extraction": analysis.get("extraction"),
+            "authenticity": analysis.get("authenticity"),
+            "checks": checks,
+        }, default=str)),
+    ]
+    config = {"callbacks": callbacks or [], "run_name": "credit_underwriting_pipeline_decision"}
+    if emit is None:
+        assessment = (await model.ainvoke(messages, config=config)).content
+    else:
+        parts = []
+        async for chunk in model.astream(messages, config=config):
+            text = message_text(chunk.content)
+            if text:
+                parts.append(text)
+                await emit("token", {"text": text})
+        assessment = "".join(parts)
+    timings["decision"] = round((time.perf_counter() - start) * 1000, 1)
+
+    return {"credit_assessment": assessment, "checks": checks, "timings_ms": timings}
+
+
+def message_text(content: Any) -> str:
+    """Text of a message or chunk content (a string or a list of content blocks)"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+    return ""
@@ -1,31 +1,33 @@
-import boto3
+import asyncio
 import logging
 import os
 import json
-from botocore.exceptions import ClientError
-from typing import Optional, Dict, Any, Union
+import hashlib
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any, Tuple, Union
 from PIL import Image
 import io
 import base64
 import secrets
 
-
-S3_BUCKET_NAME = os.getenv('S3_BUCKET_NAME', 'loan-buddy-bucket')
-AWS_REGION = os.getenv('AWS_REGION', 'us-west-2')
+from storage import create_storage, ObjectNotFound, StorageError
 
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-# --- S3 Client Initialization ---
-s3_client = None
+# --- Storage Initialization ---
+# S3 by default; STORAGE_BACKEND=local uses the filesystem stand-in
+storage = None
 try:
-    s3_client = boto3.client('s3', region_name=AWS_REGION)
+    storage = create_storage()
 except Exception as e:
-    logger.error(f"Failed to initialize S3 client or create bucket: {e}")
-    s3_client = None
-
+    logger.error(f"Failed to initialize storage backend: {e}")
+    storage = None
 
 
 def store_object(content: str, object_key: str) -> bool:
@@ -40,23 +42,15 @@ def store_object(content: str, object_key: str) -> bool:
         bool: True if successful, False otherwise
     """
 
-    if not s3_client:
-        logger.error("S3 client not initialized. Cannot store object.")
+    if not storage:
+        logger.error("Storage not initialized. Cannot store object.")
         return False
 
     try:
-        # Upload the string content directly
-        s3_client.put_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=object_key,
-            Body=content,
-            ContentType='text/plain'
-        )
-
-        logger.info(f"Successfully stored content to s3://{S3_BUCKET_NAME}/{object_key}")
+        storage.put(object_key, content.encode("utf-8"), "text/plain")
+        logger.info(f"Successfully stored content to {storage.uri(object_key)}")
         return True
-        
-    except ClientError as e:
+    except StorageError as e:
         logger.error(f"Error storing content to S3: {e}")
         return False
     except Exception as e:
@@ -73,29 +67,20 @@ def load_object(object_key: str) -> Optional[str]:
     Returns:
         str: Base64 encoded image string if successful, None otherwise
     """
-    
-    if not s3_client:
-        logger.error("S3 client not initialized. Cannot load object.")
+
+    if not storage:
+        logger.error("Storage not initialized. Cannot load object.")
         return None
-        
+
     try:
-        
-        # Get the object
-        response = s3_client.get_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=object_key
-        )
-        
-        # Read and return the content
-        content = response['Body'].read().decode('utf-8')
-        logger.info(f"Successfully loaded content from s3://{S3_BUCKET_NAME}/{object_key}")
+        content = storage.get(object_key).decode("utf-8")
+        logger.info(f"Successfully loaded content from {storage.uri(object_key)}")
         return content
-        
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'NoSuchKey':
-            logger.warning(f"The object s3://{S3_BUCKET_NAME}/{object_key} does not exist.")
-        else:
-            logger.error(f"Error loading content from S3: {e}")
+    except ObjectNotFound:
+        logger.warning(f"The object {storage.uri(object_key)} does not exist.")
+        return None
+    except StorageError as e:
+        logger.error(f"Error loading content from S3: {e}")
         return None
     except Exception as e:
         logger.error(f"Unexpected error loading content from S3: {e}")
@@ -103,7 +88,7 @@ def load_object(object_key: str) -> Optional[str]:
 
 def store_image_bytes(image_bytes: bytes, object_key: str) -> bool:
     """
-    Store image bytes directly to S3 bucket
+    Store image bytes directly to S3 bucket (multipart upload for large scans)
     
     Args:
         image_bytes: Raw image bytes
@@ -112,25 +97,16 @@ def store_image_bytes(image_bytes: bytes, object_key: str) -> bool:
     Returns:
         bool: True if successful, False otherwise
     """
-    
-    if not s3_client:
-        logger.error("S3 client not initialized. Cannot load object.")
+
+    if not storage:
+        logger.error("Storage not initialized. Cannot store object.")
         return False
-    
+
     try:
-        
-        # Upload the image bytes directly
-        s3_client.put_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=object_key,
-            Body=image_bytes,
-            ContentType='image/jpeg'
-        )
-
-        logger.info(f"Successfully stored image bytes to s3://{S3_BUCKET_NAME}/{object_key}")
+        storage.put(object_key, image_bytes, "image/jpeg")
+        logger.info(f"Successfully stored image bytes to {storage.uri(object_key)}")
         return True
-        
-    except ClientError as e:
+    except StorageError as e:
         logger.error(f"Error storing image bytes to S3: {e}")
         return False
     except Exception as e:
@@ -139,7 +115,7 @@ def store_image_bytes(image_bytes: bytes, object_key: str) -> bool:
 
 def load_image_bytes(object_key: str) -> Optional[bytes]:
     """
-    Load image bytes from S3 bucket
+    Load image bytes from S3 bucket, reading the object as a stream of chunks
     
     Args:
         object_key: Unique key for the object in S3
@@ -147,74 +123,420 @@ def load_image_bytes(object_key: str) -> Optional[bytes]:
     Returns:
         bytes: Image bytes if successful, None otherwise
     """
-    
-    if not s3_client:
-        logger.error("S3 client not initialized. Cannot load object.")
+
+    if not storage:
+        logger.error("Storage not initialized. Cannot load object.")
         return None
-    
+
     try:
-        # Create S3 client
-        
-        # Get the object
-        response = s3_client.get_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=object_key
-        )
-        
-        # Read and return the content as bytes
-        content = response['Body'].read()
-        logger.info(f"Successfully loaded image bytes from s3://{S3_BUCKET_NAME}/{object_key}")
+        content = b"".join(storage.iter_chunks(object_key))
+        logger.info(f"Successfully loaded image bytes from {storage.uri(object_key)}")
         return content
-        
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'NoSuchKey':
-            logger.warning(f"The object s3://{S3_BUCKET_NAME}/{object_key} does not exist.")
-        else:
-            logger.error(f"Error loading image bytes from S3: {e}")
+    except ObjectNotFound:
+        logger.warning(f"The object {storage.uri(object_key)} does not exist.")
+        return None
+    except StorageError as e:
+        logger.error(f"Error loading image bytes from S3: {e}")
         return None
     except Exception as e:
         logger.error(f"Unexpected error loading image bytes from S3: {e}")
         return None
 
 
+# --- Binary image objects ---
+# Images are stored as raw JPEG bytes with metadata (dimensions, SHA-256 of the
+# JPEG, encoding version). Base64 only happens when a vision request is built.
+# Objects written before this format (base64 text or unnormalized bytes) are
+# still readable through load_image.
 
-def encode_image_from_bytes(image_bytes: bytes) -> str:
+IMAGE_ENCODING_VERSION = "1"
+
+
+def store_image(jpeg_bytes: bytes, metadata: Dict[str, str], object_key: str) -> bool:
     """
-    Encode image bytes to base64 string
+    Store a normalized JPEG image with its metadata to S3 bucket
     
     Args:
-        image_bytes: Raw image bytes
+        jpeg_bytes: Normalized JPEG bytes (see prepare_image)
+        metadata: Image metadata returned by prepare_image
+        object_key: Unique key for the object in S3
         
     Returns:
-        str: Base64 encoded image string
+        bool: True if successful, False otherwise
+    """
+
+    if not storage:
+        logger.error("Storage not initialized. Cannot store object.")
+        return False
+
+    try:
+        storage.put(object_key, jpeg_bytes, "image/jpeg", metadata)
+        logger.info(f"Successfully stored image ({len(jpeg_bytes)} bytes) to {storage.uri(object_key)}")
+        return True
+    except StorageError as e:
+        logger.error(f"Error storing image to S3: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"Unexpected error storing image to S3: {e}")
+        return False
+
+def load_image(object_key: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+    """
+    Load a normalized JPEG image and its metadata from S3 bucket.
+    Legacy base64 text objects and unnormalized image bytes are converted on read.
+    
+    Args:
+        object_key: Unique key for the object in S3
+        
+    Returns:
+        tuple: (JPEG bytes, metadata) if successful, None otherwise
     """
+
+    if not storage:
+        logger.error("Storage not initialized. Cannot load object.")
+        return None
+
+    try:
+        stored = storage.get_object(object_key)
+        logger.info(f"Successfully loaded image from {storage.uri(object_key)}")
+    except ObjectNotFound:
+        logger.warning(f"The object {storage.uri(object_key)} does not exist.")
+        return None
+    except StorageError as e:
+        logger.error(f"Error loading image from S3: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Unexpected error loading image from S3: {e}")
+        return None
+
     try:
-        image = Image.open(io.BytesIO(image_bytes))
+        if stored.metadata.get("encoding-version") == IMAGE_ENCODING_VERSION:
+            return stored.body, stored.metadata
+        if stored.content_type.startswith("text/"):
+            # Legacy format: base64 string of an already normalized JPEG
+            jpeg_bytes = base64.b64decode(stored.body)
+            return jpeg_bytes, image_metadata(jpeg_bytes)
+        # Legacy format: raw uploaded bytes, normalize now
+        return prepare_image(stored.body)
+    except Exception as e:
+        logger.error(f"Error decoding image {object_key}: {e}")
+        return None
+
+
+# --- Async variants for FastAPI and MCP tool handlers ---
+# Run the functions above on the storage thread pool (sized to the S3
+# connection pool) so S3 round trips never block the event loop.
+
+async def _run_storage(func, *args):
+    if not storage:
+        return func(*args)
+    return await storage.run(func, *args)
+
+async def astore_object(content: str, object_key: str) -> bool:
+    return await _run_storage(store_object, content, object_key)
+
+async def aload_object(object_key: str) -> Optional[str]:
+    return await _run_storage(load_object, object_key)
+
+async def astore_image_bytes(image_bytes: bytes, object_key: str) -> bool:
+    return await _run_storage(store_image_bytes, image_bytes, object_key)
+
+async def aload_image_bytes(object_key: str) -> Optional[bytes]:
+    return await _run_storage(load_image_bytes, object_key)
+
+async def astore_image(jpeg_bytes: bytes, metadata: Dict[str, str], object_key: str) -> bool:
+    return await _run_storage(store_image, jpeg_bytes, metadata, object_key)
+
+async def aload_image(object_key: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+    return await _run_storage(load_image, object_key)
+
+
+
+# --- Image ingestion ---
+# Decoding and resizing a 12MP phone photo costs hundreds of milliseconds of
+# CPU, so async handlers run prepare_image in a process pool sized to the
+# pod's CPU allowance. JPEG sources much larger than the target are decoded
+# at a reduced DCT scale (draft mode) instead of at full resolution.
+#
+# Images are sized for the vision model rather than to a fixed resolution:
+# the aspect ratio is kept and the pixel count is capped by a per-call
+# vision-token budget (Claude: ~750 pixels per token, long edge <= 1568px).
+# Sending more pixels than that only adds payload, the model downsamples.
+
+VISION_MODEL = os.getenv("VISION_MODEL", "bedrock/claude-4.5-sonnet")
+VISION_TOKEN_BUDGET = int(os.getenv("VISION_TOKEN_BUDGET", "1600"))
+VISION_GRAYSCALE = os.getenv("VISION_GRAYSCALE", "false").lower() == "true"
+VISION_JPEG_QUALITY = int(os.getenv("VISION_JPEG_QUALITY", "0"))  # 0: pick from resolution
+DEFAULT_VISION_LIMITS = {"pixels_per_token": 750, "max_edge": 1568}
+VISION_MODEL_LIMITS = {
+    "bedrock/claude-4.5-sonnet": DEFAULT_VISION_LIMITS,
+}
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "-1"))  # -1: one per available CPU, 0: use a thread instead
+
+_ingest_pool = None
+
+
+def available_cpus() -> int:
+    """CPUs available to this container (cgroup quota, then affinity)"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, int(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _to_jpeg_mode(image: Image.Image) -> Image.Image:
+    """Convert to a JPEG-compatible mode"""
+    # Convert RGBA to RGB if necessary (JPEG doesn't support transparency)
+    if image.mode in ('RGBA', 'LA'):
+        # Create a white background
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        # Paste the image on the white background
+        if image.mode == 'RGBA':
+            background.paste(image, mask=image.split()[-1])  # Use alpha channel as mask
+        else:
+            background.paste(image)
+        return background
+    elif image.mode == 'P' and 'transparency' in image.info:
+        return _to_jpeg_mode(image.convert('RGBA'))
+    elif image.mode not in ('RGB', 'L'):
+        # Convert other modes to RGB
+        return image.convert('RGB')
+    return image
+
+
+def vision_target_size(size: Tuple[int, int], token_budget: int = VISION_TOKEN_BUDGET, model: str = VISION_MODEL) -> Tuple[int, int]:
+    """
+    Largest aspect-preserving size that fits the model's token budget and edge limit (never upscales)
+    
+    Args:
+        size: Source (width, height)
+        token_budget: Maximum vision tokens for one image
+        model: Target vision model
+        
+    Returns:
+        tuple: Target (width, height)
+    """
+    limits = VISION_MODEL_LIMITS.get(model, DEFAULT_VISION_LIMITS)
+    width, height = size
+    scale = min(
+        1.0,
+        math.sqrt(token_budget * limits["pixels_per_token"] / (width * height)),
+        limits["max_edge"] / max(width, height),
+    )
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def estimate_vision_tokens(size: Tuple[int, int], model: str = VISION_MODEL) -> int:
+    """Approximate vision tokens the model charges for an image of this size"""
+    limits = VISION_MODEL_LIMITS.get(model, DEFAULT_VISION_LIMITS)
+    return math.ceil(size[0] * size[1] / limits["pixels_per_token"])
+
+
+def jpeg_quality_for(size: Tuple[int, int]) -> int:
+    """
+    JPEG quality for a target size. Quality doesn't change the token cost, only
+    payload bytes, so smaller images (where each pixel carries more text detail)
+    get a higher quality.
+    """
+    if VISION_JPEG_QUALITY:
+        return VISION_JPEG_QUALITY
+    pixels = size[0] * size[1]
+    if pixels <= 600_000:
+        return 90
+    if pixels <= 1_200_000:
+        return 85
+    return 80
+
+
+def image_metadata(jpeg_bytes: bytes, size: Optional[Tuple[int, int]] = None) -> Dict[str, str]:
+    """
+    Build the stored metadata for a normalized JPEG image
+    
+    Args:
+        jpeg_bytes: Normalized JPEG bytes
+        size: (width, height) if already known
         
-        # Convert RGBA to RGB if necessary (JPEG doesn't support transparency)
-        if image.mode in ('RGBA', 'LA'):
-            # Create a white background
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            # Paste the image on the white background
-            if image.mode == 'RGBA':
-                background.paste(image, mask=image.split()[-1])  # Use alpha channel as mask
-            else:
-                background.paste(image)
-            image = background
-        elif image.mode not in ('RGB', 'L'):
-            # Convert other modes to RGB
-            image = image.convert('RGB')
+    Returns:
+        dict: String metadata (S3 user metadata compatible)
+    """
+    if size is None:
+        size = Image.open(io.BytesIO(jpeg_bytes)).size
+    return {
+        "encoding-version": IMAGE_ENCODING_VERSION,
+        "width": str(size[0]),
+        "height": str(size[1]),
+        "sha256": hashlib.sha256(jpeg_bytes).hexdigest(),
+        "estimated-tokens": str(estimate_vision_tokens(size)),
+    }
+
+
+def prepare_image_timed(
+    image_bytes: bytes,
+    draft: bool = True,
+    token_budget: int = VISION_TOKEN_BUDGET,
+    grayscale: bool = VISION_GRAYSCALE,
+    model: str = VISION_MODEL,
+) -> Tuple[bytes, Dict[str, str], Dict[str, float]]:
+    """
+    Normalize an image to JPEG bytes sized for the vision model, timing each stage
+    
+    Args:
+        image_bytes: Raw image bytes
+        draft: Use reduced-scale JPEG decoding when the source is much larger than the target
+        token_budget: Maximum vision tokens for the image
+        grayscale: Store a single-channel image (text-only forms)
+        model: Target vision model
+        
+    Returns:
+        tuple: (JPEG bytes, metadata, stage timings in milliseconds)
+    """
+    timings = {}
+    
+    start = time.perf_counter()
+    image = Image.open(io.BytesIO(image_bytes))
+    source_size = image.size
+    target_size = vision_target_size(source_size, token_budget, model)
+    if draft and image.format == "JPEG":
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 scale while staying >= target
+        image.draft("L" if grayscale else "RGB", target_size)
+    image.load()
+    timings["decode_ms"] = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    image = _to_jpeg_mode(image)
+    if grayscale and image.mode != "L":
+        image = image.convert("L")
+    if image.size != target_size:
+        image = image.resize(target_size, Image.Resampling.LANCZOS)
+    timings["resize_ms"] = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    quality = jpeg_quality_for(target_size)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    jpeg_bytes = buffer.getvalue()
+    metadata = image_metadata(jpeg_bytes, image.size)
+    timings["encode_ms"] = (time.perf_counter() - start) * 1000
+    
+    metadata.update({
+        "source-width": str(source_size[0]),
+        "source-height": str(source_size[1]),
+        "quality": str(quality),
+        "grayscale": str(image.mode == "L").lower(),
+    })
+    return jpeg_bytes, metadata, timings
+
+
+def fit_image_for_vision(
+    jpeg_bytes: bytes,
+    metadata: Dict[str, str],
+    token_budget: int = VISION_TOKEN_BUDGET,
+    grayscale: bool = VISION_GRAYSCALE,
+    model: str = VISION_MODEL,
+) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Re-size a stored image only if it exceeds the token budget or has the wrong color mode
+    (objects stored before the sizing policy, or a smaller per-call budget)
+    
+    Args:
+        jpeg_bytes: Stored JPEG bytes
+        metadata: Stored image metadata
+        token_budget: Maximum vision tokens for the image
+        grayscale: Whether the vision call should use a single-channel image
+        model: Target vision model
+        
+    Returns:
+        tuple: (JPEG bytes, metadata) ready for the vision request
+    """
+    size = (int(metadata["width"]), int(metadata["height"]))
+    within_budget = estimate_vision_tokens(size, model) <= token_budget
+    max_edge = VISION_MODEL_LIMITS.get(model, DEFAULT_VISION_LIMITS)["max_edge"]
+    if within_budget and max(size) <= max_edge and (not grayscale or metadata.get("grayscale") == "true"):
+        return jpeg_bytes, metadata
+    jpeg_bytes, fitted_metadata, _ = prepare_image_timed(jpeg_bytes, token_budget=token_budget, grayscale=grayscale, model=model)
+    return jpeg_bytes, fitted_metadata
+
+
+def prepare_image(image_source) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Normalize an image to JPEG bytes for storage
+    
+    Args:
+        image_source: Raw image bytes, file path or file-like object
         
-        # Resize image for better processing
-        image = image.resize((2400, 1600), Image.Resampling.LANCZOS)
+    Returns:
+        tuple: (JPEG bytes, metadata)
+    """
+    if isinstance(image_source, str):
+        with open(image_source, "rb") as image_file:
+            image_source = image_file.read()
+    elif not isinstance(image_source, bytes):
+        image_source = image_source.read()
+    
+    jpeg_bytes, metadata, _ = prepare_image_timed(image_source)
+    return jpeg_bytes, metadata
+
+
+def _get_ingest_pool() -> Optional[ProcessPoolExecutor]:
+    global _ingest_pool
+    if _ingest_pool is None and INGEST_WORKERS != 0:
+        workers = INGEST_WORKERS if INGEST_WORKERS > 0 else available_cpus()
+        logger.info(f"Starting image ingestion pool with {workers} worker processes")
+        # Workers start from a clean server process rather than forking the event loop,
+        # open connections and threads of the service
+        _ingest_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver"))
+    return _ingest_pool
+
+
+async def aprepare_image(image_bytes: bytes) -> Tuple[bytes, Dict[str, str], Dict[str, float]]:
+    """
+    Normalize an image off the event loop (process pool, or a thread if INGEST_WORKERS=0)
+    
+    Args:
+        image_bytes: Raw image bytes
         
-        # Save to bytes buffer
-        buffer = io.BytesIO()
-        image.save(buffer, format="JPEG")
-        buffer.seek(0)
+    Returns:
+        tuple: (JPEG bytes, metadata, stage timings in milliseconds)
+    """
+    pool = _get_ingest_pool()
+    if pool is None:
+        return await asyncio.to_thread(prepare_image_timed, image_bytes)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, prepare_image_timed, image_bytes)
+
+
+def shutdown_ingest_pool():
+    """Stop the ingestion worker processes"""
+    global _ingest_pool
+    if _ingest_pool is not None:
+        _ingest_pool.shutdown(cancel_futures=True)
+        _ingest_pool = None
+
+
+def to_base64(jpeg_bytes: bytes) -> str:
+    """Base64 encode image bytes for a vision request"""
+    return base64.b64encode(jpeg_bytes).decode("utf-8")
+
+
+def encode_image_from_bytes(image_bytes: bytes) -> str:
+    """
+    Encode image bytes to base64 string
+    
+    Args:
+        image_bytes: Raw image bytes
         
-        # Convert to base64
-        return base64.b64encode(buffer.read()).decode("utf-8")
+    Returns:
+        str: Base64 encoded image string
+    """
+    try:
+        return to_base64(prepare_image(image_bytes)[0])
     except Exception as e:
         logger.error(f"Error encoding image from bytes: {e}")
         raise
@@ -235,37 +557,8 @@ def generate_256_bit_hex_key():
 
 def encode_image(image_source):
     """Encode image to base64 string"""
-    if isinstance(image_source, bytes):
-        image = Image.open(io.BytesIO(image_source))
-    elif isinstance(image_source, str):
+    if isinstance(image_source, str):
         # File path
         with open(image_source, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode("utf-8")
-    else:
-        image = Image.open(image_source)
-    
-    # Convert RGBA to RGB if necessary (JPEG doesn't support transparency)
-    if image.mode in ('RGBA', 'LA'):
-        # Create a white background
-        background = Image.new('RGB', image.size, (255, 255, 255))
-        # Paste the image on the white background
-        if image.mode == 'RGBA':
-            background.paste(image, mask=image.split()[-1])  # Use alpha channel as mask
-        else:
-            background.paste(image)
-        image = background
-    elif image.mode not in ('RGB', 'L'):
-        # Convert other modes to RGB
-        image = image.convert('RGB')
-    
-    # Resize image for better processing
-    image = image.resize((2400, 1600), Image.Resampling.LANCZOS)
-    
-    # Save to bytes buffer
-    buffer = io.BytesIO()
-    image.save(buffer, format="JPEG")
-    buffer.seek(0)
-    
-    # Convert to base64
-    return base64.b64encode(buffer.read()).decode("utf-8")
-
+    return to_base64(prepare_image(image_source)[0])
@@ -0,0 +1,235 @@
+"""
+Memory-mapped ZIP code reference table for the address validator.
+
+Maps every 5-digit ZIP to its state, county and primary city using one
+binary file: a dense array of 100,000 (state, county, city) string ids
+followed by a deduplicated string table. Opening the file maps it read-only,
+so startup takes milliseconds and every worker process shares the same page
+cache instead of loading its own copy.
+
+File layout (little endian):
+
+    8 bytes   magic b"ZIPTBL01"
+    uint32    string count
+    uint32    string blob length
+    uint32    [100000, 3] state, county and city string ids (0 = unknown)
+    uint32    [string count + 1] string offsets
+    bytes     UTF-8 string blob
+
+Build from CSV (zip, state, county, city; common alternative column names
+such as zip_code, state_id, county_name and primary_city are accepted):
+
+    python zip_table.py build zips.csv /data/zip-table.bin
+"""
+
+import csv
+import logging
+import mmap
+import os
+import re
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ZIPTBL01"
+ZIP_COUNT = 100000
+_HEADER = np.dtype([("magic", "S8"), ("strings", "<u4"), ("blob", "<u4")])
+_COLUMN_ALIASES = {
+    "zip": ("zip", "zip_code", "zipcode", "postal_code"),
+    "state": ("state", "state_id", "state_code", "state_abbr"),
+    "county": ("county", "county_name"),
+    "city": ("city", "primary_city", "city_name"),
+}
+
+STATE_ABBREVIATIONS = {
+    "ALABAMA": "AL", "ALASKA": "AK", "ARIZONA": "AZ", "ARKANSAS": "AR", "CALIFORNIA": "CA",
+    "COLORADO": "CO", "CONNECTICUT": "CT", "DELAWARE": "DE", "DISTRICT OF COLUMBIA": "DC",
+    "FLORIDA": "FL", "GEORGIA": "GA", "HAWAII": "HI", "IDAHO": "ID", "ILLINOIS": "IL", "INDIANA": "IN",
+    "IOWA": "IA", "KANSAS": "KS", "KENTUCKY": "KY", "LOUISIANA": "LA", "MAINE": "ME", "MARYLAND": "MD",
+    "MASSACHUSETTS": "MA", "MICHIGAN": "MI", "MINNESOTA": "MN", "MISSISSIPPI": "MS", "MISSOURI": "MO",
+    "MONTANA": "MT", "NEBRASKA": "NE", "NEVADA": "NV", "NEW HAMPSHIRE": "NH", "NEW JERSEY": "NJ",
+    "NEW MEXICO": "NM", "NEW YORK": "NY", "NORTH CAROLINA": "NC", "NORTH DAKOTA": "ND", "OHIO": "OH",
+    "OKLAHOMA": "OK", "OREGON": "OR", "PENNSYLVANIA": "PA", "RHODE ISLAND": "RI", "SOUTH CAROLINA": "SC",
+    "SOUTH DAKOTA": "SD", "TENNESSEE": "TN", "TEXAS": "TX", "UTAH": "UT", "VERMONT": "VT",
+    "VIRGINIA": "VA", "WASHINGTON": "WA", "WEST VIRGINIA": "WV", "WISCONSIN": "WI", "WYOMING": "WY",
+    "PUERTO RICO": "PR", "GUAM": "GU", "VIRGIN ISLANDS": "VI", "AMERICAN SAMOA": "AS",
+    "NORTHERN MARIANA ISLANDS": "MP",
+}
+_CITY_WORDS = {"SAINT": "ST", "SAINTE": "STE", "FORT": "FT", "MOUNT": "MT"}
+
+
+def normalize_state(state: str) -> str:
+    """Two-letter state code from an abbreviation or full name ("" if empty)"""
+    text = re.sub(r"[^A-Z ]+", " ", (state or "").upper()).strip()
+    text = " ".join(text.split())
+    return STATE_ABBREVIATIONS.get(text, text)
+
+
+def normalize_city(city: str) -> str:
+    """Uppercase city without punctuation, with common abbreviations applied"""
+    words = re.sub(r"[^A-Z0-9 ]+", " ", (city or "").upper()).split()
+    return " ".join(_CITY_WORDS.get(word, word) for word in words)
+
+
+def _zip_int(zip_code: Any, pad: bool = False) -> Optional[int]:
+    text = str(zip_code or "").strip()
+    if pad and text.isdigit() and len(text) < 5:
+        text = text.zfill(5)  # spreadsheets drop leading zeros
+    return int(text[:5]) if len(text) >= 5 and text[:5].isdigit() else None
+
+
+def build_zip_table(rows: Iterable[Dict[str, Any]], path: str) -> int:
+    """
+    Write a ZIP table file
+
+    Args:
+        rows: Records with zip, state, county and city (or an alias of each)
+        path: Output file, replaced atomically
+
+    Returns:
+        int: Number of ZIP codes written
+    """
+    strings: List[str] = [""]
+    string_ids: Dict[str, int] = {"": 0}
+
+    def intern(value: Any) -> int:
+        value = str(value or "").strip()
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    table = np.zeros((ZIP_COUNT, 3), dtype="<u4")
+    count = 0
+    for row in rows:
+        fields = {name: next((row[alias] for alias in aliases if row.get(alias)), "")
+                  for name, aliases in _COLUMN_ALIASES.items()}
+        zip5 = _zip_int(fields["zip"], pad=True)
+        if zip5 is None:
+            continue
+        count += not table[zip5].any()
+        table[zip5] = (intern(normalize_state(fields["state"])), intern(fields["county"]), intern(fields["city"]))
+
+    encoded = [value.encode("utf-8") for value in strings]
+    offsets = np.concatenate(([0], np.cumsum([len(value) for value in encoded]))).astype("<u4")
+    blob = b"".join(encoded)
+    header = np.array([(MAGIC, len(strings), len(blob))], dtype=_HEADER)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.tobytes())
+        f.write(table.tobytes())
+        f.write(offsets.tobytes())
+        f.write(blob)
+    os.replace(tmp_path, path)
+    logger.info(f"Built ZIP table with {count} ZIP codes and {len(strings)} strings at {path}")
+    return count
+
+
+def read_zip_csv(path: str) -> Iterable[Dict[str, str]]:
+    """Stream ZIP rows from a CSV file with a header row"""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield {key.strip().lower(): value for key, value in row.items() if key}
+
+
+class ZipTable:
+    """
+    Read-only, memory-mapped ZIP table
+
+    Args:
+        path: File written by build_zip_table
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = np.frombuffer(self._mmap, dtype=_HEADER, count=1)[0]
+        if header["magic"] != MAGIC:
+            raise ValueError(f"{path} is not a ZIP table file")
+        offset = _HEADER.itemsize
+        self._table = np.frombuffer(self._mmap, dtype="<u4", count=ZIP_COUNT * 3, offset=offset).reshape(ZIP_COUNT, 3)
+        offset += self._table.nbytes
+        self._offsets = np.frombuffer(self._mmap, dtype="<u4", count=int(header["strings"]) + 1, offset=offset)
+        self._blob_start = offset + self._offsets.nbytes
+        self._strings: List[Optional[str]] = [None] * int(header["strings"])
+        self.zip_count = int(np.count_nonzero(self._table.any(axis=1)))
+
+    def __len__(self):
+        return self.zip_count
+
+    def _string(self, string_id: int) -> str:
+        value = self._strings[string_id]
+        if value is None:
+            start = self._blob_start + int(self._offsets[string_id])
+            end = self._blob_start + int(self._offsets[string_id + 1])
+            value = self._strings[string_id] = self._mmap[start:end].decode("utf-8")
+        return value
+
+    def lookup(self, zip_code: Any) -> Optional[Dict[str, str]]:
+        """State, county and primary city for a ZIP, or None if unknown"""
+        zip5 = _zip_int(zip_code)
+        if zip5 is None or not self._table[zip5].any():
+            return None
+        state, county, city = (self._string(int(string_id)) for string_id in self._table[zip5])
+        return {"state": state, "county": county, "city": city}
+
+    def check(self, zip_code: Any, city: str, state: str) -> Dict[str, Any]:
+        """
+        Cross-check a ZIP against the stated city and state
+
+        Returns:
+            dict: zip_known, state_match / city_match (None when unknown or not given),
+                  mismatches (list of field names) and the reference values
+        """
+        reference = self.lookup(zip_code)
+        if reference is None:
+            return {"zip_known": False, "state_match": None, "city_match": None, "mismatches": [], "reference": None}
+        state_match = normalize_state(state) == reference["state"] if state and reference["state"] else None
+        city_match = normalize_city(city) == normalize_city(reference["city"]) if city and reference["city"] else None
+        return {
+            "zip_known": True,
+            "state_match": state_match,
+            "city_match": city_match,
+            "mismatches": [field for field, match in (("state", state_match), ("city", city_match)) if match is False],
+            "reference": reference,
+        }
+
+    def check_many(self, zip_codes: List[Any], cities: List[str], states: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Vectorized check: reference ids are gathered in one array operation and
+        strings are normalized once per distinct value
+
+        Returns:
+            dict: zip_known, state_mismatch and city_mismatch boolean arrays
+        """
+        zips = np.array([_zip_int(zip_code) for zip_code in zip_codes], dtype=object)
+        zips = np.where(zips == None, -1, zips).astype(np.int64)  # noqa: E711 - elementwise comparison
+        ids = np.zeros((len(zip_codes), 3), dtype="<u4")
+        ids[zips >= 0] = self._table[zips[zips >= 0]]
+        zip_known = ids.any(axis=1)
+
+        def mismatch(column: int, values: List[str], normalize) -> np.ndarray:
+            expected = {int(string_id): normalize(self._string(int(string_id))) for string_id in np.unique(ids[:, column])}
+            normalized = {value: normalize(value) for value in set(values)}
+            given = np.array([normalized[value] for value in values], dtype=object)
+            reference = np.array([expected[int(string_id)] for string_id in ids[:, column]], dtype=object)
+            return zip_known & (given != "") & (reference != "") & (given != reference)
+
+        return {
+            "zip_known": zip_known,
+            "state_mismatch": mismatch(0, states, normalize_state),
+            "city_mismatch": mismatch(2, cities, normalize_city),
+        }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 4 or sys.argv[1] != "build":
+        print("Usage: python zip_table.py build <zips.csv> <zip-table.bin>")
+        sys.exit(1)
+    build_zip_table(read_zip_csv(sys.argv[2]), sys.argv[3])